@@ -0,0 +1,103 @@
+# import standard modules
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+
+# import project related modules
+from generators.lite import ENGINES
+
+
+def single(engine, q_type: int, seeds: list, fmt: str, rows: int, columns: int) -> list:
+    """
+    creates the tasks one by one like the task pool does
+    :return: list of (seed, input, output) tuples, failed seeds are left out
+    """
+    tasks = list()
+    for seed in seeds:
+        try:
+            tasks.append((seed, *engine.query_task(q_type, seed=seed, fmt=fmt, rows=rows, columns=columns)))
+        except Exception:
+            continue
+    return tasks
+
+
+def batch(engine, q_type: int, seeds: list, fmt: str, rows: int, columns: int) -> list:
+    """
+    creates the tasks at once - see QueryTable.query_tasks
+    """
+    return engine.query_tasks(q_type, seeds=seeds, fmt=fmt, rows=rows, columns=columns)
+
+
+def measure(function, *args) -> tuple:
+    """
+    :return: tuple with the seconds of the call and its result
+    """
+    start = time.perf_counter()
+    tasks = function(*args)
+    return time.perf_counter() - start, tasks
+
+
+def main(argv=None) -> int:
+    """
+    command line entry point - python -m benchmarks.batch --tasks 1000 --output batch.json
+    """
+
+    parser = argparse.ArgumentParser(description="compare the per task cost of single and batched task generation")
+    parser.add_argument("--tasks", type=int, default=1000, help="amount of tasks per query type")
+    parser.add_argument("--seed", type=int, default=0, help="seed the task seeds are derived from")
+    parser.add_argument("--format", choices=["records", "columns"], default="records", help="payload format")
+    parser.add_argument("--rows", type=int, default=5, help="amount of rows of the input tables")
+    parser.add_argument("--columns", type=int, default=0, help="amount of additional input columns")
+    parser.add_argument("--output", help="json file for the results, defaults to stdout")
+    args = parser.parse_args(argv)
+
+    engines = {name: engine() for name, engine in ENGINES.items()}
+    batch_engine = engines["pandas"]
+
+    query_types = dict()
+    for q_type in range(12):
+        # every path creates the tasks of the same seeds
+        rng = random.Random(f"{args.seed}:{q_type}")
+        seeds = [rng.randrange(2 ** 32) for _ in range(args.tasks)]
+
+        seconds, batched = measure(batch, batch_engine, q_type, seeds, args.format, args.rows, args.columns)
+        result = {"tasks": len(batched), "failed": len(seeds) - len(batched), "batch_us": seconds / len(seeds) * 1e6}
+
+        identical = True
+        for name, engine in engines.items():
+            seconds, tasks = measure(single, engine, q_type, seeds, args.format, args.rows, args.columns)
+            result[f"{name}_us"] = seconds / len(seeds) * 1e6
+            result[f"speedup_{name}"] = result[f"{name}_us"] / result["batch_us"] if result["batch_us"] else None
+            identical &= repr(tasks) == repr(batched)
+
+        result["identical"] = identical
+        query_types[q_type] = result
+        print(f"query_type {q_type:2}: batch {result['batch_us']:7.1f}us, pandas {result['pandas_us']:7.1f}us, "
+              f"lite {result['lite_us']:7.1f}us per task, speedup {result['speedup_pandas']:.1f}x / "
+              f"{result['speedup_lite']:.1f}x, identical {identical}", file=sys.stderr)
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "tasks": args.tasks,
+        "format": args.format,
+        "rows": args.rows,
+        "columns": args.columns,
+        "query_types": query_types
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    return 0 if all(result["identical"] for result in query_types.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
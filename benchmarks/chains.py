@@ -0,0 +1,137 @@
+# import standard modules
+import sys
+import json
+import time
+import hashlib
+import platform
+import argparse
+import itertools
+
+# import project related modules
+from generators.tables import QueryTable
+from generators.chains import TaskGraph
+
+
+# step mixes of the mix workload, the same seed and first query type diverge after the first step
+MIXES = [None, {5: 2, 6: 1}, [0, 6, 7], [2, 11], {1: 1, 3: 1, 9: 1}]
+
+
+def digest(table) -> str:
+    """
+    :return: hash of the labels and values of a table, repeated labels included
+    """
+    content = json.dumps([table.columns.tolist(), table.to_numpy().tolist()], default=str)
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def curriculum(engine: QueryTable, seeds: int, length: int):
+    """
+    yields the output digests of chains of growing length per seed and first query type, every chain extends the
+    previous one by a step
+    """
+    for seed, q_type in itertools.product(range(seeds), range(12)):
+        for steps in range(1, length + 1):
+            _, output_table, path = engine.chained(q_type, seed=seed, steps=steps)
+            yield path, digest(output_table)
+
+
+def mixes(engine: QueryTable, seeds: int, length: int):
+    """
+    yields the output digests of chains with different step mixes per seed and first query type
+    """
+    for seed, q_type, mix in itertools.product(range(seeds), range(12), MIXES):
+        _, output_table, path = engine.chained(q_type, seed=seed, steps=length, mix=mix)
+        yield path, digest(output_table)
+
+
+def tree(engine: QueryTable, seeds: int, length: int, q_types=(0, 2, 6, 7, 11)):
+    """
+    yields the output digests of all explicit chains of the given length over a few query types per seed, chains not
+    applicable to an intermediate table yield None
+    """
+    for seed in range(seeds):
+        for path in itertools.product(q_types, repeat=length):
+            try:
+                _, output_table = engine.chain(path, seed=seed)
+            except ValueError:
+                yield list(path), None
+                continue
+            yield list(path), digest(output_table)
+
+
+WORKLOADS = {"curriculum": curriculum, "mixes": mixes, "tree": tree}
+
+
+def measure(workload, seeds: int, length: int, max_nodes: int) -> tuple:
+    """
+    runs a workload on a new engine with its own task graph
+    :return: tuple with the results and the list of chains with their output digests
+    """
+    engine = QueryTable()
+    engine.graph = TaskGraph(max_nodes=max_nodes)
+
+    start = time.perf_counter()
+    outputs = list(workload(engine, seeds, length))
+    seconds = time.perf_counter() - start
+
+    stats = engine.graph.stats()
+    return {
+        "chains": len(outputs),
+        "seconds": seconds,
+        "chains_per_second": len(outputs) / seconds if seconds else 0.0,
+        "computed_steps": stats["computed"],
+        "hits": stats["hits"]
+    }, outputs
+
+
+def main(argv=None) -> int:
+    """
+    command line entry point - python -m benchmarks.chains --seeds 50 --length 4 --output chains.json
+    """
+
+    parser = argparse.ArgumentParser(description="compare chained task generation with and without memoized tables")
+    parser.add_argument("--seeds", type=int, default=20, help="amount of seeds per workload")
+    parser.add_argument("--length", type=int, default=4, help="maximum amount of steps of a chain")
+    parser.add_argument("--max-nodes", type=int, default=256, help="memoized nodes of the task graph")
+    parser.add_argument("--workloads", nargs="+", choices=list(WORKLOADS), default=list(WORKLOADS),
+                        help="workloads to measure")
+    parser.add_argument("--output", help="json file for the results, defaults to stdout")
+    args = parser.parse_args(argv)
+
+    # both modes use the same engine and have to create the same chains, only the amount of computed steps differs
+    workloads = dict()
+    for name in args.workloads:
+        memo, memo_outputs = measure(WORKLOADS[name], args.seeds, args.length, args.max_nodes)
+        plain, plain_outputs = measure(WORKLOADS[name], args.seeds, args.length, 0)
+        workloads[name] = {
+            "memo": memo,
+            "no_memo": plain,
+            "speedup": plain["seconds"] / memo["seconds"] if memo["seconds"] else None,
+            "saved_steps": 1 - memo["computed_steps"] / plain["computed_steps"] if plain["computed_steps"] else None,
+            "identical": memo_outputs == plain_outputs
+        }
+        print(f"{name:10}: {memo['chains']} chains, memo {memo['seconds']:.2f}s {memo['computed_steps']} steps, "
+              f"no memo {plain['seconds']:.2f}s {plain['computed_steps']} steps, speedup "
+              f"{workloads[name]['speedup']:.2f}x, identical {workloads[name]['identical']}", file=sys.stderr)
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seeds": args.seeds,
+        "length": args.length,
+        "max_nodes": args.max_nodes,
+        "workloads": workloads
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    return 0 if all(workload["identical"] for workload in workloads.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+# import standard modules
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import resource
+import tempfile
+import itertools
+
+# import third party modules
+import numpy as np
+
+# import project related modules
+from server.dedup import DedupIndex
+
+
+WORDS = ("select filter rows columns where price count sum average group by city customer order sort descending "
+         "ascending name table value greater less than equal top first last unique distinct join merge age date "
+         "revenue product category total maximum minimum missing drop keep").split()
+
+
+def mutate(text: str, rng: random.Random) -> str:
+    """
+    :return: near duplicate of a text like a contributor copying an earlier answer or a spam bot would create
+    """
+    words = text.split()
+    edit = rng.randrange(4)
+    if edit == 0:
+        return text.upper() + rng.choice(["", " !", "  ", "."])
+    if edit == 1:
+        return "  ".join(words) + " "
+    if edit == 2 and len(words) > 8:
+        del words[rng.randrange(len(words))]
+        return " ".join(words)
+    return text.replace(" ", "\t", 1) + rng.choice([",", ";", ""])
+
+
+def corpus(rows: int, duplicate_rate: float, query_types: int, seed: int, start: int = 0):
+    """
+    yields synthetic rows with id as bytes, query type, text and the id of the original text a near duplicate was
+    copied from (None for originals)
+    """
+    rng = random.Random(seed)
+    originals = list()
+    for number in range(start, start + rows):
+        id_ = number.to_bytes(16, "big")
+        if originals and rng.random() < duplicate_rate:
+            source, query_type, text = rng.choice(originals)
+            yield id_, query_type, mutate(text, rng), source
+            continue
+
+        query_type = rng.randrange(query_types)
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 30)))
+        originals.append((id_, query_type, text))
+        # bounded amount of sources, like copies of recent answers
+        if len(originals) > 10000:
+            originals.pop(rng.randrange(len(originals)))
+        yield id_, query_type, text, None
+
+
+def index_pass(index: DedupIndex, rows, chunk_size: int, clusters: np.ndarray, sources: np.ndarray) -> dict:
+    """
+    indexes rows in chunks and keeps the cluster and the source of every row as row numbers in the passed arrays
+    :return: dict with rows, seconds and rows per second
+    """
+    chunk = list()
+    count = 0
+    start = time.perf_counter()
+
+    def flush():
+        for id_, _, cluster, _ in index.add(chunk):
+            clusters[int.from_bytes(id_, "big")] = int.from_bytes(cluster, "big")
+        chunk.clear()
+
+    for id_, query_type, text, source in rows:
+        chunk.append((id_, query_type, text))
+        sources[int.from_bytes(id_, "big")] = -1 if source is None else int.from_bytes(source, "big")
+        count += 1
+        if len(chunk) == chunk_size:
+            flush()
+    flush()
+
+    seconds = time.perf_counter() - start
+    return {"rows": count, "seconds": seconds, "rows_per_second": count / seconds if seconds else 0.0}
+
+
+def quality(clusters: np.ndarray, sources: np.ndarray) -> dict:
+    """
+    :return: dict with the share of planted near duplicates found in the cluster of their original and the share of
+    originals wrongly assigned to the cluster of another original
+    """
+    planted = np.flatnonzero(sources >= 0)
+    originals = np.flatnonzero(sources == -1)
+    return {
+        "planted": len(planted),
+        "recall": float(np.mean(clusters[planted] == clusters[sources[planted]])) if len(planted) else None,
+        "merged_originals": float(np.mean(clusters[originals] != originals)) if len(originals) else None
+    }
+
+
+def main(argv=None) -> int:
+    """
+    command line entry point - python -m benchmarks.dedup --rows 1000000 --increment 0.05 --output dedup.json
+    """
+
+    parser = argparse.ArgumentParser(description="measure throughput, memory and quality of the near duplicate index")
+    parser.add_argument("--rows", type=int, default=200000, help="rows of the first pass")
+    parser.add_argument("--increment", type=float, default=0.05, help="share of rows added for the incremental pass")
+    parser.add_argument("--duplicate-rate", type=float, default=0.2, help="share of planted near duplicates")
+    parser.add_argument("--query-types", type=int, default=10, help="amount of query types")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="rows indexed at once")
+    parser.add_argument("--threshold", type=float, default=0.8, help="similarity threshold of the index")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the synthetic corpus")
+    parser.add_argument("--output", help="json file for the results, defaults to stdout")
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix="querycollect-dedup-")
+    path = os.path.join(directory, "index.sqlite")
+    memory_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # cluster and source row number of every row, -1 marks an original
+    added = int(args.rows * args.increment)
+    clusters = np.full(args.rows + added, -2, dtype=np.int64)
+    sources = np.full(args.rows + added, -1, dtype=np.int64)
+
+    index = DedupIndex(path, threshold=args.threshold)
+    first = index_pass(index, corpus(args.rows, args.duplicate_rate, args.query_types, args.seed),
+                       args.chunk_size, clusters, sources)
+    first_quality = quality(clusters[:args.rows], sources[:args.rows])
+
+    # the incremental pass reads the newest rows of the first pass again, like the overlap of flask dedup, which are
+    # skipped, and indexes the added rows
+    rows = itertools.islice(corpus(args.rows + added, args.duplicate_rate, args.query_types, args.seed),
+                            args.rows - added, None)
+    second = index_pass(index, rows, args.chunk_size, clusters, sources)
+    index.close()
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "rows": args.rows,
+        "threshold": args.threshold,
+        "first_pass": dict(first, **first_quality),
+        "incremental_pass": dict(second, added=added),
+        "index_bytes": sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)),
+        # ru_maxrss is the peak of the process in KiB on linux, the corpus of the incremental pass is included
+        "peak_rss_growth_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - memory_before
+    }
+
+    print(f"first pass {first['rows_per_second']:.0f} rows/s, recall {first_quality['recall']:.3f}, merged originals "
+          f"{first_quality['merged_originals']:.4f}, incremental pass of {added} rows {second['seconds']:.2f}s, "
+          f"index {results['index_bytes'] / 1e6:.1f}MB", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
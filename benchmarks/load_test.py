@@ -0,0 +1,351 @@
+# import standard modules
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import random
+import signal
+import platform
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+import urllib.parse
+
+# import project related modules
+from benchmarks.query_table import summarize
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the task of the index page is embedded as json into the page shell
+TASK_DATA = re.compile(r'<script id="task-data" type="application/json">(.*?)</script>', re.S)
+SAMPLE = re.compile(r'^(\w+)(\{[^}]*\})? (\S+)$')
+
+
+class Recorder:
+    """
+    collects the latency of every request per route of the current stage
+    """
+
+    def __init__(self):
+        self.latencies = dict()
+        self.errors = dict()
+        self._lock = threading.Lock()
+
+    def observe(self, route: str, seconds: float, error: str = None) -> None:
+        with self._lock:
+            if error is None:
+                self.latencies.setdefault(route, list()).append(seconds)
+            else:
+                key = f"{route}:{error}"
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+    def take(self) -> tuple:
+        """
+        :return: tuple with the latencies and errors since the last call
+        """
+        with self._lock:
+            latencies, errors = self.latencies, self.errors
+            self.latencies, self.errors = dict(), dict()
+        return latencies, errors
+
+
+class Session(threading.Thread):
+    """
+    virtual contributor looping through the task page: fetch a task, think, submit a query or skip the task and
+    follow the redirect carrying the streak to the next task. Every contributor keeps its own connection alive.
+    """
+
+    def __init__(self, url: str, recorder: Recorder, think_time: float, skip_rate: float, stop: threading.Event,
+                 client: str = None):
+        super().__init__(daemon=True)
+        parts = urllib.parse.urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.recorder = recorder
+        self.think_time = think_time
+        self.skip_rate = skip_rate
+        self.stop = stop
+        self.client = client
+        self.connection = None
+
+    def request(self, route: str, method: str, path: str, body: dict = None) -> tuple:
+        """
+        :return: tuple with status, redirect location and body of the response or None in case the request failed
+        """
+        headers = {"Accept-Encoding": "gzip"}
+        if self.client:
+            # every contributor is its own client for the admission control of the app
+            headers["X-Forwarded-For"] = self.client
+        data = None
+        if body is not None:
+            data = urllib.parse.urlencode(body)
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+
+        start = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            self.connection.request(method, path, body=data, headers=headers)
+            response = self.connection.getresponse()
+            content = response.read()
+        except (OSError, http.client.HTTPException) as exc:
+            self.recorder.observe(route, time.perf_counter() - start, error=type(exc).__name__)
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+            return None
+
+        seconds = time.perf_counter() - start
+        if response.status >= 400:
+            self.recorder.observe(route, seconds, error=str(response.status))
+            return None
+
+        self.recorder.observe(route, seconds)
+        if response.getheader("Content-Encoding") == "gzip":
+            content = gzip.decompress(content)
+        return response.status, response.getheader("Location"), content
+
+    def think(self) -> None:
+        # think times of contributors are skewed, a few take much longer than the mean
+        self.stop.wait(random.expovariate(1 / self.think_time) if self.think_time > 0 else 0)
+
+    def run(self) -> None:
+        path = "/"
+        while not self.stop.is_set():
+            response = self.request("index", "GET", path)
+            if response is None:
+                self.think()
+                path = "/"
+                continue
+
+            match = TASK_DATA.search(response[2].decode("utf-8", "replace"))
+            task = json.loads(match.group(1)) if match else dict()
+            streak = task.get("streak", 0)
+
+            self.think()
+            if self.stop.is_set():
+                break
+
+            if random.random() < self.skip_rate:
+                response = self.request("skip", "POST", "/skip", {"streak": streak})
+            else:
+                response = self.request("add_query", "POST", "/add_query", {
+                    "query_type": task.get("query_type", 0),
+                    "seed": task.get("seed", ""),
+                    "streak": streak,
+                    "query_input": f"load test query {random.getrandbits(32)}"
+                })
+
+            # follow the redirect to the next task, it holds the new streak
+            path = "/"
+            if response is not None and response[1]:
+                location = urllib.parse.urlsplit(response[1])
+                path = f"{location.path}?{location.query}" if location.query else location.path
+
+        if self.connection is not None:
+            self.connection.close()
+
+
+def scrape(url: str) -> dict:
+    """
+    :param url: base url of the app
+    :return: dict with the samples of the metrics endpoint, keyed by name and labels
+    """
+    parts = urllib.parse.urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=10)
+    try:
+        connection.request("GET", "/metrics")
+        text = connection.getresponse().read().decode("utf-8")
+    except (OSError, http.client.HTTPException):
+        return dict()
+    finally:
+        connection.close()
+
+    samples = dict()
+    for line in text.splitlines():
+        match = SAMPLE.match(line)
+        if match:
+            samples[match.group(1) + (match.group(2) or "")] = float(match.group(3))
+    return samples
+
+
+def contention(before: dict, after: dict) -> dict:
+    """
+    :return: dict with the bulk inserts of a stage, their mean duration, database errors, the write queue depth and the
+    checkouts, their mean duration, timeouts and connections in use of the pool of every bind
+    """
+    def delta(name: str) -> float:
+        return after.get(name, 0.0) - before.get(name, 0.0)
+
+    commits = delta("querycollect_db_commit_seconds_count")
+    db_errors = sum(value - before.get(key, 0.0) for key, value in after.items()
+                    if key.startswith("querycollect_errors_total") and 'source="db"' in key)
+    pools = dict()
+    for bind in ("write", "read"):
+        labels = f'{{bind="{bind}"}}'
+        checkouts = delta("querycollect_db_pool_checkout_seconds_count" + labels)
+        if not checkouts:
+            continue
+        pools[bind] = {
+            "checkouts": checkouts,
+            "checkout_mean_ms": delta("querycollect_db_pool_checkout_seconds_sum" + labels) / checkouts * 1000,
+            "timeouts": delta("querycollect_db_pool_timeouts_total" + labels),
+            "checked_out": after.get("querycollect_db_pool_checked_out" + labels),
+            "capacity": after.get("querycollect_db_pool_capacity" + labels)
+        }
+
+    return {
+        "commits": commits,
+        "commit_mean_ms": delta("querycollect_db_commit_seconds_sum") / commits * 1000 if commits else None,
+        "db_errors": db_errors,
+        "write_queue_depth": after.get("querycollect_write_queue_depth"),
+        "pools": pools
+    }
+
+
+def start_server(port: int, database_url: str, workers: int, sync_writes: bool,
+                 read_database_url: str = None) -> subprocess.Popen:
+    """
+    starts the app with gunicorn like the production entry point, by default on a fresh sqlite file
+    :return: gunicorn process
+    """
+    directory = tempfile.mkdtemp(prefix="querycollect-load-")
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])),
+        PORT=str(port),
+        WEB_WORKERS=str(workers),
+        SQLALCHEMY_DATABASE_URI=database_url or f"sqlite:///{os.path.join(directory, 'load.db')}",
+        WRITE_BEHIND_SPOOL=os.path.join(directory, "spool", "free_query.jsonl"),
+        WRITE_BEHIND_SYNC="true" if sync_writes else "false",
+        METRICS_DIR=os.path.join(directory, "metrics"),
+        ADMISSION_CLIENT_HEADER="X-Forwarded-For"
+    )
+    if read_database_url:
+        env["SQLALCHEMY_READ_DATABASE_URI"] = read_database_url
+    command = [sys.executable, "-m", "gunicorn", "--config", os.path.join(ROOT, "server", "gunicorn.conf.py"),
+               "--chdir", os.path.join(ROOT, "server"), "--access-logfile", os.devnull, "app:create_app()"]
+    return subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_ready(url: str, timeout: float = 60.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if scrape(url):
+            return True
+        time.sleep(0.5)
+    return False
+
+
+def run(url: str, ramp: list, stage_seconds: float, think_time: float, skip_rate: float) -> list:
+    """
+    runs one stage per concurrency level of the ramp, the sessions of a stage keep running in the next stage
+    :return: list with the throughput, the latency per route and the database contention of every stage
+    """
+    recorder = Recorder()
+    stop = threading.Event()
+    sessions = list()
+    stages = list()
+
+    try:
+        for users in ramp:
+            while len(sessions) < users:
+                client = f"10.{len(sessions) // 65536 % 256}.{len(sessions) // 256 % 256}.{len(sessions) % 256}"
+                sessions.append(Session(url, recorder, think_time, skip_rate, stop, client=client))
+                sessions[-1].start()
+
+            before = scrape(url)
+            recorder.take()
+            time.sleep(stage_seconds)
+            latencies, errors = recorder.take()
+            after = scrape(url)
+
+            requests = sum(len(values) for values in latencies.values())
+            stage = {
+                "users": users,
+                "seconds": stage_seconds,
+                "requests_per_second": requests / stage_seconds,
+                "tasks_per_second": len(latencies.get("index", [])) / stage_seconds,
+                "routes": {route: summarize(values) for route, values in latencies.items()},
+                "errors": errors,
+                "database": contention(before, after)
+            }
+            stages.append(stage)
+
+            index = stage["routes"].get("index")
+            database = stage["database"]
+            print(f"{users:4} users: {stage['requests_per_second']:7.1f} req/s, index p50 "
+                  f"{index['p50_ms'] if index else 0:7.1f}ms p99 {index['p99_ms'] if index else 0:7.1f}ms, "
+                  f"{database['commits']:4.0f} commits "
+                  f"{database['commit_mean_ms'] or 0:6.1f}ms, errors {sum(errors.values())}", file=sys.stderr)
+    finally:
+        stop.set()
+        for session in sessions:
+            session.join(timeout=30)
+
+    return stages
+
+
+def main(argv=None) -> int:
+    """
+    command line entry point - python -m benchmarks.load_test --ramp 1 10 50 100 --stage-seconds 30
+    """
+
+    parser = argparse.ArgumentParser(description="drive contributor sessions against the app with a concurrency ramp")
+    parser.add_argument("--url", help="base url of a running app, by default gunicorn is started on a sqlite file")
+    parser.add_argument("--database-url", help="database of the started app, defaults to a fresh sqlite file")
+    parser.add_argument("--read-database-url", help="read bind of the started app, e.g. a second sqlite file")
+    parser.add_argument("--port", type=int, default=8099, help="port of the started app")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn worker processes of the started app")
+    parser.add_argument("--sync-writes", action="store_true", help="insert every submission within its request")
+    parser.add_argument("--ramp", type=int, nargs="+", default=[1, 5, 10, 25, 50], help="concurrent users per stage")
+    parser.add_argument("--stage-seconds", type=float, default=20.0, help="duration of every stage")
+    parser.add_argument("--think-time", type=float, default=1.0, help="mean seconds a user looks at a task")
+    parser.add_argument("--skip-rate", type=float, default=0.2, help="share of tasks skipped instead of answered")
+    parser.add_argument("--output", help="json file for the results, defaults to stdout")
+    args = parser.parse_args(argv)
+
+    server = None
+    url = args.url
+    if url is None:
+        url = f"http://127.0.0.1:{args.port}"
+        server = start_server(args.port, args.database_url, args.workers, args.sync_writes, args.read_database_url)
+        if not wait_ready(url):
+            server.terminate()
+            print(f"app did not start on {url}", file=sys.stderr)
+            return 1
+
+    try:
+        stages = run(url, args.ramp, args.stage_seconds, args.think_time, args.skip_rate)
+    finally:
+        if server is not None:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "url": args.url or "gunicorn",
+        "workers": None if args.url else args.workers,
+        "sync_writes": args.sync_writes,
+        "think_time": args.think_time,
+        "skip_rate": args.skip_rate,
+        "stages": stages
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,234 @@
+# import standard modules
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import tracemalloc
+
+# import project related modules
+from generators.lite import ENGINES
+
+
+class GeneratorTimer:
+    """
+    wraps the data generating methods of a DataSetGenerator instance and sums up the time spent in them. Nested calls,
+    e.g. generate calling column_name_generator, are only counted once.
+    """
+
+    methods = ("generate", "column_name_generator", "generate_string_column", "generate_int_column",
+               "generate_float_column")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self._depth = 0
+        self._attached = list()
+
+    def attach(self, data_generator) -> None:
+        """
+        :param data_generator: DataSetGenerator instance whose methods are timed, engines share one instance, so it is
+        only wrapped once
+        """
+        if any(attached is data_generator for attached in self._attached):
+            return
+
+        for name in self.methods:
+            setattr(data_generator, name, self._wrap(getattr(data_generator, name)))
+        self._attached.append(data_generator)
+
+    def detach(self) -> None:
+        """
+        removes the timing wrappers from all attached instances
+        """
+        for data_generator in self._attached:
+            for name in self.methods:
+                delattr(data_generator, name)
+        self._attached = list()
+
+    def _wrap(self, method):
+        def timed(*args, **kwargs):
+            if self._depth:
+                return method(*args, **kwargs)
+
+            self._depth += 1
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.seconds += time.perf_counter() - start
+                self._depth -= 1
+
+        return timed
+
+
+def percentile(values: list, q: float) -> float:
+    """
+    :param values: sorted list of values
+    :param q: percentile between 0 and 100
+    :return: nearest rank percentile of the values
+    """
+    ix = min(len(values) - 1, max(0, round(q / 100 * len(values) + 0.5) - 1))
+    return values[ix]
+
+
+def summarize(seconds: list) -> dict:
+    """
+    :param seconds: list of measured durations in seconds
+    :return: dict with the latency distribution in milliseconds
+    """
+    values = sorted(s * 1000 for s in seconds)
+    return {
+        "mean_ms": statistics.fmean(values),
+        "min_ms": values[0],
+        "p50_ms": percentile(values, 50),
+        "p95_ms": percentile(values, 95),
+        "p99_ms": percentile(values, 99),
+        "max_ms": values[-1]
+    }
+
+
+def measure(engine_class, q_type: int, iterations: int, cold: bool, rows: int = 5, columns: int = 0) -> dict:
+    """
+    measures the creation of tasks of one query type
+    :param engine_class: QueryTable class to benchmark
+    :param q_type: query type (0 - 11)
+    :param iterations: amount of created tasks
+    :param cold: True creates a new engine per task like the index view did, False reuses one engine
+    :param rows: amount of rows of the input tables
+    :param columns: amount of additional input columns
+    :return: dict with latency distribution, share of DataSetGenerator calls and engine construction and allocations
+    """
+
+    timer = GeneratorTimer()
+    engine = None if cold else engine_class()
+    if engine is not None:
+        timer.attach(engine.data_generator)
+
+    seconds = list()
+    construction = 0.0
+    errors = 0
+    for seed in range(iterations):
+        start = time.perf_counter()
+        if cold:
+            engine = engine_class()
+            construction += time.perf_counter() - start
+            timer.attach(engine.data_generator)
+        try:
+            engine.query_task(q_type, seed=seed, rows=rows, columns=columns)
+        except Exception:
+            errors += 1
+        seconds.append(time.perf_counter() - start)
+
+    timer.detach()
+
+    result = summarize(seconds)
+    result["generator_share"] = timer.seconds / sum(seconds)
+    result["construction_share"] = construction / sum(seconds)
+    result["errors"] = errors
+
+    # allocations are measured in a separate run, since tracing slows down every allocation
+    allocation_runs = max(1, min(iterations, 50))
+    tracemalloc.start()
+    try:
+        for seed in range(allocation_runs):
+            if cold:
+                engine = engine_class()
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            try:
+                engine.query_task(q_type, seed=seed, rows=rows, columns=columns)
+            except Exception:
+                pass
+            peak = tracemalloc.get_traced_memory()[1] - before
+            result["peak_kib"] = max(result.get("peak_kib", 0.0), peak / 1024)
+    finally:
+        tracemalloc.stop()
+
+    return result
+
+
+def run(engines: list, q_types: list, iterations: int, cold_iterations: int, rows: int = 5, columns: int = 0) -> dict:
+    """
+    :return: dict with the environment and the results per engine, path (cold / warm) and query type
+    """
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "iterations": {"warm": iterations, "cold": cold_iterations},
+        "rows": rows,
+        "columns": columns,
+        "results": dict()
+    }
+
+    for name in engines:
+        results["results"][name] = {"warm": dict(), "cold": dict()}
+        for q_type in q_types:
+            for path, count in (("warm", iterations), ("cold", cold_iterations)):
+                result = measure(ENGINES[name], q_type, count, cold=path == "cold", rows=rows, columns=columns)
+                results["results"][name][path][str(q_type)] = result
+                print(f"{name:6} {path:4} query_type {q_type:2}: p50 {result['p50_ms']:7.3f}ms "
+                      f"p99 {result['p99_ms']:7.3f}ms generator {result['generator_share']:5.1%}", file=sys.stderr)
+
+    return results
+
+
+def regressions(current: dict, baseline: dict, tolerance: float) -> list:
+    """
+    compares the p50 latencies of two runs
+    :param current: results of this run
+    :param baseline: results of a previous run
+    :param tolerance: allowed relative slow down e.g. 0.2 for 20 %
+    :return: list of messages for every engine, path and query type slower than the tolerance
+    """
+    messages = list()
+    for name, paths in current["results"].items():
+        for path, q_types in paths.items():
+            for q_type, result in q_types.items():
+                previous = baseline.get("results", {}).get(name, {}).get(path, {}).get(q_type)
+                if previous and result["p50_ms"] > previous["p50_ms"] * (1 + tolerance):
+                    messages.append(
+                        f"{name} {path} query_type {q_type}: p50 {previous['p50_ms']:.3f}ms -> {result['p50_ms']:.3f}ms"
+                    )
+    return messages
+
+
+def main(argv=None) -> int:
+    """
+    command line entry point - python -m benchmarks.query_table --output bench.json --baseline previous.json
+    :return: exit code, 1 in case of a regression against the baseline
+    """
+
+    parser = argparse.ArgumentParser(description="benchmark the task generation per query type")
+    parser.add_argument("--engines", nargs="*", choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument("--types", type=int, nargs="*", default=list(range(12)), help="query types to benchmark")
+    parser.add_argument("--iterations", type=int, default=200, help="tasks per query type on the warm path")
+    parser.add_argument("--cold-iterations", type=int, default=20, help="tasks per query type on the cold path")
+    parser.add_argument("--rows", type=int, default=5, help="amount of rows of the input tables")
+    parser.add_argument("--columns", type=int, default=0, help="amount of additional input columns")
+    parser.add_argument("--output", help="json file for the results, defaults to stdout")
+    parser.add_argument("--baseline", help="json file of a previous run to compare the p50 latencies with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slow down against the baseline")
+    args = parser.parse_args(argv)
+
+    results = run(args.engines, args.types, args.iterations, args.cold_iterations, args.rows, args.columns)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            messages = regressions(results, json.load(file), args.tolerance)
+        for message in messages:
+            print(f"regression {message}", file=sys.stderr)
+        return 1 if messages else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
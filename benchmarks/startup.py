@@ -0,0 +1,99 @@
+# import standard modules
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+
+# import project related modules
+from benchmarks.query_table import summarize
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# measured in a fresh interpreter, so every run pays for the imports like a booting worker process
+PROBE = """
+import sys, json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+instance = app.create_app()
+created = time.perf_counter()
+pandas_loaded = "pandas" in sys.modules
+client = instance.test_client()
+first = client.get("/")
+first_done = time.perf_counter()
+second = client.get("/")
+second_done = time.perf_counter()
+instance.extensions["querycollect"].stop()
+print(json.dumps({
+    "import": imported - start,
+    "create_app": created - imported,
+    "first_request": first_done - created,
+    "second_request": second_done - first_done,
+    "status": [first.status_code, second.status_code],
+    "pandas_before_first_request": pandas_loaded
+}))
+"""
+
+
+def probe(directory: str, run: int) -> dict:
+    """
+    starts a fresh interpreter in the server folder measuring the import of the app, the app factory and the first
+    two requests against a new sqlite file
+    :return: dict with the measured seconds of the run
+    """
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])),
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(directory, f'startup-{run}.db')}",
+        WRITE_BEHIND_SPOOL=os.path.join(directory, f"spool-{run}", "free_query.jsonl"),
+        WRITE_BEHIND_SYNC="true"
+    )
+    env.pop("METRICS_DIR", None)
+    output = subprocess.run([sys.executable, "-W", "ignore", "-c", PROBE], cwd=os.path.join(ROOT, "server"), env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    """
+    command line entry point - python -m benchmarks.startup --runs 10 --output startup.json
+    """
+
+    parser = argparse.ArgumentParser(description="measure import, app factory and first request latency of the app")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters started")
+    parser.add_argument("--output", help="json file for the results, defaults to stdout")
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix="querycollect-startup-")
+    runs = [probe(directory, run) for run in range(args.runs)]
+
+    phases = ("import", "create_app", "first_request", "second_request")
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "runs": args.runs,
+        "phases": {phase: summarize([run[phase] for run in runs]) for phase in phases},
+        "pandas_before_first_request": any(run["pandas_before_first_request"] for run in runs),
+        "statuses": sorted({status for run in runs for status in run["status"]})
+    }
+
+    print(", ".join(f"{phase} p50 {results['phases'][phase]['p50_ms']:.1f}ms" for phase in phases) +
+          f", pandas imported before the first request: {results['pandas_before_first_request']}", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
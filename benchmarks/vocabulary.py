@@ -0,0 +1,133 @@
+# import standard modules
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import subprocess
+
+
+# a fresh process per mode and worker, so the memory of one mode does not include the other
+MODES = ("csv", "shared")
+
+
+def memory() -> dict:
+    """
+    :return: dict with the resident memory of this process in KiB, on linux split into proportional, shared and private
+    memory, so pages of a memory mapped file shared with other processes are visible
+    """
+    fields = {"Rss": "rss_kib", "Pss": "pss_kib", "Shared_Clean": "shared_kib", "Private_Clean": "private_kib",
+              "Private_Dirty": "private_kib"}
+    try:
+        result = dict.fromkeys(fields.values(), 0)
+        with open("/proc/self/smaps_rollup", encoding="utf-8") as file:
+            for line in file:
+                name, _, value = line.partition(":")
+                if name in fields:
+                    result[fields[name]] += int(value.split()[0])
+        return result
+    except OSError:
+        import resource
+        return {"rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+
+
+def worker(mode: str, constructions: int) -> dict:
+    """
+    runs in a child process and builds engines the way a worker process does
+    :param mode: csv builds a DataSetGenerator per engine like before, shared uses the memory mapped vocabulary
+    :param constructions: amount of engines built after the first one
+    :return: dict with the memory before and after and the construction times in milliseconds
+    """
+    from randomtables import DataSetGenerator
+    from generators.tables import QueryTable
+    from generators.vocabulary import load_vocabulary
+
+    # the compiled file is created once outside of the measurement, like the first worker or the image build does
+    if mode == "shared":
+        load_vocabulary().close()
+
+    before = memory()
+
+    def build():
+        if mode == "csv":
+            return DataSetGenerator()
+        return QueryTable()
+
+    # the first generator of a process is built from the csv files or from the mapped file
+    start = time.perf_counter()
+    engines = [DataSetGenerator() if mode == "csv" else load_vocabulary().generator()]
+    first = time.perf_counter() - start
+
+    seconds = list()
+    for _ in range(constructions):
+        start = time.perf_counter()
+        engines.append(build())
+        seconds.append(time.perf_counter() - start)
+
+    # a worker keeps the engine of the task pool and drops the ones of inline generations
+    del engines[1:]
+
+    return {
+        "first_ms": first * 1000,
+        "construction_p50_ms": statistics.median(seconds) * 1000 if seconds else None,
+        "memory_before": before,
+        "memory_after": memory()
+    }
+
+
+def measure(mode: str, workers: int, constructions: int) -> list:
+    """
+    starts the worker processes of a mode at the same time and collects their results
+    :return: list with the result of every worker process
+    """
+    command = [sys.executable, "-m", "benchmarks.vocabulary", "--worker", mode, "--constructions", str(constructions)]
+    processes = [subprocess.Popen(command, stdout=subprocess.PIPE) for _ in range(workers)]
+    # the result is the last line, imported modules might print before
+    return [json.loads(process.communicate()[0].splitlines()[-1]) for process in processes]
+
+
+def main(argv=None) -> int:
+    """
+    command line entry point - python -m benchmarks.vocabulary --workers 4 --output vocabulary.json
+    """
+
+    parser = argparse.ArgumentParser(description="compare memory and construction time of the generator vocabulary")
+    parser.add_argument("--workers", type=int, default=4, help="worker processes per mode")
+    parser.add_argument("--constructions", type=int, default=50, help="engines built per worker after the first")
+    parser.add_argument("--output", help="json file for the results, defaults to stdout")
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(worker(args.worker, args.constructions)))
+        return 0
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "workers": args.workers,
+        "results": dict()
+    }
+
+    for mode in MODES:
+        runs = results["results"][mode] = measure(mode, args.workers, args.constructions)
+        after = [run["memory_after"] for run in runs]
+        growth = [run["memory_after"]["rss_kib"] - run["memory_before"]["rss_kib"] for run in runs]
+        print(f"{mode:6}: first {statistics.fmean(run['first_ms'] for run in runs):7.3f}ms, "
+              f"p50 {statistics.fmean(run['construction_p50_ms'] for run in runs):7.3f}ms per engine, "
+              f"rss {statistics.fmean(a['rss_kib'] for a in after):8.0f} KiB per worker "
+              f"(+{statistics.fmean(growth):6.0f} KiB for the engines)", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+# import standard modules
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+
+# import project related modules
+from generators.lite import ENGINES
+from benchmarks.query_table import summarize
+
+
+# json encoding of a format, records keep NaN like the former tojson embedding, columns have to be strict json
+SERIALIZERS = {
+    "records": lambda table: json.dumps(table, default=str),
+    "columns": lambda table: json.dumps(table, default=str, allow_nan=False)
+}
+
+
+def measure(engine, q_type: int, tasks: int) -> dict:
+    """
+    converts the same seeded tables into every wire format and serializes them
+    :param engine: QueryTable instance
+    :param q_type: query type (0 - 11)
+    :param tasks: amount of seeded tasks
+    :return: dict per format with the payload size in bytes and the conversion and serialization latency
+    """
+
+    tables = list()
+    for seed in range(tasks):
+        try:
+            tables.extend(engine.tables(q_type, seed=seed))
+        except Exception:
+            continue
+
+    result = dict()
+    for fmt, serialize in SERIALIZERS.items():
+        encode = engine.formats[fmt]
+        encoding, serialization, sizes = list(), list(), list()
+
+        for table in tables:
+            start = time.perf_counter()
+            payload = encode(table)
+            encoded = time.perf_counter()
+            text = serialize(payload)
+            done = time.perf_counter()
+
+            encoding.append(encoded - start)
+            serialization.append(done - encoded)
+            sizes.append(len(text.encode("utf-8")))
+
+        result[fmt] = {
+            "tables": len(tables),
+            "mean_bytes": statistics.fmean(sizes) if sizes else 0.0,
+            "encode": summarize(encoding) if encoding else None,
+            "serialize": summarize(serialization) if serialization else None
+        }
+
+    return result
+
+
+def main(argv=None) -> int:
+    """
+    command line entry point - python -m benchmarks.wire_format --tasks 200 --output wire.json
+    """
+
+    parser = argparse.ArgumentParser(description="compare size and serialization time of the task wire formats")
+    parser.add_argument("--engines", nargs="*", choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument("--types", type=int, nargs="*", default=list(range(12)), help="query types to benchmark")
+    parser.add_argument("--tasks", type=int, default=200, help="seeded tasks per query type")
+    parser.add_argument("--output", help="json file for the results, defaults to stdout")
+    args = parser.parse_args(argv)
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "tasks": args.tasks,
+        "results": dict()
+    }
+
+    for name in args.engines:
+        engine = ENGINES[name]()
+        results["results"][name] = dict()
+
+        for q_type in args.types:
+            result = results["results"][name][str(q_type)] = measure(engine, q_type, args.tasks)
+            records, columns = result["records"], result["columns"]
+            if not records["tables"]:
+                continue
+
+            total = {fmt: result[fmt]["encode"]["p50_ms"] + result[fmt]["serialize"]["p50_ms"] for fmt in result}
+            print(f"{name:6} query_type {q_type:2}: bytes {records['mean_bytes']:7.0f} -> {columns['mean_bytes']:7.0f} "
+                  f"p50 {total['records']:6.3f}ms -> {total['columns']:6.3f}ms", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,291 @@
+# import standard modules
+import random
+import threading
+import importlib
+from collections.abc import Mapping
+
+# import third party modules
+import numpy as np
+
+# import project related modules
+from generators.vocabulary import shared_generator
+
+
+class TaskEngine:
+    """
+    base of the task engines holding everything they share - the seeded random state, the random helpers the draws of
+    generators.draws build on and the task creation around the query type methods. It imports neither pandas nor
+    randomtables, the engines add the tables and the query type methods - see QueryTable and LiteQueryTable.
+
+    -- create a task with the engine of a name:
+        qt = ENGINES["lite"]()
+        qt.query_task(1, seed=42)
+
+    """
+
+    # random and np.random are process wide and the generator of randomtables draws from them, so every draw from them
+    # takes this lock and a seeded task is never interleaved with another draw. Other random users of the process draw
+    # from a random.Random of their own.
+    seed_lock = threading.RLock()
+
+    # smaller tables leave no room for the duplicated and missing values the generators enter
+    min_rows = 5
+
+    numerical_dtypes = ("float64", "int32", "int64", "float32")
+
+    def __init__(self):
+        # all engines of a process share one generator built from the memory mapped vocabulary
+        self.data_generator = shared_generator()
+        self.query_type = {
+            0: self.row_filter,
+            1: self.select_columns,
+            2: self.rename_column,
+            3: self.row_count,
+            4: self.split_column,
+            5: self.group_data,
+            6: self.sort_data,
+            7: self.drop_columns,
+            8: self.fill_missing_values,
+            9: self.drop_duplicates,
+            10: self.drop_na,
+            11: self.calculate_column
+        }
+        self.formats = {
+            "records": self.to_records,
+            "columns": self.to_columns
+        }
+
+    @classmethod
+    def new_seed(cls) -> int:
+        """
+        draws a fresh seed independent of the seeded random state
+        :return: int seed between 0 and 2**32 - 1
+        """
+        return random.SystemRandom().randrange(2 ** 32)
+
+    @classmethod
+    def rand_bool(cls) -> bool:
+        """
+        select randomly between True and False
+        :return: bool True or False
+        """
+        return random.choice([False, True])
+    
+    @classmethod
+    def rand_num(cls):
+        """
+        selects randomly between float and int type
+        :return: type float or int
+        """
+        return random.choice([float, int])
+
+    @classmethod
+    def missing_indexes(cls, size: int) -> list:
+        """
+        draws the positions of missing values, 1 - 3 positions for five rows and up to 60 % of the rows for larger
+        tables. Positions may repeat.
+        :param size: amount of rows
+        :return: list of row positions
+        """
+        return random.choices(range(size), k=random.choice(range(1, max(4, 3 * size // 5 + 1))))
+
+    @classmethod
+    def duplicate_order(cls, size: int) -> list:
+        """
+        draws the rows to duplicate, 1 - 2 rows for five rows and up to 40 % of the rows for larger tables
+        :param size: amount of rows
+        :return: list of row positions - all rows which are not duplicated followed twice by the duplicated rows
+        """
+        indexes = random.choices(range(size), k=random.choice(range(1, max(3, 2 * size // 5 + 1))))
+
+        keep = np.ones(size, dtype=bool)
+        keep[indexes] = False
+        return np.flatnonzero(keep).tolist() + indexes + indexes
+
+    @classmethod
+    def extend_schema(cls, schema: list, columns: int = 0) -> list:
+        """
+        adds columns to a schema by repeating its column definitions, so additional columns have the same types and
+        the task stays valid
+        :param schema: list of dicts e.g [{"type": float}] - see DataSetGenerator.generate
+        :param columns: amount of additional columns
+        :return: extended schema
+        """
+        return schema + [dict(schema[ix % len(schema)]) for ix in range(columns)]
+
+    @classmethod
+    def create_missing(cls, values: list) -> list:
+        """
+        function to create missing values in a given list
+
+        :param values: list of values
+        :return: input list with NaN at random locations
+        """
+
+        # replace values at selected indexes
+        for ix in cls.missing_indexes(len(values)):
+            values[ix] = np.nan
+
+        return values
+
+    @classmethod
+    def marker(cls, value) -> str:
+        """
+        :param value: missing or non finite value
+        :return: javascript name of the value - NaN, Infinity or -Infinity
+        """
+        if value != value:
+            return "NaN"
+        return "Infinity" if value > 0 else "-Infinity"
+
+    @classmethod
+    def options(cls) -> None:
+        """function prints all available q_types and their filter names"""
+
+        options = {
+            "row_filter": 0,
+            "select_columns": 1,
+            "rename_column": 2,
+            "row_count": 3,
+            "split_column": 4,
+            "group_data": 5,
+            "sort_data": 6,
+            "drop_columns": 7,
+            "fill_missing_values": 8,
+            "drop_duplicates": 9,
+            "drop_na": 10,
+            "calculate_column": 11
+        }
+
+        for k, v in options.items():
+            print(f"filter type '{k}' is query_type argument {v}")
+
+    def tables(self, q_type: int, seed: int = None, rows: int = 5, columns: int = 0, steps: int = 1,
+               mix=None) -> tuple:
+        """
+        creates the input and output table of a task without converting them
+        :param q_type: int defining which pre defined filter type will be created (0 - 11) for more information call options
+        :param seed: int between 0 and 2**32 - 1 seeding python random and numpy, the same seed and q_type always create
+        the same task. Without a seed a new seed is drawn.
+        :param rows: amount of rows of the input table, at least 5
+        :param columns: amount of additional input columns, repeating the column types of the query type
+        :param steps: maximum amount of chained operations, 1 creates the task of the query type only - see chained
+        :param mix: query types the further steps are drawn from - see chained
+        :return: tuple with the input and output table in the tables of the engine
+        """
+
+        if rows < self.min_rows or columns < 0:
+            raise ValueError(f"a task needs at least {self.min_rows} rows and a positive amount of additional columns")
+
+        if steps > 1:
+            input_table, output_table, _ = self.chained(q_type, seed=seed, rows=rows, columns=columns, steps=steps,
+                                                        mix=mix)
+            return input_table, output_table
+
+        # a task without a seed is seeded as well, drawing from the unseeded state would move the state of a seeded
+        # task generated by another thread
+        if seed is None:
+            seed = self.new_seed()
+
+        with self.seed_lock:
+            random.seed(seed)
+            np.random.seed(seed)
+            return self.query_type[q_type](rows=rows, columns=columns)
+
+    # only the pandas engine creates chained tasks - see QueryTable.chain
+    def chain(self, q_types: list, seed: int, rows: int = 5, columns: int = 0) -> tuple:
+        raise ValueError("chained tasks need the pandas engine, the lite engine creates single step tasks only")
+
+    def chained(self, q_type: int, seed: int = None, rows: int = 5, columns: int = 0, steps: int = 2,
+                mix=None) -> tuple:
+        raise ValueError("chained tasks need the pandas engine, the lite engine creates single step tasks only")
+
+    def query_task(self, q_type: int, seed: int = None, fmt: str = "records", rows: int = 5, columns: int = 0,
+                   steps: int = 1, mix=None) -> tuple:
+        """
+        main function to create random input and output tables
+        :param q_type: int defining which pre defined filter type will be created (0 - 11) for more information call options
+        :param seed: int between 0 and 2**32 - 1 seeding python random and numpy, the same seed, q_type, rows and columns
+        always create the same task. Without a seed a new seed is drawn.
+        :param fmt: records for a list of records per table or columns for the columnar format - see to_columns
+        :param rows: amount of rows of the input table, at least 5
+        :param columns: amount of additional input columns, repeating the column types of the query type
+        :param steps: maximum amount of chained operations, the query type is the first one - see chained
+        :param mix: query types the further steps are drawn from - see chained
+        :return: tuple with the input and output table in the requested format
+        """
+
+        encode = self.formats[fmt]
+        input_table, output_table = self.tables(q_type, seed=seed, rows=rows, columns=columns, steps=steps, mix=mix)
+        return encode(input_table), encode(output_table)
+
+    def query_tasks(self, q_type: int, n: int = 1, seed: int = None, fmt: str = "records", rows: int = 5,
+                    columns: int = 0, seeds: list = None) -> list:
+        """
+        creates many tasks of one query type at once. The tasks are stacked into one table per column layout with the
+        task as key, so every transformation runs once per batch instead of once per task - see generators.batch
+        :param q_type: int defining which pre defined filter type will be created (0 - 11)
+        :param n: amount of tasks
+        :param seed: int the seeds of the tasks are derived from, the same seed and n always create the same tasks.
+        Without a seed new seeds are drawn.
+        :param fmt: records for a list of records per table or columns for the columnar format - see to_columns
+        :param rows: amount of rows of the input tables, at least 5
+        :param columns: amount of additional input columns, repeating the column types of the query type
+        :param seeds: list of task seeds used instead of n and seed
+        :return: list of (seed, input, output) tuples, every task equals query_task with its seed. Seeds whose task can
+        not be created are left out.
+        """
+
+        # the batch module builds on the engines, which import this module
+        from generators.batch import generate_batch
+
+        if rows < self.min_rows or columns < 0:
+            raise ValueError(f"a task needs at least {self.min_rows} rows and a positive amount of additional columns")
+        if fmt not in self.formats:
+            raise KeyError(fmt)
+
+        if seeds is None:
+            rng = random.Random(seed) if seed is not None else random.SystemRandom()
+            seeds = [rng.randrange(2 ** 32) for _ in range(n)]
+        return generate_batch(self, q_type, seeds, fmt=fmt, rows=rows, columns=columns)
+
+    def fingerprint(self, q_type: int, seed: int, rows: int = 5, columns: int = 0) -> str:
+        """
+        compact fingerprint of a task, tasks differing only in random values and column names share it - see
+        generators.fingerprint
+        :param q_type: int defining which pre defined filter type will be created (0 - 11)
+        :param seed: seed of the task
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns
+        :return: 16 hex characters
+        """
+
+        # the fingerprint module builds on the lite engine, which imports this module
+        from generators.fingerprint import task_fingerprint
+
+        return task_fingerprint(self, q_type, seed, rows=rows, columns=columns)
+
+
+class Engines(Mapping):
+    """
+    engines by name, an engine module is imported on first access only, so the lite engine runs without pandas
+
+    -- create the task of an engine picked by a setting:
+        ENGINES["lite"]().query_task(1, seed=42)
+    """
+
+    def __init__(self, paths: dict):
+        self.paths = paths
+
+    def __getitem__(self, name: str):
+        module, cls = self.paths[name].split(":")
+        return getattr(importlib.import_module(module), cls)
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def __len__(self):
+        return len(self.paths)
+
+
+ENGINES = Engines({"pandas": "generators.tables:QueryTable", "lite": "generators.lite:LiteQueryTable"})
@@ -0,0 +1,410 @@
+# import standard modules
+import random
+
+# import third party modules
+import numpy as np
+import pandas as pd
+
+# import project related modules
+from generators.base import TaskEngine
+from generators.lite import lite_engine
+from generators.draws import DRAWS
+
+
+CALCULATIONS = {"add": np.add, "subtract": np.subtract, "multiply": np.multiply, "divide": np.true_divide}
+
+
+class Block:
+    """
+    input tables of tasks with the same column dtypes stacked into one array per column position. The rows of a task
+    are contiguous, task holds the number of the task of every row within the block.
+    """
+
+    def __init__(self, tables: list):
+        self.dtypes = [column.dtype for column in tables[0].columns]
+        self.names = [table.names for table in tables]
+        self.size = len(tables)
+
+        lengths = [len(table) for table in tables]
+        self.task = np.repeat(np.arange(self.size), lengths)
+        self.columns = [
+            to_array([value for table in tables for value in table.columns[ix].values], dtype)
+            for ix, dtype in enumerate(self.dtypes)
+        ]
+
+    def bounds(self, task: np.ndarray) -> np.ndarray:
+        """
+        :param task: sorted task numbers of the rows of an array
+        :return: list with the start of the rows of every task and the end of the last task
+        """
+        return np.searchsorted(task, np.arange(self.size + 1)).tolist()
+
+    def rows_of(self, tasks: list) -> np.ndarray:
+        """
+        :return: positions of the rows of the given task numbers
+        """
+        return np.flatnonzero(np.isin(self.task, tasks))
+
+
+def to_array(values: list, dtype: str) -> np.ndarray:
+    """
+    :return: numpy array like the column pandas creates from the values, strings are kept as python objects
+    """
+    if dtype == "object":
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        return array
+    return np.array(values, dtype=dtype)
+
+
+def group_tasks(keys: list) -> dict:
+    """
+    :param keys: hashable key of every task
+    :return: dict with every key and the list of task numbers with this key
+    """
+    groups = dict()
+    for task, key in enumerate(keys):
+        groups.setdefault(key, list()).append(task)
+    return groups
+
+
+def assign(columns: list, column: tuple) -> None:
+    """
+    replaces the column with the same label or appends it like df[label] = values
+    :param columns: list of (label, array, start, end) column slices
+    :param column: new column slice
+    """
+    for ix, existing in enumerate(columns):
+        if existing[0] == column[0]:
+            columns[ix] = column
+            return
+    columns.append(column)
+
+
+class Tables:
+    """
+    class holds the tables of a batch as slices of shared arrays. Every array is converted to python values once,
+    the payload of a table only slices the converted lists.
+    """
+
+    def __init__(self, size: int):
+        self.arrays = list()
+        self.columns = [list() for _ in range(size)]
+        self.rows = [0] * size
+        self._values = dict()
+
+    def add(self, array: np.ndarray) -> int:
+        self.arrays.append(array)
+        return len(self.arrays) - 1
+
+    def take(self, block: Block, tasks: list, rows, selections: list, arrays: list = None) -> None:
+        """
+        adds the tables consisting of rows of the block
+        :param block: Block of the tasks
+        :param tasks: batch number of every task of the block
+        :param rows: row positions of the tables grouped by task, None for all rows
+        :param selections: list with the (label, column position) pairs of every task of the block
+        :param arrays: arrays replacing the columns of the block
+        """
+        arrays = arrays if arrays is not None else block.columns
+        if rows is not None:
+            arrays = [array[rows] for array in arrays]
+        ids = [self.add(array) for array in arrays]
+        bounds = block.bounds(block.task if rows is None else block.task[rows])
+
+        for ix, selection in enumerate(selections):
+            start, end = bounds[ix], bounds[ix + 1]
+            self.columns[tasks[ix]] = [(label, ids[column], start, end) for label, column in selection]
+            self.rows[tasks[ix]] = end - start
+
+    def values(self, array: int) -> tuple:
+        """
+        :return: tuple with the python values of an array, its dtype and the sorted positions of NaN, infinite and
+        missing values
+        """
+        if array not in self._values:
+            data = self.arrays[array]
+            # like to_columns only float and object columns can hold NaN, infinite or missing values
+            if data.dtype.kind in "fO":
+                positions = np.flatnonzero(~np.isfinite(data) if data.dtype.kind == "f" else pd.isna(data))
+            else:
+                positions = np.empty(0, dtype=np.int64)
+            self._values[array] = (data.tolist(), str(data.dtype), positions)
+        return self._values[array]
+
+    def payload(self, task: int, fmt: str):
+        """
+        :param task: batch number of the task
+        :param fmt: records or columns - see QueryTable.to_records and QueryTable.to_columns
+        :return: the table of the task in the requested format
+        """
+        labels, dtypes, values, markers = list(), list(), list(), list()
+        for label, array, start, end in self.columns[task]:
+            data, dtype, positions = self.values(array)
+            column_values = data[start:end]
+            column_markers = dict()
+            if fmt == "columns":
+                for ix in positions[np.searchsorted(positions, start):np.searchsorted(positions, end)].tolist():
+                    value = column_values[ix - start]
+                    column_values[ix - start] = None
+                    if value is not None:
+                        column_markers[ix - start] = TaskEngine.marker(value)
+
+            labels.append(label)
+            dtypes.append(dtype)
+            values.append(column_values)
+            markers.append(column_markers)
+
+        if fmt == "records":
+            return [dict(zip(labels, row)) for row in zip(*values)]
+
+        rows = self.rows[task] if labels else 0
+        return {"columns": labels, "dtypes": dtypes, "values": values, "markers": markers, "rows": rows}
+
+
+# the transformations apply the query type to all tasks of a block at once and add the output tables
+
+
+def all_columns(block: Block) -> list:
+    return [list(zip(names, range(len(names)))) for names in block.names]
+
+
+def comparison_values(block: Block, params: list, key: str, tasks: list, dtype: str) -> np.ndarray:
+    """
+    :return: array with the parameter of the task of every row of the given tasks
+    """
+    lookup = np.zeros(block.size, dtype=np.int64)
+    lookup[tasks] = np.arange(len(tasks))
+    values = to_array([params[task][key] for task in tasks], dtype)
+    return values[lookup[block.task[block.rows_of(tasks)]]]
+
+
+def apply_row_filter(block: Block, params: list, tasks: list, outputs: Tables) -> None:
+    # one mask over all rows, computed per filtered column and operation
+    mask = np.zeros(len(block.task), dtype=bool)
+    for (column, operation), group in group_tasks([(p["column"], p["operation"]) for p in params]).items():
+        rows = block.rows_of(group)
+        values = comparison_values(block, params, "value", group, block.dtypes[column])
+        mask[rows] = np.asarray(operation(block.columns[column][rows], values), dtype=bool)
+
+    outputs.take(block, tasks, np.flatnonzero(mask), all_columns(block))
+
+
+def apply_select_columns(block: Block, params: list, tasks: list, outputs: Tables) -> None:
+    selections = [[(names[column], column) for column in p["columns"]] for names, p in zip(block.names, params)]
+    outputs.take(block, tasks, None, selections)
+
+
+def apply_rename_column(block: Block, params: list, tasks: list, outputs: Tables) -> None:
+    selections = list()
+    for names, p in zip(block.names, params):
+        labels = list(names)
+        labels[p["column"]] = p["name"]
+        # selecting a repeated label returns every column carrying it, like df.loc[:, labels]
+        selections.append([(name, ix) for name in labels for ix, label in enumerate(labels) if label == name])
+    outputs.take(block, tasks, None, selections)
+
+
+def apply_row_count(block: Block, params: list, tasks: list, outputs: Tables) -> None:
+    values = np.empty(len(block.task), dtype=object)
+    for column, group in group_tasks([p["column"] for p in params]).items():
+        rows = block.rows_of(group)
+        values[rows] = block.columns[column][rows]
+
+    # one count over all tasks in order of appearance, sorted stable by count within every task
+    counts = pd.DataFrame({"task": block.task, "value": values}).groupby(["task", "value"], sort=False).size()
+    task = counts.index.get_level_values(0).to_numpy()
+    sizes = counts.to_numpy().astype(np.int64)
+    order = np.lexsort((-sizes, task))
+
+    value_id = outputs.add(to_array(counts.index.get_level_values(1).to_numpy()[order].tolist(), "object"))
+    count_id = outputs.add(sizes[order])
+    bounds = block.bounds(task[order])
+    for ix, (names, p) in enumerate(zip(block.names, params)):
+        start, end = bounds[ix], bounds[ix + 1]
+        outputs.columns[tasks[ix]] = [(names[p["column"]], value_id, start, end), ("count", count_id, start, end)]
+        outputs.rows[tasks[ix]] = end - start
+
+
+def apply_split_column(block: Block, params: list, tasks: list, outputs: Tables) -> None:
+    outputs.take(block, tasks, None, all_columns(block))
+
+    # one split per split value, a task keeps the parts up to the most parts of its own values
+    for split_value, group in group_tasks([p["split_value"] for p in params]).items():
+        rows = block.rows_of(group)
+        parts = pd.Series(block.columns[0][rows]).str.split(split_value, n=-1, expand=True)
+        widths = pd.Series(parts.notna().sum(axis=1).to_numpy()).groupby(block.task[rows]).max()
+        ids = [outputs.add(parts[ix].to_numpy(dtype=object)) for ix in range(parts.shape[1])]
+        bounds = np.searchsorted(block.task[rows], group + [block.size]).tolist()
+
+        for number, task in enumerate(group):
+            start, end = bounds[number], bounds[number + 1]
+            columns = list(outputs.columns[tasks[task]])
+            for ix in range(int(widths[task])):
+                assign(columns, (f"{block.names[task][0]}_{ix}", ids[ix], start, end))
+            outputs.columns[tasks[task]] = columns
+
+
+def apply_group_data(block: Block, params: list, tasks: list, outputs: Tables) -> None:
+    keys = [ix for ix, dtype in enumerate(block.dtypes) if dtype == "object"]
+    numbers = [ix for ix, dtype in enumerate(block.dtypes) if dtype != "object"]
+
+    # one grouped aggregation of all tasks, the task is the first group key
+    frame = pd.DataFrame({f"c{ix}": column for ix, column in enumerate(block.columns)})
+    frame.insert(0, "task", block.task)
+    grouped = frame.groupby(["task"] + [f"c{ix}" for ix in keys], sort=True)[[f"c{ix}" for ix in numbers]]
+    aggregated = grouped.agg(["max", "min", "sum"])
+
+    index = aggregated.index
+    task = index.get_level_values(0).to_numpy()
+    key_ids = {ix: outputs.add(to_array(index.get_level_values(level + 1).tolist(), "object"))
+               for level, ix in enumerate(keys)}
+    aggregate_ids = {(ix, action): outputs.add(aggregated[(f"c{ix}", action)].to_numpy())
+                     for ix in numbers for action in ("max", "min", "sum")}
+
+    bounds = block.bounds(task)
+    for number, (names, p) in enumerate(zip(block.names, params)):
+        start, end = bounds[number], bounds[number + 1]
+        columns = [(names[ix], key_ids[ix], start, end) for ix in keys]
+        columns += [
+            (f"{names[ix]}_{action}", aggregate_ids[(ix, action)], start, end) for ix, action in p["aggregates"]
+        ]
+        outputs.columns[tasks[number]] = columns
+        outputs.rows[tasks[number]] = end - start
+
+
+def apply_sort_data(block: Block, params: list, tasks: list, outputs: Tables) -> None:
+    # one stable sort by task and the signed sort column, equal values keep their order in both directions
+    column = block.columns[params[0]["column"]]
+    ascending = np.array([p["ascending"] for p in params], dtype=bool)[block.task]
+    order = np.lexsort((np.where(ascending, column, -column), block.task))
+    outputs.take(block, tasks, order, all_columns(block))
+
+
+def apply_drop_columns(block: Block, params: list, tasks: list, outputs: Tables) -> None:
+    selections = [[(name, ix) for ix, name in enumerate(names) if name != names[p["column"]]]
+                  for names, p in zip(block.names, params)]
+    outputs.take(block, tasks, None, selections)
+
+
+def apply_fill_missing_values(block: Block, params: list, tasks: list, outputs: Tables) -> None:
+    values = to_array([p["value"] for p in params], "object")
+    arrays = list()
+    for column in block.columns:
+        missing = pd.isna(column)
+        if missing.any():
+            column = column.copy()
+            column[missing] = values[block.task[missing]]
+        arrays.append(column)
+    outputs.take(block, tasks, None, all_columns(block), arrays=arrays)
+
+
+def apply_drop_duplicates(block: Block, params: list, tasks: list, outputs: Tables) -> None:
+    frame = pd.DataFrame({f"c{ix}": column for ix, column in enumerate(block.columns)})
+    frame.insert(0, "task", block.task)
+    outputs.take(block, tasks, np.flatnonzero(~frame.duplicated(keep="first").to_numpy()), all_columns(block))
+
+
+def apply_drop_na(block: Block, params: list, tasks: list, outputs: Tables) -> None:
+    missing = np.zeros(len(block.task), dtype=bool)
+    for column in block.columns:
+        missing |= pd.isna(column)
+    outputs.take(block, tasks, np.flatnonzero(~missing), all_columns(block))
+
+
+def apply_calculate_column(block: Block, params: list, tasks: list, outputs: Tables) -> None:
+    outputs.take(block, tasks, None, [
+        [(names[column], column) for column in p["columns"]] for names, p in zip(block.names, params)
+    ])
+
+    if all(dtype == "object" for dtype in block.dtypes):
+        # one concatenation over all rows, the columns of every row are gathered by their position
+        matrix = np.column_stack(block.columns)
+        left = np.array([p["columns"][0] for p in params])[block.task]
+        right = np.array([p["columns"][1] for p in params])[block.task]
+        separators = to_array([p["separator"] for p in params], "object")[block.task]
+        rows = np.arange(len(block.task))
+        combination = outputs.add(matrix[rows, left] + separators + matrix[rows, right])
+        bounds = block.bounds(block.task)
+        for ix in range(block.size):
+            assign(outputs.columns[tasks[ix]], ("combination", combination, bounds[ix], bounds[ix + 1]))
+        return
+
+    # one calculation per column pair and operation, so every result keeps the dtype pandas gives it
+    keys = [(p["columns"][0], p["columns"][1], p["func"]) for p in params]
+    for (left, right, func), group in group_tasks(keys).items():
+        rows = block.rows_of(group)
+        with np.errstate(all="ignore"):
+            result = outputs.add(CALCULATIONS[func](block.columns[left][rows], block.columns[right][rows]))
+        bounds = np.searchsorted(block.task[rows], group + [block.size]).tolist()
+        for number, task in enumerate(group):
+            assign(outputs.columns[tasks[task]], (params[task]["name"], result, bounds[number], bounds[number + 1]))
+
+
+# vectorized transformation of every query type, the tasks are drawn with the draws shared by all engines
+TRANSFORMS = {
+    0: apply_row_filter,
+    1: apply_select_columns,
+    2: apply_rename_column,
+    3: apply_row_count,
+    4: apply_split_column,
+    5: apply_group_data,
+    6: apply_sort_data,
+    7: apply_drop_columns,
+    8: apply_fill_missing_values,
+    9: apply_drop_duplicates,
+    10: apply_drop_na,
+    11: apply_calculate_column
+}
+
+
+def generate_batch(engine: TaskEngine, q_type: int, seeds: list, fmt: str = "records", rows: int = 5,
+                   columns: int = 0) -> list:
+    """
+    creates the tasks of many seeds of one query type. The input tables and parameters are drawn task by task, the
+    tasks with the same column dtypes are stacked into one block with the task as key, the transformation is applied
+    once per block and the block is split into the payloads of the tasks. The tasks of a block whose transformation
+    fails are created one by one with query_task.
+    :param engine: engine providing the seeded random state and the generator
+    :param q_type: query type (0 - 11)
+    :param seeds: list of task seeds
+    :param fmt: records or columns - see QueryTable.query_task
+    :param rows: amount of rows of the input tables
+    :param columns: amount of additional input columns
+    :return: list of (seed, input, output) tuples, equal to query_task with the same seed, seeds whose task can not be
+    created are left out
+    """
+
+    draw, transform = DRAWS[q_type], TRANSFORMS[q_type]
+    lite = lite_engine(engine)
+
+    tasks = list()
+    with engine.seed_lock:
+        for seed in seeds:
+            random.seed(seed)
+            np.random.seed(seed)
+            try:
+                tasks.append((seed, *draw(lite, rows, columns)))
+            except Exception:
+                continue
+
+    # a block whose transformation fails is created task by task, so only the seeds which fail on their own are dropped
+    inputs, outputs = Tables(len(tasks)), Tables(len(tasks))
+    single = dict()
+    layouts = group_tasks([tuple(column.dtype for column in table.columns) for _, table, _ in tasks])
+    for group in layouts.values():
+        try:
+            block = Block([tasks[task][1] for task in group])
+            inputs.take(block, group, None, all_columns(block))
+            transform(block, [tasks[task][2] for task in group], group, outputs)
+        except Exception:
+            for task in group:
+                try:
+                    single[task] = engine.query_task(q_type, seed=tasks[task][0], fmt=fmt, rows=rows, columns=columns)
+                except Exception:
+                    single[task] = None
+
+    return [
+        (seed, *single[ix]) if ix in single else (seed, inputs.payload(ix, fmt), outputs.payload(ix, fmt))
+        for ix, (seed, _, _) in enumerate(tasks) if single.get(ix, True) is not None
+    ]
@@ -0,0 +1,274 @@
+# import standard modules
+import random
+import string
+import operator
+import threading
+from collections import OrderedDict
+
+# import third party modules
+import pandas as pd
+
+
+def unique_name(table: pd.DataFrame, name: str) -> str:
+    """
+    :return: the name or the name with a number suffix, so a step never creates a repeated column label
+    """
+    names = set(table.columns.tolist())
+    candidate, number = name, 1
+    while candidate in names:
+        candidate, number = f"{name}_{number}", number + 1
+    return candidate
+
+
+def numerical_columns(table: pd.DataFrame) -> list:
+    return [name for name, dtype in table.dtypes.items() if dtype.kind in "iuf"]
+
+
+def string_columns(table: pd.DataFrame) -> list:
+    """
+    :return: list with the object columns holding strings only besides missing values
+    """
+    return [name for name, dtype in table.dtypes.items()
+            if dtype.kind == "O" and all(isinstance(value, str) for value in table[name].dropna().tolist())]
+
+
+def split_candidates(table: pd.DataFrame) -> dict:
+    """
+    :return: dict with the string columns as key and the punctuation contained in all their values as value
+    """
+    candidates = dict()
+    for name in string_columns(table):
+        values = table[name].dropna().tolist()
+        if not values:
+            continue
+        common = [x for x in dict.fromkeys(values[0]) if x in string.punctuation and all(x in v for v in values)]
+        if common:
+            candidates[name] = common
+    return candidates
+
+
+def row_filter(table: pd.DataFrame, generator) -> pd.DataFrame:
+    """
+    filters the rows on one value of a random column
+    """
+    column = random.choice(table.columns.tolist())
+    value = random.choice(table[column].tolist())
+    operations = [operator.eq, operator.ne]
+    if table[column].dtype.kind in "iuf":
+        operations = [operator.lt, operator.le, operator.ge, operator.gt] + operations
+    return table.loc[random.choice(operations)(table[column], value)]
+
+
+def select_columns(table: pd.DataFrame, generator) -> pd.DataFrame:
+    """
+    selects one or two random columns
+    """
+    columns = random.sample(table.columns.tolist(), k=random.choice([1, 2]))
+    return table.loc[:, columns]
+
+
+def rename_column(table: pd.DataFrame, generator) -> pd.DataFrame:
+    """
+    renames a random column
+    """
+    column = random.choice(table.columns.tolist())
+    new_name = unique_name(table, generator.column_name_generator(d_type="<class 'int'>"))
+    return table.rename(columns={column: new_name})
+
+
+def row_count(table: pd.DataFrame, generator) -> pd.DataFrame:
+    """
+    counts the values of a random column, equal counts keep the order of appearance
+    """
+    column = random.choice(table.columns.tolist())
+    counts = table[column].value_counts(sort=False).sort_values(ascending=False, kind="mergesort")
+    output_data = pd.DataFrame({column: counts.index.tolist()})
+    output_data[unique_name(output_data, "count")] = counts.to_numpy()
+    return output_data
+
+
+def split_column(table: pd.DataFrame, generator) -> pd.DataFrame:
+    """
+    splits a string column holding the same punctuation in every value and appends the parts as new columns
+    """
+    candidates = split_candidates(table)
+    column = random.choice(list(candidates))
+    splits = table[column].str.split(random.choice(candidates[column]), n=-1, expand=True)
+
+    output_data = table.copy()
+    for ix in range(splits.shape[1]):
+        output_data[unique_name(output_data, f"{column}_{ix}")] = splits[ix]
+    return output_data
+
+
+def group_data(table: pd.DataFrame, generator) -> pd.DataFrame:
+    """
+    groups by one or two string columns and aggregates every numerical column with max, min or sum
+    """
+    strings = string_columns(table)
+    keys = random.sample(strings, k=min(random.choice([1, 2]), len(strings)))
+    numbers = numerical_columns(table)
+    aggregates = dict(zip(numbers, random.choices(["max", "min", "sum"], k=len(numbers))))
+
+    output_data = table.groupby(keys).agg(aggregates).reset_index()
+    return output_data.rename(columns={name: f"{name}_{action}" for name, action in aggregates.items()})
+
+
+def sort_data(table: pd.DataFrame, generator) -> pd.DataFrame:
+    """
+    sorts stable by a random numerical column in ascending or descending order
+    """
+    column = random.choice(numerical_columns(table))
+    return table.sort_values(by=column, ascending=random.choice([False, True]), kind="mergesort")
+
+
+def drop_columns(table: pd.DataFrame, generator) -> pd.DataFrame:
+    """
+    drops a random column
+    """
+    return table.drop(random.choice(table.columns.tolist()), axis=1)
+
+
+def fill_missing_values(table: pd.DataFrame, generator) -> pd.DataFrame:
+    """
+    fills the missing values of a random column holding missing values with a value of the column type
+    """
+    column = random.choice([name for name in table.columns if table[name].isna().any()])
+    kind = table[column].dtype.kind
+    values = [.0] if kind == "f" else [0] if kind in "iu" else ["#", "no_value"]
+    return table.fillna({column: random.choice(values)})
+
+
+def drop_duplicates(table: pd.DataFrame, generator) -> pd.DataFrame:
+    return table.drop_duplicates()
+
+
+def drop_na(table: pd.DataFrame, generator) -> pd.DataFrame:
+    return table.dropna()
+
+
+def calculate_column(table: pd.DataFrame, generator) -> pd.DataFrame:
+    """
+    appends a column calculated from two numerical columns or the concatenation of two string columns
+    """
+    numbers, strings = numerical_columns(table), string_columns(table)
+    modes = [mode for mode, names in (("numbers", numbers), ("strings", strings)) if len(names) >= 2]
+
+    if random.choice(modes) == "strings":
+        columns = random.sample(strings, k=2)
+        output_data = table.loc[:, columns].copy()
+        name = unique_name(output_data, "combination")
+        output_data[name] = output_data[columns[0]] + random.choice(["_", "-", " "]) + output_data[columns[1]]
+        return output_data
+
+    columns = random.sample(numbers, k=2)
+    output_data = table.loc[:, columns].copy()
+    func = random.choice(["add", "subtract", "multiply", "divide"])
+    operations = {"add": operator.add, "subtract": operator.sub, "multiply": operator.mul, "divide": operator.truediv}
+    name = unique_name(output_data, f"{random.choice(columns)}_{func}")
+    output_data[name] = operations[func](output_data[columns[0]], output_data[columns[1]])
+    return output_data
+
+
+# operation of every query type applied to the output table of the previous step and the condition a table has to meet
+STEPS = {
+    0: (row_filter, lambda table: len(table) > 0 and len(table.columns) > 0),
+    1: (select_columns, lambda table: len(table.columns) > 1),
+    2: (rename_column, lambda table: len(table.columns) > 0),
+    3: (row_count, lambda table: len(table) > 0 and len(table.columns) > 0),
+    4: (split_column, lambda table: len(table) > 0 and bool(split_candidates(table))),
+    5: (group_data, lambda table: len(table) > 0 and bool(string_columns(table)) and bool(numerical_columns(table))),
+    6: (sort_data, lambda table: len(table) > 1 and bool(numerical_columns(table))),
+    7: (drop_columns, lambda table: len(table.columns) > 1),
+    8: (fill_missing_values, lambda table: bool(table.isna().to_numpy().any())),
+    9: (drop_duplicates, lambda table: bool(table.duplicated().any())),
+    10: (drop_na, lambda table: bool(table.isna().to_numpy().any())),
+    11: (calculate_column, lambda table: len(numerical_columns(table)) > 1 or len(string_columns(table)) > 1),
+}
+
+
+def applicable(q_type: int, table: pd.DataFrame) -> bool:
+    """
+    :return: True in case the operation of the query type can be applied to the table as a further step
+    """
+    # repeated labels select several columns at once, a chain only continues on tables with unique labels
+    return table.columns.is_unique and STEPS[q_type][1](table)
+
+
+class TaskGraph:
+    """
+    class memoizes the tables of chained tasks. A chain is a path through a graph of operations, starting with the
+    seeded task of its first query type. Every node holds the input table and the output table after its path of
+    query types, so chains sharing a prefix only compute the steps after the longest memoized prefix. The least
+    recently used nodes are dropped once max_nodes nodes are held. The tables of a node are shared and must not be
+    modified.
+
+    -- memoize the nodes of a chain:
+        graph = TaskGraph(max_nodes=256)
+        graph.put((42, 5, 0, (0, 5)), (input_table, output_table))
+        graph.get((42, 5, 0, (0, 5)))  -> (input_table, output_table)
+        graph.longest_prefix(42, 5, 0, [0, 5, 6])  -> (2, (input_table, output_table))
+    """
+
+    def __init__(self, max_nodes: int = 256):
+        """
+        :param max_nodes: maximum amount of memoized nodes, 0 disables the memo
+        """
+        self.max_nodes = max_nodes
+        self.nodes = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.computed = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> tuple:
+        """
+        :param key: tuple with seed, rows, columns and the tuple of query types of the path
+        :return: tuple with the input table and the output table of the path or None
+        """
+        with self._lock:
+            node = self.nodes.get(key)
+            if node is None:
+                self.misses += 1
+                return None
+            self.nodes.move_to_end(key)
+            self.hits += 1
+            return node
+
+    def longest_prefix(self, seed: int, rows: int, columns: int, q_types: list) -> tuple:
+        """
+        :return: tuple with the length of the longest memoized prefix of the chain and its tables, (0, None) if none
+        """
+        with self._lock:
+            for length in range(len(q_types), 0, -1):
+                key = (seed, rows, columns, tuple(q_types[:length]))
+                node = self.nodes.get(key)
+                if node is not None:
+                    self.nodes.move_to_end(key)
+                    self.hits += 1
+                    return length, node
+            self.misses += 1
+        return 0, None
+
+    def put(self, key: tuple, tables: tuple) -> None:
+        """
+        :param key: tuple with seed, rows, columns and the tuple of query types of the path
+        :param tables: tuple with the input table and the output table of the path, counted as computed node
+        """
+        with self._lock:
+            self.computed += 1
+            if self.max_nodes <= 0:
+                return
+            self.nodes[key] = tables
+            self.nodes.move_to_end(key)
+            while len(self.nodes) > self.max_nodes:
+                self.nodes.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"nodes": len(self.nodes), "hits": self.hits, "misses": self.misses, "computed": self.computed}
+
+    def clear(self) -> None:
+        with self._lock:
+            self.nodes.clear()
+            self.hits = self.misses = self.computed = 0
@@ -0,0 +1,229 @@
+# import standard modules
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import multiprocessing
+
+# import project related modules
+from generators.lite import ENGINES
+
+
+# engine of a worker process, created once by the pool initializer
+_engine = None
+
+
+def parse_mix(mix: str) -> dict:
+    """
+    parses a query type mix like "0=2,5=1,11=0.5" into weights. Query types not listed are not generated.
+    :param mix: comma separated query_type=weight pairs, an empty string weights all 12 query types the same
+    :return: dict with query type as key and weight as value
+    """
+    if not mix:
+        return dict.fromkeys(range(12), 1.0)
+
+    weights = dict()
+    for pair in mix.split(","):
+        q_type, weight = pair.split("=")
+        q_type = int(q_type)
+        if q_type not in range(12):
+            raise ValueError(f"query_type {q_type} is not available (0 - 11)")
+        weights[q_type] = float(weight)
+
+    if not any(weights.values()):
+        raise ValueError("at least one query type needs a weight larger than 0")
+
+    return weights
+
+
+def shard_path(directory: str, shard: int) -> str:
+    return os.path.join(directory, f"corpus-{shard:05d}.jsonl")
+
+
+def shard_tasks(seed: int, shard: int, size: int, weights: dict) -> list:
+    """
+    derives the (query_type, seed) pairs of a shard. They only depend on the run seed and the shard number, so a shard
+    holds the same tasks independent of the worker creating it.
+    :return: list of (query_type, seed) tuples
+    """
+    rng = random.Random(f"{seed}:{shard}")
+    q_types = rng.choices(list(weights), weights=list(weights.values()), k=size)
+    return [(q_type, rng.randrange(2 ** 32)) for q_type in q_types]
+
+
+def _init_worker(engine: str) -> None:
+    global _engine
+    _engine = ENGINES[engine]()
+
+
+def _write_shard(job: tuple) -> tuple:
+    """
+    creates all tasks of a shard and writes them to a temporary file, which is renamed once the shard is complete
+    :param job: tuple with directory, shard number, the (query_type, seed) pairs of the shard, the table size as
+    (rows, columns), the maximum amount of chained steps and whether the tasks are created in batches
+    :return: tuple with the shard number, amount of written tasks, amount of failed tasks and whether the shard was
+    written. A shard whose batch fails is not written, so a resumed run creates it again.
+    """
+    directory, shard, tasks, (rows, columns), steps, batch = job
+    path = shard_path(directory, shard)
+    failed = 0
+
+    # the tasks of a query type are created at once and written in the order of the shard
+    batched = dict()
+    if batch:
+        try:
+            for q_type in sorted({q_type for q_type, _ in tasks}):
+                seeds = [seed for x, seed in tasks if x == q_type]
+                for seed, *task in _engine.query_tasks(q_type, seeds=seeds, rows=rows, columns=columns):
+                    batched[(q_type, seed)] = task
+        except Exception as exc:
+            print(f"shard {shard} failed - {type(exc).__name__}: {exc}")
+            return shard, 0, len(tasks), False
+
+    with open(path + ".part", "w", encoding="utf-8") as file:
+        for q_type, seed in tasks:
+            try:
+                record = {"query_type": q_type, "seed": seed}
+                if batch:
+                    input_table, output_table = batched[(q_type, seed)]
+                elif steps > 1:
+                    input_table, output_table, record["steps"] = _engine.chained(q_type, seed=seed, rows=rows,
+                                                                                 columns=columns, steps=steps)
+                    input_table, output_table = _engine.to_records(input_table), _engine.to_records(output_table)
+                else:
+                    input_table, output_table = _engine.query_task(q_type, seed=seed, rows=rows, columns=columns)
+            except Exception:
+                failed += 1
+                continue
+
+            file.write(json.dumps(dict(record, input=input_table, output=output_table), default=str) + "\n")
+
+    os.replace(path + ".part", path)
+    return shard, len(tasks) - failed, failed, True
+
+
+def generate_corpus(directory: str, tasks: int, shard_size: int = 10000, workers: int = None, seed: int = 0,
+                    mix: str = "", engine: str = "pandas", rows: int = 5, columns: int = 0, steps: int = 1,
+                    batch: bool = False) -> dict:
+    """
+    fans the task generation out over a process pool. Every shard is written by one worker as soon as it is complete,
+    shards already existing in the directory are skipped, so an interrupted run continues with the missing shards.
+    Task seeds only depend on the run seed and the shard, so the corpus does not depend on the amount of workers.
+    :param directory: folder the shard files are written to
+    :param tasks: total amount of tasks
+    :param shard_size: amount of tasks per shard
+    :param workers: amount of worker processes, defaults to the amount of cores
+    :param seed: run seed all task seeds are derived from
+    :param mix: query type weights - see parse_mix
+    :param engine: name of the task engine - pandas or lite
+    :param rows: amount of rows of the input tables
+    :param columns: amount of additional input columns
+    :param steps: maximum amount of chained steps per task, the query types of a chain are stored as steps
+    :param batch: create the tasks of a shard per query type with QueryTable.query_tasks, the tasks are the same
+    :return: dict with the amount of written, skipped and failed shards, tasks, failed tasks and tasks per second. Failed
+    shards are not written and created by the next run.
+    """
+
+    weights = parse_mix(mix)
+    if steps > 1 and engine != "pandas":
+        raise ValueError("chained tasks need the pandas engine")
+    if steps > 1 and batch:
+        raise ValueError("chained tasks can not be created in batches")
+    os.makedirs(directory, exist_ok=True)
+
+    # the settings of a run are stored once, a resumed run has to use the same ones to create matching shards
+    settings = {"tasks": tasks, "shard_size": shard_size, "seed": seed, "mix": mix, "engine": engine, "rows": rows,
+                "columns": columns, "steps": steps}
+    manifest = os.path.join(directory, "manifest.json")
+    if os.path.exists(manifest):
+        with open(manifest, encoding="utf-8") as file:
+            previous = json.load(file)
+        # corpora created before the table size was configurable hold the default size
+        previous.setdefault("rows", 5)
+        previous.setdefault("columns", 0)
+        previous.setdefault("steps", 1)
+        if previous != settings:
+            raise ValueError(f"{directory} holds a corpus created with different settings: {previous}")
+    else:
+        with open(manifest, "w", encoding="utf-8") as file:
+            json.dump(settings, file)
+
+    shards = range((tasks + shard_size - 1) // shard_size)
+    todo = [shard for shard in shards if not os.path.exists(shard_path(directory, shard))]
+    jobs = (
+        (directory, shard, shard_tasks(seed, shard, min(shard_size, tasks - shard * shard_size), weights),
+         (rows, columns), steps, batch)
+        for shard in todo
+    )
+
+    written = failed = failed_shards = 0
+    start = time.perf_counter()
+
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(engine,)) as pool:
+        for shard, count, errors, complete in pool.imap_unordered(_write_shard, jobs):
+            written += count
+            failed += errors
+            if not complete:
+                failed_shards += 1
+                continue
+            print(f"shard {shard} done - {count} tasks")
+
+    duration = time.perf_counter() - start
+
+    return {
+        "shards": len(todo) - failed_shards,
+        "skipped_shards": len(shards) - len(todo),
+        "failed_shards": failed_shards,
+        "tasks": written,
+        "failed": failed,
+        "seconds": duration,
+        "tasks_per_second": written / duration if duration else 0.0
+    }
+
+
+def main(argv=None) -> int:
+    """
+    command line entry point - python -m generators.corpus ./corpus --tasks 1000000 --workers 8
+    """
+
+    parser = argparse.ArgumentParser(description="generate a corpus of query tasks into sharded jsonl files")
+    parser.add_argument("directory", help="folder the shard files are written to")
+    parser.add_argument("--tasks", type=int, required=True, help="total amount of tasks")
+    parser.add_argument("--shard-size", type=int, default=10000, help="amount of tasks per shard")
+    parser.add_argument("--workers", type=int, default=None, help="amount of worker processes, defaults to all cores")
+    parser.add_argument("--seed", type=int, default=0, help="run seed all task seeds are derived from")
+    parser.add_argument("--mix", default="", help="query type weights e.g. '0=2,5=1', defaults to uniform")
+    parser.add_argument("--engine", choices=list(ENGINES), default="pandas", help="task engine")
+    parser.add_argument("--rows", type=int, default=5, help="amount of rows of the input tables")
+    parser.add_argument("--columns", type=int, default=0, help="amount of additional input columns")
+    parser.add_argument("--steps", type=int, default=1, help="maximum amount of chained steps per task")
+    parser.add_argument("--batch", action="store_true", help="create the tasks of a shard per query type at once")
+    args = parser.parse_args(argv)
+
+    stats = generate_corpus(
+        args.directory,
+        tasks=args.tasks,
+        shard_size=args.shard_size,
+        workers=args.workers,
+        seed=args.seed,
+        mix=args.mix,
+        engine=args.engine,
+        rows=args.rows,
+        columns=args.columns,
+        steps=args.steps,
+        batch=args.batch
+    )
+
+    print(
+        f"generated {stats['tasks']} tasks in {stats['shards']} shards ({stats['skipped_shards']} already existed), "
+        f"{stats['failed']} failed, {stats['tasks_per_second']:.0f} tasks/s"
+    )
+    if stats["failed_shards"]:
+        print(f"{stats['failed_shards']} shards failed and are created again by running the same command")
+    return 1 if stats["failed_shards"] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+# import standard modules
+import random
+import string
+import operator
+
+
+STRING_OPERATIONS = [operator.eq, operator.ne]
+NUMERICAL_OPERATIONS = [operator.lt, operator.le, operator.ge, operator.gt] + STRING_OPERATIONS
+
+
+# the draw functions create the input table of a task and draw its parameters. All engines create their tasks with
+# them and only apply the parameters their own way, so a seed creates the same task in every engine. The tables are
+# read through names_of, values_of and dtypes_of of the engine and columns are referenced by their position.
+
+
+def position(engine, table, name: str) -> int:
+    return engine.names_of(table).index(name)
+
+
+def string_schema(engine, duplicates: bool = False) -> dict:
+    return {"type": str, "split": False, "names": engine.rand_bool(), "duplicates": duplicates}
+
+
+def draw_row_filter(engine, rows: int, columns: int) -> tuple:
+    schema = random.choice([
+        {"type": str, "split": engine.rand_bool(), "names": engine.rand_bool()},
+        {"type": engine.rand_num()},
+        {"type": engine.rand_num()}
+    ])
+    table = engine.generate(schema=[schema], rows=rows, columns=columns)
+
+    column = position(engine, table, random.choice(engine.names_of(table)))
+    value = random.choice(engine.values_of(table, column))
+    numerical = engine.dtypes_of(table)[column] in engine.numerical_dtypes
+    operation = random.choice(NUMERICAL_OPERATIONS if numerical else STRING_OPERATIONS)
+    return table, {"column": column, "value": value, "operation": operation}
+
+
+def draw_select_columns(engine, rows: int, columns: int) -> tuple:
+    table = engine.generate(
+        schema=[
+            {"type": random.choice([float, int])},
+            {"type": str, "split": engine.rand_bool(), "names": engine.rand_bool()},
+            {"type": random.choice([float, int])}
+        ],
+        rows=rows,
+        columns=columns
+    )
+    k = random.choice([1, 2])
+    names = random.choices(engine.names_of(table), k=k)
+    return table, {"columns": [position(engine, table, name) for name in names]}
+
+
+def draw_rename_column(engine, rows: int, columns: int) -> tuple:
+    table = engine.generate(schema=[{"type": engine.rand_num()}, {"type": engine.rand_num()}], rows=rows,
+                            columns=columns)
+    column = position(engine, table, random.choice(engine.names_of(table)))
+    return table, {"column": column, "name": engine.data_generator.column_name_generator(d_type="<class 'int'>")}
+
+
+def draw_row_count(engine, rows: int, columns: int) -> tuple:
+    table = engine.generate(
+        schema=[{"type": str, "split": engine.rand_bool(), "names": engine.rand_bool()} for _ in range(3)],
+        rows=rows,
+        columns=columns
+    )
+    table = engine.duplicate_rows(table)
+    return table, {"column": position(engine, table, random.choice(engine.names_of(table)))}
+
+
+def draw_split_column(engine, rows: int, columns: int) -> tuple:
+    table = engine.generate(schema=[{"type": str, "split": True, "names": engine.rand_bool()}], rows=rows,
+                            columns=columns)
+
+    # the punctuation symbol of the first value contained in every value, raises without a punctuation symbol
+    values = engine.values_of(table, 0)
+    candidates = [x for x in values[0] if x in string.punctuation]
+    split_value = next((x for x in candidates if all(x in value for value in values)), candidates[0])
+    return table, {"split_value": split_value}
+
+
+def draw_group_data(engine, rows: int, columns: int) -> tuple:
+    schema = [string_schema(engine, duplicates=True) for _ in range(random.choice([1, 2]))]
+    schema += [{"type": int} for _ in range(random.choice([1, 2]))]
+    table = engine.generate(schema=schema, rows=rows, columns=columns)
+
+    # the set decides the order of the aggregated columns
+    names = engine.names_of(table)
+    string_columns = [name for name, dtype in zip(names, engine.dtypes_of(table)) if dtype == "object"]
+    int_columns = list(set(names) - set(string_columns))
+    if not string_columns:
+        raise ValueError("No group keys passed!")
+
+    actions = random.choices(["max", "min", "sum"], k=len(int_columns))
+    return table, {"aggregates": [(names.index(name), action) for name, action in zip(int_columns, actions)]}
+
+
+def draw_sort_data(engine, rows: int, columns: int) -> tuple:
+    schema = [string_schema(engine) for _ in range(random.choice([1, 2]))] + [{"type": engine.rand_num()}]
+    table = engine.generate(schema=schema, rows=rows, columns=columns)
+    column = next(ix for ix, dtype in enumerate(engine.dtypes_of(table)) if dtype in ("float64", "int32", "int64"))
+    return table, {"column": column, "ascending": engine.rand_bool()}
+
+
+def draw_drop_columns(engine, rows: int, columns: int) -> tuple:
+    schema = [string_schema(engine)] + [{"type": engine.rand_num()} for _ in range(random.choice([1, 2]))]
+    table = engine.generate(schema=schema, rows=rows, columns=columns)
+    return table, {"column": position(engine, table, random.choice(engine.names_of(table)))}
+
+
+def draw_fill_missing_values(engine, rows: int, columns: int) -> tuple:
+    schema = [string_schema(engine)] + [{"type": engine.rand_num()} for _ in range(random.choice([1, 2]))]
+    table = engine.generate(schema=schema, rows=rows, columns=columns)
+    na_column = random.choice(engine.names_of(table))
+    table = engine.with_missing(table, na_column)
+
+    # an integer column turned into a float column by the missing values
+    column = position(engine, table, na_column)
+    fill_values = {"float64": [.0], "int32": [0], "object": ["#", "no_value"]}
+    return table, {"column": column, "value": random.choice(fill_values[engine.dtypes_of(table)[column]])}
+
+
+def draw_drop_duplicates(engine, rows: int, columns: int) -> tuple:
+    schema = [string_schema(engine)] + [{"type": engine.rand_num()} for _ in range(random.choice([1, 2]))]
+    table = engine.generate(schema=schema, rows=rows, columns=columns)
+    return engine.duplicate_rows(table), dict()
+
+
+def draw_drop_na(engine, rows: int, columns: int) -> tuple:
+    schema = [string_schema(engine)] + [{"type": engine.rand_num()} for _ in range(random.choice([1, 2]))]
+    table = engine.generate(schema=schema, rows=rows, columns=columns)
+    na_column = random.choice(engine.names_of(table))
+    return engine.with_missing(table, na_column), {"column": position(engine, table, na_column)}
+
+
+def draw_calculate_column(engine, rows: int, columns: int) -> tuple:
+    string_columns = [string_schema(engine) for _ in range(random.choice([2, 3]))]
+    numerical_columns = [{"type": engine.rand_num()} for _ in range(random.choice([2, 3]))]
+    table = engine.generate(schema=random.choice([string_columns, numerical_columns]), rows=rows, columns=columns)
+
+    # string columns are concatenated with a separator, numerical columns are calculated into a new column
+    if all(dtype == "object" for dtype in engine.dtypes_of(table)):
+        separator = random.choice(["_", "-", " "])
+        names = random.sample(engine.names_of(table), k=2)
+        return table, {"columns": [position(engine, table, name) for name in names], "separator": separator}
+
+    names = random.sample(engine.names_of(table), k=2)
+    func = random.choice(["add", "subtract", "multiply", "divide"])
+    new_name = f"{random.choice(names)}_{func}"
+    return table, {"columns": [position(engine, table, name) for name in names], "func": func, "name": new_name}
+
+
+# draw of every query type
+DRAWS = {
+    0: draw_row_filter,
+    1: draw_select_columns,
+    2: draw_rename_column,
+    3: draw_row_count,
+    4: draw_split_column,
+    5: draw_group_data,
+    6: draw_sort_data,
+    7: draw_drop_columns,
+    8: draw_fill_missing_values,
+    9: draw_drop_duplicates,
+    10: draw_drop_na,
+    11: draw_calculate_column
+}
@@ -0,0 +1,177 @@
+# import standard modules
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+# import project related modules
+from generators.lite import is_missing, draw_task
+
+
+# parameters drawn from the values or the vocabulary of a table, they tell nothing about the shape of a task
+RANDOM_PARAMS = ("value", "name")
+
+
+def filtered_rows(table, params: dict) -> int:
+    values = table.columns[params["column"]].values
+    return sum(bool(params["operation"](value, params["value"])) for value in values)
+
+
+def distinct_values(table, params: dict) -> int:
+    return len(set(table.columns[params["column"]].values))
+
+
+def split_parts(table, params: dict) -> int:
+    return max(len(value.split(params["split_value"])) for value in table.columns[0].values)
+
+
+def groups(table, params: dict) -> int:
+    keys = [column.values for column in table.columns if column.dtype == "object"]
+    return len(set(zip(*keys)))
+
+
+def missing_values(table, params: dict) -> int:
+    return sum(is_missing(value) for value in table.columns[params["column"]].values)
+
+
+def duplicate_rows(table, params: dict) -> int:
+    rows = list(table.rows())
+    return len(rows) - len(set(rows))
+
+
+def incomplete_rows(table, params: dict) -> int:
+    return sum(any(is_missing(value) for value in row) for row in table.rows())
+
+
+# outcome of a query type which sets tasks with the same parameters apart, e.g. how many rows a filter keeps
+FEATURES = {
+    0: filtered_rows,
+    3: distinct_values,
+    4: split_parts,
+    5: groups,
+    8: missing_values,
+    9: duplicate_rows,
+    10: incomplete_rows
+}
+
+
+def canonical_params(params: dict) -> dict:
+    """
+    :param params: parameters of a task - see generators.draws
+    :return: parameters without the random values, functions are replaced by their name
+    """
+    return {
+        key: getattr(value, "__name__", value) for key, value in params.items() if key not in RANDOM_PARAMS
+    }
+
+
+def task_fingerprint(engine, q_type: int, seed: int, rows: int = 5, columns: int = 0) -> str:
+    """
+    canonicalizes a task into the query type, the column dtypes and row count of its input table, its parameters
+    without the random values and the outcome of the query type - see FEATURES. Tasks differing only in the random
+    values and column names share a fingerprint.
+    :param engine: engine providing the seeded random state and the generator
+    :param q_type: query type (0 - 11)
+    :param seed: seed of the task
+    :param rows: amount of rows of the input table
+    :param columns: amount of additional input columns
+    :return: 16 hex characters
+    """
+    table, params = draw_task(engine, q_type, seed, rows=rows, columns=columns)
+    feature = FEATURES[q_type](table, params) if q_type in FEATURES else None
+
+    canonical = [q_type, [column.dtype for column in table.columns], len(table), canonical_params(params), feature]
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class FingerprintIndex:
+    """
+    class holds the most recently served task fingerprints with LRU eviction, so a generator can reject a task which
+    was served shortly before. Adding a fingerprint again marks it as the most recent one, the number of its last add
+    tells which of several served tasks was served longest ago. A query type has only a few distinct fingerprints, so
+    with a share the index holds at most this share of the distinct fingerprints added so far and never all of them.
+
+    -- create an index of the last 4096 tasks:
+        index = FingerprintIndex(max_size=4096)
+
+    -- create an index of one query type holding at most half of its fingerprints:
+        index = FingerprintIndex(max_size=1024, share=0.5)
+
+    -- reject a task served before:
+        if not index.seen(fingerprint):
+            index.add(fingerprint)
+
+    -- prefer the task served longest ago:
+        fingerprint = min(fingerprints, key=lambda x: index.last_added(x) or 0)
+    """
+
+    def __init__(self, max_size: int = 4096, share: float = None):
+        """
+        :param max_size: maximum amount of fingerprints, the least recently added ones are evicted
+        :param share: share of the distinct fingerprints added so far the index holds at most (0 - 1), None for
+        max_size only
+        """
+        self.max_size = max(max_size, 1)
+        self.share = min(max(share, 0.0), 1.0) if share is not None else None
+        self.fingerprints = OrderedDict()
+        self.distinct = set()
+        self.added = 0
+        self.hits = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    def seen(self, fingerprint: str) -> bool:
+        """
+        :param fingerprint: fingerprint of a task - see task_fingerprint
+        :return: True in case the fingerprint is held by the index
+        """
+        with self._lock:
+            if fingerprint in self.fingerprints:
+                self.hits += 1
+                return True
+            return False
+
+    def last_added(self, fingerprint: str):
+        """
+        :param fingerprint: fingerprint of a task - see task_fingerprint
+        :return: number of the last add of the fingerprint, None in case the index does not hold it
+        """
+        with self._lock:
+            added = self.fingerprints.get(fingerprint)
+            if added is not None:
+                self.hits += 1
+            return added
+
+    def add(self, fingerprint: str) -> None:
+        """
+        adds a fingerprint as the most recent one and evicts the least recent one once the index is full
+        :param fingerprint: fingerprint of a task - see task_fingerprint
+        """
+        with self._lock:
+            self.added += 1
+            self.fingerprints[fingerprint] = self.added
+            self.fingerprints.move_to_end(fingerprint)
+
+            # the distinct fingerprints are only counted until the share of them reaches max_size
+            max_size = self.max_size
+            if self.share is not None:
+                if len(self.distinct) * self.share < self.max_size:
+                    self.distinct.add(fingerprint)
+                max_size = min(max(int(len(self.distinct) * self.share), 1), self.max_size)
+
+            while len(self.fingerprints) > max_size:
+                self.fingerprints.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """
+        :return: dict with the amount of held fingerprints, the distinct fingerprints counted for the share, the hits
+        and the evictions
+        """
+        with self._lock:
+            return {"size": len(self.fingerprints), "distinct": len(self.distinct), "hits": self.hits,
+                    "evictions": self.evictions}
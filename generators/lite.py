@@ -0,0 +1,541 @@
+# import standard modules
+import math
+import random
+import operator
+
+# import third party modules
+import numpy as np
+
+# import project related modules
+from generators import draws
+from generators.base import TaskEngine, ENGINES
+
+
+class Column:
+    """
+    single named column of a LiteTable holding its values as a plain list and a pandas like dtype name
+    (int64, float64 or object), so the generators can decide on the same operations as the pandas engine
+    """
+
+    __slots__ = ("name", "dtype", "values")
+
+    def __init__(self, name: str, dtype: str, values: list):
+        self.name = name
+        self.dtype = dtype
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return f"Column({self.name!r}, {self.dtype})"
+
+
+class LiteTable:
+    """
+    compact column oriented table used by the LiteQueryTable. Column labels may repeat, in which case selections and
+    records behave like a pandas DataFrame with duplicated column labels.
+    """
+
+    __slots__ = ("columns",)
+
+    def __init__(self, columns: list):
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.columns[0].values) if self.columns else 0
+
+    @property
+    def names(self) -> list:
+        return [column.name for column in self.columns]
+
+    def column(self, name: str) -> Column:
+        """
+        :param name: label of the column
+        :return: the first column with the given label
+        """
+        for column in self.columns:
+            if column.name == name:
+                return column
+        raise KeyError(name)
+
+    def select(self, names: list) -> "LiteTable":
+        """
+        selects columns by label like df.loc[:, names] - every label returns all columns carrying it
+        :param names: list of column labels
+        :return: new LiteTable sharing the value lists of the selected columns
+        """
+        columns = list()
+        for name in names:
+            matches = [column for column in self.columns if column.name == name]
+            if not matches:
+                raise KeyError(name)
+            columns.extend(matches)
+        return LiteTable(columns)
+
+    def drop(self, name: str) -> "LiteTable":
+        """
+        :param name: label of the column(s) to drop
+        :return: new LiteTable without the columns carrying the label
+        """
+        return LiteTable([column for column in self.columns if column.name != name])
+
+    def rename(self, mapping: dict) -> "LiteTable":
+        """
+        :param mapping: dict with old label as key and new label as value
+        :return: new LiteTable with renamed columns
+        """
+        return LiteTable([
+            Column(mapping.get(column.name, column.name), column.dtype, column.values) for column in self.columns
+        ])
+
+    def take(self, indexes: list) -> "LiteTable":
+        """
+        :param indexes: row positions to keep, positions may repeat
+        :return: new LiteTable holding the rows in the order of indexes
+        """
+        return LiteTable([
+            Column(column.name, column.dtype, [column.values[ix] for ix in indexes]) for column in self.columns
+        ])
+
+    def assign(self, column: Column) -> "LiteTable":
+        """
+        replaces the column with the same label or appends it like df[name] = values
+        :param column: new column
+        :return: new LiteTable with the assigned column
+        """
+        columns = list(self.columns)
+        for ix, existing in enumerate(columns):
+            if existing.name == column.name:
+                columns[ix] = column
+                return LiteTable(columns)
+        columns.append(column)
+        return LiteTable(columns)
+
+    def rows(self):
+        """
+        :return: iterator over the rows of the table as tuples
+        """
+        return zip(*(column.values for column in self.columns))
+
+    def records(self) -> list:
+        """
+        :return: list of records equal to pandas to_dict("records")
+        """
+        names = self.names
+        return [dict(zip(names, row)) for row in self.rows()]
+
+
+def is_missing(value) -> bool:
+    """
+    :param value: any cell value
+    :return: True in case the value is NaN or None like pandas isna
+    """
+    return value is None or value != value
+
+
+def divide(left, right):
+    """
+    true division following numpy semantics instead of raising a ZeroDivisionError
+    :return: quotient, +/- inf or NaN
+    """
+    try:
+        return left / right
+    except ZeroDivisionError:
+        if left == 0 or is_missing(left):
+            return math.nan
+        return math.copysign(math.inf, left) * math.copysign(1.0, right)
+
+
+class LiteQueryTable(TaskEngine):
+    """
+    pandas free version of the QueryTable. It draws its tasks with the same draws as the pandas engine - see
+    generators.draws, but keeps the tables in a LiteTable and applies the transformations on plain lists. The same
+    seed therefore leads to the same records in both engines.
+
+    -- generate an input and related output dataset for a given query_type:
+        qt = LiteQueryTable()
+        qt.query_task(1) - 0 - 11 is available
+    """
+
+    dtypes = {"<class 'str'>": "object", "<class 'int'>": "int64", "<class 'float'>": "float64"}
+
+    @classmethod
+    def names_of(cls, table: LiteTable) -> list:
+        return table.names
+
+    @classmethod
+    def values_of(cls, table: LiteTable, column: int) -> list:
+        return table.columns[column].values
+
+    @classmethod
+    def dtypes_of(cls, table: LiteTable) -> list:
+        return [column.dtype for column in table.columns]
+
+    @classmethod
+    def to_records(cls, table: LiteTable) -> list:
+        """
+        :param table: LiteTable
+        :return: list of records with one dict per row
+        """
+        return table.records()
+
+    @classmethod
+    def to_columns(cls, table: LiteTable) -> dict:
+        """
+        converts a LiteTable into the same columnar wire format as QueryTable.to_columns
+        :param table: LiteTable
+        :return: dict with the columns, dtypes, values, markers and the amount of rows
+        """
+
+        values, markers = list(), list()
+        for column in table.columns:
+            column_values = list(column.values)
+            column_markers = dict()
+
+            # only float and object columns can hold missing or non finite values
+            if column.dtype != "int64":
+                for position, value in enumerate(column_values):
+                    if value is None:
+                        continue
+                    if is_missing(value) or (isinstance(value, float) and math.isinf(value)):
+                        column_values[position] = None
+                        column_markers[position] = cls.marker(value)
+
+            values.append(column_values)
+            markers.append(column_markers)
+
+        return {
+            "columns": table.names,
+            "dtypes": [column.dtype for column in table.columns],
+            "values": values,
+            "markers": markers,
+            "rows": len(table)
+        }
+
+    def generate(self, schema: list, rows: int = 5, columns: int = 0) -> LiteTable:
+        """
+        counterpart of QueryTable.generate building a LiteTable instead of a pandas DataFrame
+        :param schema: list of dicts e.g [{"type": float}] - see DataSetGenerator.generate
+        :param rows: amount of rows
+        :param columns: amount of additional columns - see extend_schema
+        :return: LiteTable according to the defined schema
+        """
+
+        generator = self.data_generator
+        values = {
+            "<class 'str'>": generator.generate_string_column,
+            "<class 'int'>": generator.generate_int_column,
+            "<class 'float'>": generator.generate_float_column
+        }
+
+        # a dict like the generator uses, so a repeated column name replaces the values at the first position
+        data = dict()
+        for column in self.extend_schema(schema, columns):
+            dtp = str(column["type"])
+            name_column = column.get("names", False)
+            to_split = column.get("split", False)
+            duplicates = column.get("duplicates", False)
+            column_name = generator.column_name_generator(d_type=dtp, names=name_column)
+            column_values = values[dtp](rows, split=to_split, names=name_column, duplicates=duplicates)
+            column_values = column_values if isinstance(column_values, list) else column_values.tolist()
+            data[column_name] = Column(column_name, self.dtypes[dtp], column_values)
+
+        return LiteTable(list(data.values()))
+
+    def with_missing(self, table: LiteTable, name: str) -> LiteTable:
+        """
+        enters missing values into a column. Integer columns turn into float columns as they do in pandas.
+        :param table: LiteTable to modify
+        :param name: label of the column to enter missing values
+        :return: new LiteTable with missing values in the given column
+        """
+        column = table.column(name)
+        values = self.create_missing(list(column.values))
+
+        dtype = column.dtype
+        if dtype == "int64":
+            dtype = "float64"
+            values = [value if is_missing(value) else float(value) for value in values]
+
+        return table.assign(Column(name, dtype, values))
+
+    def duplicate_rows(self, table: LiteTable) -> LiteTable:
+        """
+        duplicates random rows and moves them to the end of the table
+        :param table: LiteTable
+        :return: new LiteTable with the duplicated rows
+        """
+        return table.take(self.duplicate_order(len(table)))
+
+    def row_filter(self, rows: int = 5, columns: int = 0) -> tuple:
+        """
+        provides and example where the data set is filtered on one value
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns - see extend_schema
+        :return tuple with input and output dataset as LiteTables
+        """
+
+        input_data, params = draws.draw_row_filter(self, rows, columns)
+
+        # create an output dataset
+        row_filter, filter_value = params["operation"], params["value"]
+        values = input_data.columns[params["column"]].values
+        output_data = input_data.take([ix for ix, value in enumerate(values) if row_filter(value, filter_value)])
+
+        return input_data, output_data
+
+    def select_columns(self, rows: int = 5, columns: int = 0) -> tuple:
+        """
+        provides an example with a dataset to be reduced in column size
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns - see extend_schema
+        :return tuple with input and output dataset as LiteTables
+        """
+
+        input_data, params = draws.draw_select_columns(self, rows, columns)
+        columns_to_select = [input_data.columns[ix].name for ix in params["columns"]]
+
+        return input_data, input_data.select(columns_to_select)
+
+    def rename_column(self, rows: int = 5, columns: int = 0) -> tuple:
+        """
+        provides an example with a dataset where a column is renamed
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns - see extend_schema
+        :return tuple with input and output dataset as LiteTables
+        """
+
+        input_data, params = draws.draw_rename_column(self, rows, columns)
+
+        columns = input_data.names
+        rename_map = dict(zip(columns, columns))
+        rename_map[columns[params["column"]]] = params["name"]
+        output_data = input_data.select(columns).rename(rename_map)
+
+        # keep the order of the input table for the renamed column
+        columns[params["column"]] = params["name"]
+
+        return input_data, output_data.select(columns)
+
+    def row_count(self, rows: int = 5, columns: int = 0) -> tuple:
+        """
+        provides two data sets where the output dataset is an aggregated value count of one column
+        from the input dataset
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns - see extend_schema
+        :return tuple with input and output dataset as LiteTables
+        """
+
+        input_data, params = draws.draw_row_count(self, rows, columns)
+        column_to_count = input_data.columns[params["column"]]
+
+        # count in order of appearance and sort stable by count like value_counts does
+        counts = dict()
+        for value in column_to_count.values:
+            counts[value] = counts.get(value, 0) + 1
+        counts = sorted(counts.items(), key=operator.itemgetter(1), reverse=True)
+
+        output_data = LiteTable([
+            Column(column_to_count.name, "object", [value for value, _ in counts]),
+            Column("count", "int64", [count for _, count in counts])
+        ])
+
+        return input_data, output_data
+
+    def split_column(self, rows: int = 5, columns: int = 0) -> tuple:
+        """
+        creates a dataset with a column to be split by a random delimiter and an output table doing so and expanding the
+        input table
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns - see extend_schema
+        :return tuple with input and output dataset as LiteTables
+        """
+
+        input_data, params = draws.draw_split_column(self, rows, columns)
+        column = input_data.columns[0]
+
+        # split every value and pad shorter splits with None like str.split(expand=True)
+        splits = [value.split(params["split_value"]) for value in column.values]
+        width = max(len(split) for split in splits)
+
+        output_data = input_data
+        for ix in range(width):
+            values = [split[ix] if ix < len(split) else None for split in splits]
+            output_data = output_data.assign(Column(f"{column.name}_{ix}", "object", values))
+
+        return input_data, output_data
+
+    def group_data(self, rows: int = 5, columns: int = 0) -> tuple:
+        """
+        generate a random dataset with two numerical and one string column
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns - see extend_schema
+        :return tuple with input and output dataset as LiteTables
+        """
+
+        input_data, params = draws.draw_group_data(self, rows, columns)
+
+        # get the string columns we will group by
+        string_columns = [column.name for column in input_data.columns if column.dtype == "object"]
+        functions = {"max": max, "min": min, "sum": sum}
+
+        # collect the row positions of each group and sort the group keys like groupby does
+        keys = [input_data.column(name).values for name in string_columns]
+        groups = dict()
+        for ix, key in enumerate(zip(*keys)):
+            groups.setdefault(key, []).append(ix)
+        group_keys = sorted(groups)
+
+        columns = [
+            Column(name, "object", [key[ix] for key in group_keys]) for ix, name in enumerate(string_columns)
+        ]
+        for position, action in params["aggregates"]:
+            column = input_data.columns[position]
+            columns.append(Column(
+                f"{column.name}_{action}",
+                "int64",
+                [functions[action](column.values[ix] for ix in groups[key]) for key in group_keys]
+            ))
+
+        return input_data, LiteTable(columns)
+
+    def sort_data(self, rows: int = 5, columns: int = 0) -> tuple:
+        """
+        function to create and random input table and sort it by a random column in desc or ascending order.
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns - see extend_schema
+        :return tuple with input and output dataset as LiteTables
+        """
+
+        input_data, params = draws.draw_sort_data(self, rows, columns)
+        values = input_data.columns[params["column"]].values
+
+        # sorted is stable in both directions like sort_values with a stable sort kind
+        indexes = sorted(range(len(values)), key=values.__getitem__, reverse=not params["ascending"])
+        output_data = input_data.take(indexes)
+
+        return input_data, output_data
+
+    def drop_columns(self, rows: int = 5, columns: int = 0) -> tuple:
+        """
+         function that creates an input and output dataset where the output dataset drops some columns randomly
+         :param rows: amount of rows of the input table
+         :param columns: amount of additional input columns - see extend_schema
+         :return tuple with input and output dataset as LiteTables
+        """
+
+        input_data, params = draws.draw_drop_columns(self, rows, columns)
+        return input_data, input_data.drop(input_data.columns[params["column"]].name)
+
+    def fill_missing_values(self, rows: int = 5, columns: int = 0) -> tuple:
+        """
+        creates an input and an output dataset where the input dataset contains some missing values which
+        will be filled in the output dataset
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns - see extend_schema
+        :return tuple with input and output dataset as LiteTables
+        """
+
+        input_data, params = draws.draw_fill_missing_values(self, rows, columns)
+        fill_value = params["value"]
+
+        output_data = LiteTable([
+            Column(column.name, column.dtype, [fill_value if is_missing(value) else value for value in column.values])
+            for column in input_data.columns
+        ])
+
+        return input_data, output_data
+
+    def drop_duplicates(self, rows: int = 5, columns: int = 0) -> tuple:
+        """
+        creates an input and output dataset where the input dataset holds some duplicated rows which will be dropped
+        in the output dataset
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns - see extend_schema
+        :return tuple with input and output dataset as LiteTables
+        """
+
+        input_data, _ = draws.draw_drop_duplicates(self, rows, columns)
+
+        # keep the first occurrence of every row
+        seen = set()
+        indexes = list()
+        for ix, row in enumerate(input_data.rows()):
+            if row not in seen:
+                seen.add(row)
+                indexes.append(ix)
+
+        return input_data, input_data.take(indexes)
+
+    def drop_na(self, rows: int = 5, columns: int = 0) -> tuple:
+        """
+        provides an input and output dataset where the output dataset dropped all missing values
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns - see extend_schema
+        :return tuple with input and output dataset as LiteTables
+        """
+
+        input_data, _ = draws.draw_drop_na(self, rows, columns)
+
+        indexes = [ix for ix, row in enumerate(input_data.rows()) if not any(is_missing(value) for value in row)]
+        return input_data, input_data.take(indexes)
+
+    def calculate_column(self, rows: int = 5, columns: int = 0) -> tuple:
+        """
+        creates an input and an output dataset where the output dataset holds an additional column which is
+        calculated version of two random columns from the input dataframe. It might be a add, subtract, multiply or
+        divide of two numerical columns or a concat of two string columns
+
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns - see extend_schema
+        :return tuple with input and output dataset as LiteTables
+        """
+
+        input_data, params = draws.draw_calculate_column(self, rows, columns)
+
+        operations = {
+            "add": operator.add,
+            "subtract": operator.sub,
+            "multiply": operator.mul,
+            "divide": divide
+        }
+
+        columns = [input_data.columns[ix].name for ix in params["columns"]]
+        output_data = input_data.select(columns)
+
+        if "separator" in params:
+            left, right = (output_data.column(name).values for name in columns)
+            values = [a + params["separator"] + b for a, b in zip(left, right)]
+            output_data = output_data.assign(Column("combination", "object", values))
+
+        else:
+            left, right = (output_data.column(name) for name in columns)
+            values = [operations[params["func"]](a, b) for a, b in zip(left.values, right.values)]
+            dtype = "int64" if params["func"] != "divide" and left.dtype == right.dtype == "int64" else "float64"
+            output_data = output_data.assign(Column(params["name"], dtype, values))
+
+        return input_data, output_data
+
+
+# task engines selectable by name
+def lite_engine(engine: TaskEngine) -> LiteQueryTable:
+    """
+    :return: lite engine sharing the generator of the engine, it builds the input tables from python lists
+    """
+    lite = LiteQueryTable()
+    lite.data_generator = engine.data_generator
+    return lite
+
+
+def draw_task(engine: TaskEngine, q_type: int, seed: int, rows: int = 5, columns: int = 0) -> tuple:
+    """
+    draws the input table and the parameters of a single task without applying the transformation
+    :param engine: engine providing the seeded random state and the generator
+    :return: tuple with the input table as LiteTable and the dict of parameters
+    """
+    lite = lite_engine(engine)
+    with engine.seed_lock:
+        random.seed(seed)
+        np.random.seed(seed)
+        return draws.DRAWS[q_type](lite, rows, columns)
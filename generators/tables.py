@@ -1,15 +1,18 @@
 # import standard modules
 import random
-import string
 import operator
 
 # import third party modules
 import numpy as np
 import pandas as pd
-from randomtables import DataSetGenerator
 
+# import project related modules
+from generators.base import TaskEngine
+from generators.chains import STEPS, TaskGraph, applicable
+from generators import draws
 
-class QueryTable:
+
+class QueryTable(TaskEngine):
     """
     class creates an input table and an output table for pre defined query types based on randomly generated data sets
 
@@ -21,402 +24,352 @@ class QueryTable:
         qt = QueryTable()
         qt.query_task(1) - 0 - 11 is available
 
+    -- regenerate the same task by passing the same seed:
+        qt.query_task(1, seed=42)
+
+    -- get the tables column wise, with the column names once and one value list per column:
+        qt.query_task(1, fmt="columns")
+
+    -- create a larger task with 1000 rows and two additional columns:
+        qt.query_task(1, rows=1000, columns=2)
+
+    -- create a chained task of up to three steps, a row filter followed by steps drawn from group and sort:
+        qt.query_task(0, seed=42, steps=3, mix={5: 2, 6: 1})
+
+    -- apply an explicit chain of query types, chains sharing a prefix reuse its memoized tables:
+        qt.chain([0, 5, 6], seed=42)
+
     """
 
-    def __init__(self):
-        self.data_generator = DataSetGenerator()
-        self.query_type = {
-            0: self.row_filter,
-            1: self.select_columns,
-            2: self.rename_column,
-            3: self.row_count,
-            4: self.split_column,
-            5: self.group_data,
-            6: self.sort_data,
-            7: self.drop_columns,
-            8: self.fill_missing_values,
-            9: self.drop_duplicates,
-            10: self.drop_na,
-            11: self.calculate_column
+    # intermediate tables of chained tasks, shared by all engines of a process
+    graph = TaskGraph(max_nodes=256)
+
+    def generate(self, schema: list, rows: int = 5, columns: int = 0) -> pd.DataFrame:
+        """
+        counterpart of DataSetGenerator.generate with a configurable amount of rows and additional columns. It draws the
+        same random values as DataSetGenerator.generate for five rows and no additional columns.
+        :param schema: list of dicts e.g [{"type": float}] - see DataSetGenerator.generate
+        :param rows: amount of rows
+        :param columns: amount of additional columns - see extend_schema
+        :return: pandas DataFrame according to the defined schema
+        """
+
+        generator = self.data_generator
+        values = {
+            "<class 'str'>": generator.generate_string_column,
+            "<class 'int'>": generator.generate_int_column,
+            "<class 'float'>": generator.generate_float_column
         }
 
-    @classmethod
-    def rand_bool(cls) -> bool:
+        # a repeated column name replaces the values of the first column with this name
+        data = dict()
+        for column in self.extend_schema(schema, columns):
+            dtp = str(column["type"])
+            name_column = column.get("names", False)
+            to_split = column.get("split", False)
+            duplicates = column.get("duplicates", False)
+            column_name = generator.column_name_generator(d_type=dtp, names=name_column)
+            data[column_name] = values[dtp](rows, split=to_split, names=name_column, duplicates=duplicates)
+
+        return pd.DataFrame(data)
+
+    def with_missing(self, table: pd.DataFrame, name: str) -> pd.DataFrame:
+        """
+        enters missing values into a column. Integer columns turn into float columns.
+        :param table: pandas DataFrame to modify
+        :param name: label of the column to enter missing values
+        :return: the table with missing values in the given column
+        """
+        values = table[name].to_numpy()
+        values = values.astype("float64") if values.dtype.kind in "iu" else values.copy()
+        values[self.missing_indexes(len(values))] = np.nan
+
+        table[name] = values
+        return table
+
+    def duplicate_rows(self, table: pd.DataFrame) -> pd.DataFrame:
         """
-        select randomly between True and False
-        :return: bool True or False
+        duplicates random rows and moves them to the end of the table
+        :param table: pandas DataFrame
+        :return: new pandas DataFrame with the duplicated rows
         """
-        return random.choice([False, True])
-    
+        return table.iloc[self.duplicate_order(len(table))].reset_index(drop=True)
+
     @classmethod
-    def rand_num(cls):
+    def names_of(cls, table: pd.DataFrame) -> list:
         """
-        selects randomly between float and int type
-        :return: type float or int
+        :return: list with the column labels of the table - see generators.draws
         """
-        return random.choice([float, int])
+        return table.columns.tolist()
 
     @classmethod
-    def create_missing(cls, values: list) -> list:
+    def values_of(cls, table: pd.DataFrame, column: int) -> list:
         """
-        function to create missing values in a given list
+        :return: list with the values of the column at the given position - see generators.draws
+        """
+        return table.iloc[:, column].tolist()
 
-        :param values: list of values
-        :return: input list with NaN at random locations
+    @classmethod
+    def dtypes_of(cls, table: pd.DataFrame) -> list:
         """
+        :return: list with the dtype name of every column e.g. int64 - see generators.draws
+        """
+        return [str(dtype) for dtype in table.dtypes]
 
-        # get indexes to be replaces
-        idx_to_replace = random.choices(list(range(5)), k=random.choice(list(range(1, 4))))
+    @classmethod
+    def to_records(cls, table: pd.DataFrame) -> list:
+        """
+        :param table: pandas DataFrame
+        :return: list of records with one dict per row
+        """
+        return table.to_dict("records")
 
-        # replace values at selected indexes
-        for ix in idx_to_replace:
-            values[ix] = np.nan
+    @classmethod
+    def to_columns(cls, table: pd.DataFrame) -> dict:
+        """
+        converts a table into the columnar wire format. Column names and dtypes are listed once and the values are kept
+        in one list per column. NaN, infinite values and None are not valid json, so they are replaced by null and
+        every NaN or infinite value gets an entry in the markers of its column.
 
-        return values
+        -- e.g. a float column with a missing value:
+            {"columns": ["price"], "dtypes": ["float64"], "values": [[1.5, null]], "markers": [{"1": "NaN"}], "rows": 2}
 
-    def row_filter(self) -> tuple:
-        """
-        provides and example where the data set is filtered on one value
-        :return tuple with input and output dataset as list of records
+        :param table: pandas DataFrame
+        :return: dict with the columns, dtypes, values, markers and the amount of rows
         """
 
-        # generate a random dataset with two numerical and one string column
-        schema = random.choice([
-            {"type": str, "split": self.rand_bool(), "names": self.rand_bool()},
-            {"type": self.rand_num()},
-            {"type": self.rand_num()}
-        ])
+        columns, dtypes, values, markers = list(), list(), list(), list()
 
-        input_data = self.data_generator.generate(
-            schema=[schema],
-        )
+        # items yields every column once, also in case column labels repeat
+        for name, series in table.items():
+            array = series.to_numpy()
 
-        str_operations = [operator.eq, operator.ne]
-        num_operations = [operator.lt, operator.le, operator.ge, operator.gt] + str_operations
+            # tolist converts numpy scalars in C, only the few special values are touched in python
+            column_values = array.tolist()
+            special = ~np.isfinite(array) if array.dtype.kind == "f" else pd.isna(array)
 
-        # select a random column to pick a random value to filter for
-        columns = input_data.columns.tolist()
-        column_to_select = random.choice(columns)
-        filter_value = random.choice(input_data[column_to_select].tolist())
+            column_markers = dict()
+            for position in np.flatnonzero(special).tolist():
+                value = column_values[position]
+                column_values[position] = None
+                if value is not None:
+                    column_markers[position] = cls.marker(value)
+
+            columns.append(name)
+            dtypes.append(str(array.dtype))
+            values.append(column_values)
+            markers.append(column_markers)
 
-        column_dtype = input_data.loc[:, [column_to_select]].dtypes
-        column_dtype = str(list(column_dtype)[0])
+        # a table without columns keeps its index in pandas, but there is nothing to show
+        rows = len(table) if columns else 0
+        return {"columns": columns, "dtypes": dtypes, "values": values, "markers": markers, "rows": rows}
+
+    def row_filter(self, rows: int = 5, columns: int = 0) -> tuple:
+        """
+        provides and example where the data set is filtered on one value
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns - see extend_schema
+        :return tuple with input and output dataset as pandas DataFrames
+        """
 
-        operations = num_operations if column_dtype in ["float64", "int32", "int64", "float32"] else str_operations
+        input_data, params = draws.draw_row_filter(self, rows, columns)
 
         # create an output dataset
-        row_filter = random.choice(operations)
-        output_data = input_data.loc[row_filter(input_data[column_to_select], filter_value)]
+        column_to_select = input_data.columns[params["column"]]
+        output_data = input_data.loc[params["operation"](input_data[column_to_select], params["value"])]
 
-        return input_data.to_dict("records"), output_data.to_dict("records")
+        return input_data, output_data
 
-    def select_columns(self) -> tuple:
+    def select_columns(self, rows: int = 5, columns: int = 0) -> tuple:
         """
         provides an example with a dataset to be reduced in column size
-        :return tuple with input and output dataset as list of records
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns - see extend_schema
+        :return tuple with input and output dataset as pandas DataFrames
         """
 
-        # generate a random dataset with two numerical and one string column
-        input_data = self.data_generator.generate(
-            schema=[
-                {"type": random.choice([float, int])},
-                {"type": str, "split": self.rand_bool(), "names": self.rand_bool()},
-                {"type": random.choice([float, int])}
-            ],
-        )
-
-        # select a random column of both and select
-        k = random.choice([1, 2])
-        columns_to_select = random.choices(input_data.columns.tolist(), k=k)
+        input_data, params = draws.draw_select_columns(self, rows, columns)
 
         # create output dataset
+        columns_to_select = [input_data.columns[ix] for ix in params["columns"]]
         output_data = input_data.loc[:, columns_to_select]
 
-        return input_data.to_dict("records"), output_data.to_dict("records")
+        return input_data, output_data
 
-    def rename_column(self) -> tuple:
+    def rename_column(self, rows: int = 5, columns: int = 0) -> tuple:
         """
         provides an example with a dataset where a column is renamed
-        :return tuple with input and output dataset as list of records
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns - see extend_schema
+        :return tuple with input and output dataset as pandas DataFrames
         """
 
-        # generate a random dataset with two numerical and one string column
-        input_data = self.data_generator.generate(
-            schema=[
-                {"type": self.rand_num()},
-                {"type": self.rand_num()}
-            ],
-        )
+        input_data, params = draws.draw_rename_column(self, rows, columns)
 
         # get a list of all available columns
         columns = input_data.columns.tolist()
-
-        # select a random column of both and select
-        column_to_select = random.choice(columns)
-        new_name = self.data_generator.column_name_generator(d_type="<class 'int'>")
-
-        # keep the order of the input table by selection the columns in the right order
-        input_data = input_data.loc[:, columns]
+        column_to_select = columns[params["column"]]
 
         # create a map with column namings and create the output dataset with the renamed column
         rename_map = dict(zip(columns, columns))
-        rename_map[column_to_select] = new_name
+        rename_map[column_to_select] = params["name"]
         output_data = input_data.loc[:, columns].rename(columns=rename_map)
 
         # create a new order
-        index_of_renamed = columns.index(column_to_select)
-        columns[index_of_renamed] = new_name
+        columns[params["column"]] = params["name"]
 
-        return input_data.to_dict("records"), output_data.loc[:, columns].to_dict("records")
+        return input_data, output_data.loc[:, columns]
 
-    def row_count(self) -> tuple:
+    def row_count(self, rows: int = 5, columns: int = 0) -> tuple:
         """
         provides two data sets where the output dataset is an aggregated value count of one column
         from the input dataset
-        :return tuple with input and output dataset as list of records
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns - see extend_schema
+        :return tuple with input and output dataset as pandas DataFrames
         """
 
-        # generate a random dataset with two numerical and one string column
-        input_data = self.data_generator.generate(
-            schema=[
-                {"type": str, "split": self.rand_bool(), "names": self.rand_bool()},
-                {"type": str, "split": self.rand_bool(), "names": self.rand_bool()},
-                {"type": str, "split": self.rand_bool(), "names": self.rand_bool()},
-            ],
-        )
-
-        # get random entries to be duplicated, so some row counts are larger than one
-        indexes = random.choices(list(range(5)), k=random.choice([1, 2]))
-        not_selected = list(set(list(range(5))) - set(indexes))
-
-        # duplicate rows in input dataset
-        input_data = (input_data.iloc[not_selected]
-                      .append(input_data.iloc[indexes].copy())
-                      .append(input_data.iloc[indexes].copy())
-                      ).reset_index(drop=True)
-
-        # get random column to be counted in values
-        column_to_count = random.choice(input_data.columns.tolist())
+        input_data, params = draws.draw_row_count(self, rows, columns)
+        column_to_count = input_data.columns[params["column"]]
 
-        # create the output dataset by counting the values of the randomly picked column
-        output_data = input_data.loc[:, [column_to_count]][column_to_count].value_counts().reset_index()
+        # create the output dataset by counting the values of the randomly picked column - sorted stable, so equal
+        # counts keep the order of appearance on every platform
+        output_data = (input_data.loc[:, [column_to_count]][column_to_count]
+                       .value_counts(sort=False)
+                       .sort_values(ascending=False, kind="mergesort")
+                       .reset_index())
         output_data.rename(columns={"index": column_to_count, column_to_count: "count"}, inplace=True)
 
-        return input_data.to_dict("records"), output_data.to_dict("records")
+        return input_data, output_data
 
-    def split_column(self) -> tuple:
+    def split_column(self, rows: int = 5, columns: int = 0) -> tuple:
         """
         creates a dataset with a column to be split by a random delimiter and an output table doing so and expanding the
         input table
-        :return tuple with input and output dataset as list of records
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns - see extend_schema
+        :return tuple with input and output dataset as pandas DataFrames
         """
 
-        # generate a random dataset with two numerical and one string column
-        input_data = self.data_generator.generate(
-            schema=[
-                {"type": str, "split": True, "names": self.rand_bool()},
-            ],
-        )
-
-        # get the split value by counting by identifying the punctuation symbol - same for the entire column
-        column_name = input_data.columns.tolist()[0]
-        example = input_data[column_name].tolist()[0]
-        split_value = [x for x in example if x in list(string.punctuation)][0]
+        input_data, params = draws.draw_split_column(self, rows, columns)
 
         # split the picked columns and expand the series
-        splits = input_data[column_name].str.split(split_value, n=-1, expand=True)
+        column_name = input_data.columns[0]
+        splits = input_data[column_name].str.split(params["split_value"], n=-1, expand=True)
 
         # create a new column for each expand in splits
         output_data = input_data.copy()
         for ix in range(splits.shape[1]):
             output_data[f"{column_name}_{ix}"] = splits[ix]
 
-        return input_data.to_dict("records"), output_data.to_dict("records")
+        return input_data, output_data
 
-    def group_data(self) -> tuple:
+    def group_data(self, rows: int = 5, columns: int = 0) -> tuple:
         """
         generate a random dataset with two numerical and one string column
-        :return tuple with input and output dataset as list of records
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns - see extend_schema
+        :return tuple with input and output dataset as pandas DataFrames
         """
 
-        string_schema = [
-            {"type": str, "split": False, "names": self.rand_bool(), "duplicates": True}
-            for _ in range(random.choice([1, 2]))
-        ]
-
-        numerical_schema = [
-            {"type": int} for _ in range(random.choice([1, 2]))
-        ]
-
-        input_data = self.data_generator.generate(
-            schema=string_schema + numerical_schema
-        )
-
-        # get the string column we will group by
-        d_types = list(zip(input_data.columns.tolist(), input_data.dtypes.tolist()))
-        string_columns = [x[0] for x in d_types if str(x[1]) == "object"]
-        int_columns = list(set(input_data.columns.tolist()) - set(string_columns))
+        input_data, params = draws.draw_group_data(self, rows, columns)
 
-        # get randomly an action to be executed by the group by for each column one
-        actions = random.choices(["max", "min", "sum"], k=len(int_columns))
-        aggregates = dict(zip(int_columns, actions))
+        # get the string column we will group by and the action of each aggregated column
+        string_columns = [name for name, dtype in input_data.dtypes.items() if str(dtype) == "object"]
+        aggregates = {input_data.columns[ix]: action for ix, action in params["aggregates"]}
 
         # create a renaming for the output columns so the user can easily understand which action was taken
-        renaming = dict()
-        for i in range(len(int_columns)):
-            int_column = int_columns[i]
-            renaming[int_column] = f"{int_columns[i]}_{aggregates[int_columns[i]]}"
+        renaming = {name: f"{name}_{action}" for name, action in aggregates.items()}
 
         # create the aggregation and the output table
         output_data = input_data.groupby(string_columns).agg(aggregates).reset_index()
         output_data = output_data.rename(columns=renaming)
 
-        return input_data.to_dict("records"), output_data.to_dict("records")
+        return input_data, output_data
 
-    def sort_data(self) -> tuple:
+    def sort_data(self, rows: int = 5, columns: int = 0) -> tuple:
         """
         function to create and random input table and sort it by a random column in desc or ascending order.
-        :return tuple with input and output dataset as list of records
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns - see extend_schema
+        :return tuple with input and output dataset as pandas DataFrames
         """
 
-        # generate a random dataset with two numerical and one string column
-        input_data = self.data_generator.generate(
-            schema=[
-                       {"type": str, "split": False, "names": self.rand_bool(), "duplicates": False}
-                       for _ in range(random.choice([1, 2]))
-                   ] + [
-                       {"type": self.rand_num()}
-                   ],
-        )
-
-        # get numerical column to sort by
-        d_types = list(zip(input_data.columns.tolist(), input_data.dtypes.tolist()))
-        numerical_column = [x[0] for x in d_types if str(x[1]) in ("float64", "int32", "int64")][0]
+        input_data, params = draws.draw_sort_data(self, rows, columns)
 
         # create the output dataset
         output_data = input_data.copy()
-        output_data = output_data.sort_values(by=numerical_column, ascending=self.rand_bool())
+        output_data = output_data.sort_values(by=input_data.columns[params["column"]], ascending=params["ascending"],
+                                              kind="mergesort")
 
-        return input_data.to_dict("records"), output_data.to_dict("records")
+        return input_data, output_data
 
-    def drop_columns(self) -> tuple:
+    def drop_columns(self, rows: int = 5, columns: int = 0) -> tuple:
         """
          function that creates an input and output dataset where the output dataset drops some columns randomly
-         :return tuple with input and output dataset as list of records
+         :param rows: amount of rows of the input table
+         :param columns: amount of additional input columns - see extend_schema
+         :return tuple with input and output dataset as pandas DataFrames
         """
 
-        # create baseline dataset
-        input_data = self.data_generator.generate(
-            schema=[
-                       {"type": str, "split": False, "names": self.rand_bool(), "duplicates": False}] + [
-                       {"type": self.rand_num()} for _ in range(random.choice([1, 2]))
-            ],
-        )
-
-        # get a random column to drop
-        to_drop = random.choice(input_data.columns.tolist())
-        output_data = input_data.drop(to_drop, axis=1)
-        return input_data.to_dict("records"), output_data.to_dict("records")
+        input_data, params = draws.draw_drop_columns(self, rows, columns)
+        output_data = input_data.drop(input_data.columns[params["column"]], axis=1)
+        return input_data, output_data
 
-    def fill_missing_values(self) -> tuple:
+    def fill_missing_values(self, rows: int = 5, columns: int = 0) -> tuple:
         """
         creates an input and an output dataset where the input dataset contains some missing values which
         will be filled in the output dataset
-        :return tuple with input and output dataset as list of records
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns - see extend_schema
+        :return tuple with input and output dataset as pandas DataFrames
         """
 
-        input_data = self.data_generator.generate(
-            schema=[
-                       {"type": str, "split": False, "names": self.rand_bool(), "duplicates": False}] + [
-                       {"type": self.rand_num()} for _ in range(random.choice([1, 2]))
-                   ],
-        )
-
-        # select randomly a column to enter missing values
-        na_column = random.choice(input_data.columns.tolist())
-        input_data[na_column] = self.create_missing(input_data[na_column].tolist())
-
-        # get the data type of the column
-        d_type = str(input_data[na_column].dtype)
+        input_data, params = draws.draw_fill_missing_values(self, rows, columns)
+        output_data = input_data.fillna(params["value"])
 
-        # select a random fill value
-        fill_values = {"float64": [.0], "int32": [0], "object": ["#", "no_value"]}
-        output_data = input_data.fillna(random.choice(fill_values[d_type]))
+        return input_data, output_data
 
-        return input_data.to_dict("records"), output_data.to_dict("records")
-
-    def drop_duplicates(self) -> tuple:
+    def drop_duplicates(self, rows: int = 5, columns: int = 0) -> tuple:
         """
         creates an input and output dataset where the input dataset holds some duplicated rows which will be dropped
         in the output dataset
-        :return tuple with input and output dataset as list of records
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns - see extend_schema
+        :return tuple with input and output dataset as pandas DataFrames
         """
 
-        # create initial input dataset
-        input_data = self.data_generator.generate(
-            schema=[
-                       {"type": str, "split": False, "names": self.rand_bool(), "duplicates": False}] + [
-                       {"type": self.rand_num()} for _ in range(random.choice([1, 2]))
-                   ],
-        )
-
-        # get random entries to be duplicated in the input dataset
-        indexes = random.choices(list(range(5)), k=random.choice([1, 2]))
-        not_selected = list(set(list(range(5))) - set(indexes))
-
-        # create duplicates at the randomly selected indexes
-        input_data = (input_data.iloc[not_selected]
-                      .append(input_data.iloc[indexes].copy())
-                      .append(input_data.iloc[indexes].copy())
-                      ).reset_index(drop=True)
+        input_data, _ = draws.draw_drop_duplicates(self, rows, columns)
 
         # drop duplicates for an output dataset
         output_data = input_data.drop_duplicates()
-        return input_data.to_dict("records"), output_data.to_dict("records")
+        return input_data, output_data
 
-    def drop_na(self):
+    def drop_na(self, rows: int = 5, columns: int = 0) -> tuple:
         """
         provides an input and output dataset where the output dataset dropped all missing values
-        :return tuple with input and output dataset as list of records
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns - see extend_schema
+        :return tuple with input and output dataset as pandas DataFrames
         """
 
-        # create input dataset
-        input_data = self.data_generator.generate(
-            schema=[
-                       {"type": str, "split": False, "names": self.rand_bool(), "duplicates": False}] + [
-                       {"type": self.rand_num()} for _ in range(random.choice([1, 2]))
-                   ],
-        )
-
-        # select randomly a column to enter missing values
-        na_column = random.choice(input_data.columns.tolist())
-        input_data[na_column] = self.create_missing(input_data[na_column].tolist())
+        input_data, _ = draws.draw_drop_na(self, rows, columns)
 
         output_data = input_data.dropna()
-        return input_data.to_dict("records"), output_data.to_dict("records")
+        return input_data, output_data
 
-    def calculate_column(self) -> tuple:
+    def calculate_column(self, rows: int = 5, columns: int = 0) -> tuple:
         """
         creates an input and an output dataset where the output dataset holds an additional column which is
         calculated version of two random columns from the input dataframe. It might be a add, subtract, multiply or
         divide of two numerical columns or a concat of two string columns
 
-        :return tuple with input and output dataset as list of records
+        :param rows: amount of rows of the input table
+        :param columns: amount of additional input columns - see extend_schema
+        :return tuple with input and output dataset as pandas DataFrames
         """
 
-        string_columns = [
-            {"type": str, "split": False, "names": self.rand_bool(), "duplicates": False}
-            for _ in range(random.choice([2, 3]))
-        ]
-
-        numerical_columns = [
-            {"type": self.rand_num()} for _ in range(random.choice([2, 3]))
-        ]
-
-        # create a dataset with either string columns or numerical columns
-        input_data = self.data_generator.generate(
-            schema=random.choice([string_columns, numerical_columns])
-        )
+        input_data, params = draws.draw_calculate_column(self, rows, columns)
 
         # set possible operators to pick from
         operations = {
@@ -426,62 +379,107 @@ class QueryTable:
             "divide": operator.truediv
         }
 
-        # list all data types of the columns to know which operation path to pick
-        d_types = list(zip(input_data.columns.tolist(), input_data.dtypes.tolist()))
-
-        # if all string columns than create a concat
-        if all([str(x[1]) == "object" for x in d_types]):
-            # only option for string is concat. substrings are not included yet
-            concat_style = random.choice(["_", "-", " "])
-            columns = random.sample(input_data.columns.tolist(), k=2)
-            output_data = input_data.loc[:, columns]
-            output_data["combination"] = output_data[columns[0]] + concat_style + output_data[columns[1]]
+        columns = [input_data.columns[ix] for ix in params["columns"]]
+        output_data = input_data.loc[:, columns]
 
+        # string columns are concatenated, numerical columns calculated into a new column
+        if "separator" in params:
+            output_data["combination"] = output_data[columns[0]] + params["separator"] + output_data[columns[1]]
         else:
-            # if numerical columns than sample - without replacement from the columns
-            columns = random.sample(input_data.columns.tolist(), k=2)
-            output_data = input_data.loc[:, columns]
-
-            # choose a random operation and create a new column
-            func = random.choice(["add", "subtract", "multiply", "divide"])
-            new_column = f"{random.choice(columns)}_{func}"
-            output_data[new_column] = operations[func](output_data[columns[0]], output_data[columns[1]])
+            output_data[params["name"]] = operations[params["func"]](output_data[columns[0]], output_data[columns[1]])
 
-        return input_data.to_dict("records"), output_data.to_dict("records")
+        return input_data, output_data
 
     @classmethod
-    def options(cls) -> None:
-        """function prints all available q_types and their filter names"""
-
-        options = {
-            "row_filter": 0,
-            "select_columns": 1,
-            "rename_column": 2,
-            "row_count": 3,
-            "split_column": 4,
-            "group_data": 5,
-            "sort_data": 6,
-            "drop_columns": 7,
-            "fill_missing_values": 8,
-            "drop_duplicates": 9,
-            "drop_na": 10,
-            "calculate_column": 11
-        }
-
-        for k, v in options.items():
-            print(f"filter type '{k}' is query_type argument {v}")
-
-    def query_task(self, q_type: int) -> tuple:
-        """
-        main function to create random input and output tables
-        :param q_type: int defining which pre defined filter type will be created (0 - 11) for more information call options
-        :return: tuple with lists of records for input, output
-        """
-        return self.query_type[q_type]()
-
-
-qt = QueryTable()
-i, o = qt.query_task(0)
-print(i)
-
-print(o)
\ No newline at end of file
+    def chain_weights(cls, mix=None) -> dict:
+        """
+        :param mix: dict with query type as key and weight as value or list of query types, None for all query types
+        :return: dict with the query types of positive weight as key and weight as value
+        """
+        if mix is None:
+            mix = range(12)
+        weights = {int(k): float(v) for k, v in mix.items()} if isinstance(mix, dict) else dict.fromkeys(mix, 1.0)
+        weights = {q_type: weight for q_type, weight in weights.items() if weight > 0}
+
+        if not weights or any(q_type not in STEPS for q_type in weights):
+            raise ValueError("the step mix needs at least one positive weight and only query types 0 - 11")
+        return weights
+
+    def step(self, tables: tuple, path: tuple, seed: int, rows: int, columns: int) -> tuple:
+        """
+        applies the last query type of a path to the output table of its prefix and memoizes the new node
+        :param tables: tuple with the input table and the output table of the prefix
+        :param path: tuple with the query types of the prefix and the applied query type
+        :return: tuple with the input table and the new output table
+        """
+        input_table, output_table = tables
+        q_type = path[-1]
+        if not applicable(q_type, output_table):
+            raise ValueError(f"query_type {q_type} can not be applied to the output of the chain {list(path[:-1])}")
+
+        # every step is seeded by its path, so a node has the same tables whichever chain computed it first
+        with self.seed_lock:
+            random.seed(f"{seed}:{rows}:{columns}:{path}")
+            node = input_table, STEPS[q_type][0](output_table, self.data_generator)
+
+        self.graph.put((seed, rows, columns, path), node)
+        return node
+
+    def chain(self, q_types: list, seed: int, rows: int = 5, columns: int = 0) -> tuple:
+        """
+        applies an explicit chain of query types, every step transforms the output table of the previous step. Only the
+        steps after the longest memoized prefix are computed.
+        :param q_types: list of query types, the first one creates the task the further ones are applied to
+        :param seed: int between 0 and 2**32 - 1, the same seed and chain always create the same tables
+        :param rows: amount of rows of the input table, at least 5
+        :param columns: amount of additional input columns, repeating the column types of the first query type
+        :return: tuple with the input table and the output table of the last step
+        """
+
+        q_types = tuple(q_types)
+        length, node = self.graph.longest_prefix(seed, rows, columns, q_types)
+        if node is None:
+            node = self.tables(q_types[0], seed=seed, rows=rows, columns=columns)
+            self.graph.put((seed, rows, columns, q_types[:1]), node)
+            length = 1
+
+        for position in range(length, len(q_types)):
+            node = self.step(node, q_types[:position + 1], seed, rows, columns)
+        return node
+
+    def chained(self, q_type: int, seed: int = None, rows: int = 5, columns: int = 0, steps: int = 2,
+                mix=None) -> tuple:
+        """
+        creates a chained task, the task of the query type followed by further steps drawn from the mix. Every step is
+        drawn from the query types applicable to the output of the previous step, the chain ends early once none is.
+        :param q_type: int defining the first step (0 - 11)
+        :param seed: int between 0 and 2**32 - 1, the same seed, q_type, rows, columns, steps and mix always create the
+        same chain. Without a seed a new seed is drawn.
+        :param rows: amount of rows of the input table, at least 5
+        :param columns: amount of additional input columns, repeating the column types of the first query type
+        :param steps: maximum amount of steps including the first one
+        :param mix: dict with query type as key and weight as value or list of query types for the further steps, all
+        query types by default
+        :return: tuple with the input table, the output table of the last step and the list of applied query types
+        """
+
+        weights = self.chain_weights(mix)
+        if seed is None:
+            seed = self.new_seed()
+
+        path = (q_type,)
+        node = self.graph.get((seed, rows, columns, path))
+        if node is None:
+            node = self.tables(q_type, seed=seed, rows=rows, columns=columns)
+            self.graph.put((seed, rows, columns, path), node)
+
+        # the steps are drawn from a generator of their own, the tables do not depend on the drawn steps
+        rng = random.Random(f"{seed}:{rows}:{columns}:{q_type}:{sorted(weights.items())}")
+        while len(path) < steps:
+            candidates = [x for x in sorted(weights) if applicable(x, node[1])]
+            if not candidates:
+                break
+            path += (rng.choices(candidates, weights=[weights[x] for x in candidates])[0],)
+            node = self.graph.get((seed, rows, columns, path)) or self.step(node, path, seed, rows, columns)
+
+        return node[0], node[1], list(path)
@@ -0,0 +1,457 @@
+# import standard modules
+import os
+import sys
+import json
+import math
+import mmap
+import time
+import random
+import string
+import struct
+import pathlib
+import hashlib
+import argparse
+import tempfile
+import threading
+import importlib.util
+import importlib.metadata
+import importlib.resources
+from collections.abc import Sequence
+
+# import third party modules
+import numpy as np
+
+
+# file layout: magic, length of the json header, json header with the position of every word list and per word list
+# the offsets of its words followed by the words
+MAGIC = b"QCVOCAB2"
+HEADER = struct.Struct("<8sI")
+OFFSET = struct.Struct("<I")
+BOUNDS = struct.Struct("<II")
+
+# every word carries a one letter type prefix, so the lists keep the exact values of DataSetGenerator
+NAN = "n"
+
+
+def package_files(package: str):
+    """
+    :param package: name of the package
+    :return: traversable of the files of the package - importlib.resources.files, a path on python 3.8
+    """
+    try:
+        return importlib.resources.files(package)
+    except AttributeError:
+        return pathlib.Path(importlib.util.find_spec(package).submodule_search_locations[0])
+
+
+def source_hash() -> str:
+    """
+    :return: hash of the randomtables vocabulary files and generator, it is only computed to compile the vocabulary
+    """
+    files = package_files("randomtables")
+    digest = hashlib.sha256()
+    for file in sorted(files.joinpath("data").iterdir(), key=lambda file: file.name):
+        if file.name.endswith(".csv"):
+            digest.update(file.name.encode("utf-8"))
+            digest.update(file.read_bytes())
+    digest.update(files.joinpath("generator.py").read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def source_version() -> str:
+    """
+    :return: installed version of randomtables, the compiled vocabulary holds the version it was compiled from. Without
+    package metadata the source hash stands in for the version.
+    """
+    try:
+        return importlib.metadata.version("random-tables")
+    except importlib.metadata.PackageNotFoundError:
+        return f"source-{source_hash()}"
+
+
+def default_path() -> str:
+    """
+    :return: path of the compiled vocabulary - VOCABULARY_PATH or a file per randomtables version in the temp folder
+    """
+    return os.getenv("VOCABULARY_PATH") or os.path.join(
+        tempfile.gettempdir(), f"querycollect-vocabulary-{source_version()}.bin"
+    )
+
+
+def encode_word(word) -> str:
+    if isinstance(word, str):
+        if "\n" in word:
+            raise ValueError(f"vocabulary word {word!r} holds a line break")
+        return "s" + word
+    if isinstance(word, float) and math.isnan(word):
+        return NAN
+    if isinstance(word, bool):
+        raise ValueError(f"unsupported vocabulary word {word!r}")
+    if isinstance(word, int):
+        return f"i{word}"
+    if isinstance(word, float):
+        return f"f{word!r}"
+    raise ValueError(f"unsupported vocabulary word {word!r}")
+
+
+def decode_word(word: str):
+    kind, value = word[:1], word[1:]
+    if kind == "s":
+        return value
+    if kind == "i":
+        return int(value)
+    if kind == "f":
+        return float(value)
+    return math.nan
+
+
+def compile_vocabulary(path: str = None) -> str:
+    """
+    loads the word lists of a DataSetGenerator once and writes them into a compact read only file. The file is written
+    to a temporary file first and renamed, so concurrently starting processes never map a half written file.
+    :param path: path of the compiled file, defaults to default_path()
+    :return: path of the compiled file
+    """
+    # randomtables loads pandas, it is only imported to compile the file
+    from randomtables import DataSetGenerator
+
+    path = path or default_path()
+    generator = DataSetGenerator()
+
+    # every list attribute and every list in a dict attribute is stored, e.g. word_map and dtypes["<class 'int'>"]
+    lists = list()
+    for attribute, value in vars(generator).items():
+        if isinstance(value, list):
+            lists.append(([attribute], value))
+        elif isinstance(value, dict) and all(isinstance(words, list) for words in value.values()):
+            lists.extend(([attribute, key], words) for key, words in value.items())
+
+    # the offsets of the words of a list are stored in front of them, so a word is read without decoding the list
+    data, entries = bytearray(), list()
+    for key, words in lists:
+        encoded = [encode_word(word).encode("utf-8") for word in words]
+        offsets = [0]
+        for word in encoded:
+            offsets.append(offsets[-1] + len(word))
+
+        entries.append({"key": key, "offset": len(data), "size": len(words)})
+        data += b"".join(OFFSET.pack(offset) for offset in offsets)
+        data += b"".join(encoded)
+
+    header = {"randomtables": source_version(), "source": source_hash(), "lists": entries}
+    header = json.dumps(header, separators=(",", ":")).encode("utf-8")
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, part = tempfile.mkstemp(dir=directory, suffix=".part")
+    with os.fdopen(fd, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(header)))
+        file.write(header)
+        file.write(data)
+    os.chmod(part, 0o444)
+    os.replace(part, path)
+    return path
+
+
+class MappedWords(Sequence):
+    """
+    read only word list of a compiled vocabulary. A word is decoded from the mapped file when it is drawn, so the list
+    itself lives in the page cache shared by all processes mapping the file. random.choice and random.choices draw the
+    same words as from the decoded list.
+    """
+
+    __slots__ = ("_map", "_offsets", "_start", "_size")
+
+    def __init__(self, mapped, offset: int, size: int):
+        """
+        :param mapped: mmap of the compiled vocabulary
+        :param offset: position of the offsets of the words in the file
+        :param size: amount of words
+        """
+        self._map = mapped
+        self._offsets = offset
+        self._start = offset + OFFSET.size * (size + 1)
+        self._size = size
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[ix] for ix in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("word index out of range")
+
+        start, end = BOUNDS.unpack_from(self._map, self._offsets + OFFSET.size * index)
+        return decode_word(self._map[self._start + start:self._start + end].decode("utf-8"))
+
+    def __add__(self, other):
+        return WordChain([self, other])
+
+    def __radd__(self, other):
+        return WordChain([other, self])
+
+
+class WordChain(Sequence):
+    """
+    concatenation of word lists without copying them, e.g. the word_map + numbers of DataSetGenerator
+    """
+
+    __slots__ = ("parts",)
+
+    def __init__(self, parts: list):
+        self.parts = parts
+
+    def __len__(self):
+        return sum(len(part) for part in self.parts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[ix] for ix in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        for part in self.parts:
+            if 0 <= index < len(part):
+                return part[index]
+            index -= len(part)
+        raise IndexError("word index out of range")
+
+    def __add__(self, other):
+        return WordChain(self.parts + [other])
+
+    def __radd__(self, other):
+        return WordChain([other] + self.parts)
+
+
+class WordGenerator:
+    """
+    the column name and column value functions of DataSetGenerator on the word lists of a compiled vocabulary. Every
+    function makes the same random calls as the one of randomtables, so a seed creates the same values, but the module
+    of randomtables and with it pandas is not imported.
+
+    -- create the values of a splittable string column with five rows:
+        generator = load_vocabulary().generator()
+        generator.generate_string_column(5, split=True)
+    """
+
+    def __init__(self, attributes: dict):
+        """
+        :param attributes: word lists by attribute name of DataSetGenerator e.g. word_map, names, dtypes
+        """
+        self.__dict__.update(attributes)
+
+    @classmethod
+    def word_style(cls, word: str, style: int) -> str:
+        if style == 0:
+            return word
+        elif style == 1:
+            return word.lower()
+        elif style == 2:
+            return word.upper()
+
+    def column_name_clean(self, column_name: str, d_type: str, names: bool = False) -> str:
+        """
+        :return: the column name without leading digits or a new column name in case nothing is left
+        """
+        while column_name and column_name[0].isnumeric():
+            column_name = column_name[1:]
+        return column_name or self.column_name_generator(d_type, names=names)
+
+    def column_name_generator(self, d_type: str, names: bool = False) -> str:
+        """
+        :param d_type: data type of the column e.g. <class 'str'>
+        :param names: indicator whether the column holds names
+        :return: random column name
+        """
+        concat_style = random.choice(["_", ""])
+        column_length = random.choice(list(range(1, 2)))
+
+        if names:
+            words = [random.choice(self.word_map) + random.choice(self.name_column_word_map)]
+        else:
+            words = random.choices(self.word_map + self.numbers, k=column_length)
+
+        column_name = concat_style.join(self.word_style(str(word), random.choice([0, 1, 2])) for word in words)
+        return self.column_name_clean(column_name, d_type=d_type, names=names)
+
+    @classmethod
+    def get_random_strings(cls, size: int = 5, split: bool = False) -> list:
+        """
+        :return: list of random letter strings, with split two parts joined by the same punctuation symbol
+        """
+        sections = 2 if split is True else 1
+        letters = list(string.ascii_letters)
+        concat_value = random.choice(string.punctuation)
+
+        return [
+            concat_value.join("".join(random.choices(letters, k=random.choice([2, 3, 4]))) for _ in range(sections))
+            for _ in range(size)
+        ]
+
+    def get_name_strings(self, size: int = 5, split: bool = False) -> list:
+        """
+        :return: list of names, with split two or three names joined by the same punctuation symbol
+        """
+        sections = random.choice([2, 3]) if split else 1
+        concat_value = random.choice(string.punctuation) if split else " "
+        return [concat_value.join(random.choices(self.names, k=sections)) for _ in range(size)]
+
+    def generate_string_column(self, size: int, split: bool = False, names: bool = False,
+                               duplicates: bool = True) -> list:
+        """
+        :param size: amount of values
+        :param split: indicator whether the values can be split by a punctuation symbol
+        :param names: indicator whether the values are names
+        :param duplicates: indicator whether one value is copied to one or two other positions
+        :return: list of string values
+        """
+        values = self.get_name_strings(size=size, split=split) if names else self.get_random_strings(size, split)
+
+        if duplicates:
+            indexes = list(range(size))
+            to_copy_index = random.choice(indexes)
+            indexes.remove(to_copy_index)
+            for ix in random.choices(indexes, k=random.choice([1, 2])):
+                values[ix] = values[to_copy_index]
+
+        return values
+
+    @classmethod
+    def generate_int_column(cls, size: int, *args, **kwargs) -> np.ndarray:
+        return np.random.randint(100, size=size)
+
+    @classmethod
+    def generate_float_column(cls, size: int, *args, **kwargs) -> np.ndarray:
+        return np.round(np.random.randn(size), 2)
+
+
+class Vocabulary:
+    """
+    read only view on a compiled vocabulary file. The file is memory mapped and the word lists of a generator read their
+    words from the mapped pages, so all worker processes share the same pages of the page cache instead of holding
+    decoded copies.
+
+    -- map the compiled vocabulary and get a word list:
+        vocabulary = Vocabulary(compile_vocabulary())
+        vocabulary.words(["word_map"])
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: path of a file written by compile_vocabulary
+        """
+        self.path = path
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, length = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is no compiled vocabulary")
+
+        header = json.loads(self._map[HEADER.size:HEADER.size + length].decode("utf-8"))
+        self.version = header["randomtables"]
+        self.source = header["source"]
+        self.start = HEADER.size + length
+        self.entries = {tuple(entry["key"]): entry for entry in header["lists"]}
+
+    def mapped(self, key: list) -> MappedWords:
+        """
+        :param key: attribute name or attribute name and dict key of the word list e.g. ["dtypes", "<class 'int'>"]
+        :return: word list reading its words from the mapped file
+        """
+        entry = self.entries[tuple(key)]
+        return MappedWords(self._map, self.start + entry["offset"], entry["size"])
+
+    def words(self, key: list) -> list:
+        """
+        :param key: attribute name or attribute name and dict key of the word list e.g. ["dtypes", "<class 'int'>"]
+        :return: new list with the decoded words
+        """
+        return list(self.mapped(key))
+
+    def generator(self) -> WordGenerator:
+        """
+        :return: WordGenerator whose word lists read from the mapped file, randomtables is not imported. The generator
+        needs the vocabulary to stay open.
+        """
+        attributes = dict()
+        for key in self.entries:
+            if len(key) == 1:
+                attributes[key[0]] = self.mapped(key)
+            else:
+                attributes.setdefault(key[0], dict())[key[1]] = self.mapped(key)
+
+        return WordGenerator(attributes)
+
+    def close(self) -> None:
+        self._map.close()
+
+
+def load_vocabulary(path: str = None) -> Vocabulary:
+    """
+    maps the compiled vocabulary and compiles it first in case the file is missing or was compiled from another
+    randomtables version. The version is compared, the sources are only read to compile the file.
+    :param path: path of the compiled file, defaults to default_path()
+    :return: Vocabulary
+    """
+    path = path or default_path()
+
+    try:
+        vocabulary = Vocabulary(path)
+        if vocabulary.version == source_version():
+            return vocabulary
+        vocabulary.close()
+    except (OSError, ValueError, KeyError):
+        pass
+
+    return Vocabulary(compile_vocabulary(path))
+
+
+# one generator per process, the generator only reads its word lists, so all engines and threads can share it
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def shared_generator() -> WordGenerator:
+    """
+    :return: the generator of this process, created from the memory mapped vocabulary on first use
+    """
+    global _generator
+
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                try:
+                    _generator = load_vocabulary().generator()
+                except OSError as exc:
+                    # e.g. a read only temp folder, the generator of randomtables loads the csv files itself
+                    print(exc)
+                    from randomtables import DataSetGenerator
+                    _generator = DataSetGenerator()
+
+    return _generator
+
+
+def main(argv=None) -> int:
+    """
+    command line entry point - python -m generators.vocabulary --output /app/vocabulary.bin
+    """
+
+    parser = argparse.ArgumentParser(description="compile the generator vocabulary into a memory mappable file")
+    parser.add_argument("--output", help="path of the compiled file, defaults to VOCABULARY_PATH or the temp folder")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    path = compile_vocabulary(args.output)
+    duration = time.perf_counter() - start
+
+    vocabulary = Vocabulary(path)
+    words = sum(entry["size"] for entry in vocabulary.entries.values())
+    print(f"compiled {words} words into {path} ({os.path.getsize(path)} bytes) in {duration * 1000:.1f}ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,219 @@
+# import standard modules
+import time
+import math
+import hashlib
+import threading
+import functools
+from collections import OrderedDict
+
+# import third party modules
+from flask import Response, jsonify, request
+
+# import project related modules
+from metrics import admissions
+
+
+class TokenBucket:
+    """
+    token bucket per client, every client may submit burst queries at once and rate queries per second afterwards.
+    The buckets of the least recently seen clients are dropped once more than max_clients are tracked.
+    """
+
+    def __init__(self, rate: float, burst: int, max_clients: int = 10000):
+        """
+        :param rate: tokens added per second
+        :param burst: maximum amount of tokens of a bucket
+        :param max_clients: maximum amount of tracked clients
+        """
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_clients = max_clients
+        self.buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, client: str, amount: int = 1) -> float:
+        """
+        takes tokens from the bucket of a client
+        :param client: client key e.g. the remote address
+        :param amount: amount of tokens, a request with more tokens than the burst is treated like a full burst
+        :return: 0 in case the tokens were taken, otherwise the seconds until enough tokens are available
+        """
+        amount = min(amount, self.burst)
+        now = time.monotonic()
+
+        with self._lock:
+            tokens, last = self.buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+
+            wait = 0.0
+            if tokens >= amount:
+                tokens -= amount
+            else:
+                wait = (amount - tokens) / self.rate if self.rate > 0 else math.inf
+
+            self.buckets[client] = (tokens, now)
+            while len(self.buckets) > self.max_clients:
+                self.buckets.popitem(last=False)
+
+        return wait
+
+
+class RecentSubmissions:
+    """
+    remembers the fingerprints of recently submitted queries for a time window, so a rapid resubmission of the same
+    text for the same task is recognized before it is queued
+    """
+
+    def __init__(self, window: float = 10.0, max_entries: int = 10000):
+        """
+        :param window: seconds a submission is remembered
+        :param max_entries: maximum amount of remembered submissions
+        """
+        self.window = window
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def fingerprint(cls, client: str, query_type, seed, text: str) -> str:
+        # whitespace and case differences of a double click or a resend do not make a new query
+        normalized = " ".join(str(text or "").split()).lower()
+        return hashlib.blake2b(f"{client}\x1f{query_type}\x1f{seed}\x1f{normalized}".encode("utf-8"),
+                               digest_size=16).hexdigest()
+
+    def seen(self, key: str) -> bool:
+        """
+        :param key: fingerprint of a submission
+        :return: True in case the same submission was seen within the window, otherwise it is remembered
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            # entries are ordered by time, so expired entries are at the front
+            while self.entries:
+                seen_at = next(iter(self.entries.values()))
+                if now - seen_at <= self.window and len(self.entries) < self.max_entries:
+                    break
+                self.entries.popitem(last=False)
+
+            if key in self.entries:
+                return True
+
+            self.entries[key] = now
+            return False
+
+
+class AdmissionControl:
+    """
+    class guards the submission views against bursts. A client exceeding its token bucket gets 429, a submission
+    arriving while the in flight limit or the write queue limit is reached gets 503, both with a Retry-After header.
+    Every outcome is counted in querycollect_admission_total.
+
+    -- guard a view, a batch costs one token per query:
+        admission = AdmissionControl(rate=1.0, burst=10, max_in_flight=15, queue_depth=lambda: len(writer.queue))
+
+        @admission.guard("api_queries", cost=lambda: len(request.get_json()["queries"]))
+        def api_queries():
+            ...
+
+    -- drop a rapid resubmission of the same query within a view:
+        if admission.duplicate(query_type, seed, text):
+            admissions.inc(route="add_query", outcome="coalesced")
+    """
+
+    def __init__(self, rate: float = 1.0, burst: int = 10, max_in_flight: int = 15, queue_depth=None,
+                 max_queue_depth: int = 1000, dedup_window: float = 10.0, max_clients: int = 10000,
+                 client_header: str = None, enabled: bool = True):
+        """
+        :param rate: submissions per second a client may send on average
+        :param burst: submissions a client may send at once
+        :param max_in_flight: maximum amount of concurrently handled submission requests
+        :param queue_depth: function returning the amount of submissions waiting for the database
+        :param max_queue_depth: submissions are rejected while this amount of submissions waits for the database
+        :param dedup_window: seconds an identical submission of the same client is treated as a resubmission
+        :param max_clients: maximum amount of clients with a tracked token bucket
+        :param client_header: header of a trusted proxy holding the client address e.g. X-Forwarded-For, None uses the
+        address of the connection
+        :param enabled: indicator whether submissions are checked at all
+        """
+        self.enabled = enabled
+        self.bucket = TokenBucket(rate, burst, max_clients=max_clients)
+        self.recent = RecentSubmissions(dedup_window, max_entries=max_clients)
+        self.max_in_flight = max(max_in_flight, 1)
+        self.queue_depth = queue_depth
+        self.max_queue_depth = max_queue_depth
+        self.client_header = client_header
+
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+
+    def client(self) -> str:
+        """
+        :return: key of the client of the current request
+        """
+        if self.client_header:
+            # the proxy appends the address it saw, the first entry is the address of the client
+            value = request.headers.get(self.client_header, "").split(",")[0].strip()
+            if value:
+                return value
+        return request.remote_addr or "unknown"
+
+    @classmethod
+    def reject(cls, status: int, message: str, retry_after: float):
+        """
+        :return: response explaining the rejection, json for json requests and plain text for form posts
+        """
+        headers = {"Retry-After": str(max(1, math.ceil(min(retry_after, 3600))))}
+        if request.is_json:
+            response = jsonify(error=message)
+            response.status_code = status
+            response.headers.extend(headers)
+            return response
+        return Response(message, status=status, mimetype="text/plain", headers=headers)
+
+    def guard(self, route: str, cost=None):
+        """
+        decorator admitting a request to a submission view
+        :param route: route name used for the counters
+        :param cost: function returning the amount of submissions of the current request, defaults to one
+        """
+
+        def decorator(view):
+
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return view(*args, **kwargs)
+
+                # an overloaded service sheds the request before the tokens of the client are taken
+                if self.queue_depth is not None and self.queue_depth() >= self.max_queue_depth:
+                    admissions.inc(route=route, outcome="shed")
+                    return self.reject(503, "the service is busy, please try again", 5)
+
+                if not self._slots.acquire(blocking=False):
+                    admissions.inc(route=route, outcome="shed")
+                    return self.reject(503, "the service is busy, please try again", 1)
+
+                try:
+                    wait = self.bucket.take(self.client(), cost() if cost is not None else 1)
+                    if wait:
+                        admissions.inc(route=route, outcome="rate_limited")
+                        return self.reject(429, "too many submissions, please slow down", wait)
+
+                    response = view(*args, **kwargs)
+                finally:
+                    self._slots.release()
+
+                admissions.inc(route=route, outcome="admitted")
+                return response
+
+            return wrapper
+
+        return decorator
+
+    def duplicate(self, query_type, seed, text: str) -> bool:
+        """
+        :return: True in case the client sent the same query for the same task within the deduplication window
+        """
+        if not self.enabled:
+            return False
+        return self.recent.seen(RecentSubmissions.fingerprint(self.client(), query_type, seed, text))
@@ -1,13 +1,75 @@
-from settings import app
-from views import index, add_query, skip
+# import third party modules
+import click
+from flask import Flask
 
-# set urls
-app.add_url_rule('/', 'index', index, methods=["GET"])
-app.add_url_rule('/add_query', 'add_query', add_query, methods=["POST"])
-app.add_url_rule('/skip', 'skip', skip, methods=["GET"])
+# import project related modules
+from settings import configure
+from models import db
+from database import MIGRATIONS
+from services import Services
+from views import index, add_query, skip, metrics, api_tasks, api_queries
+from metrics import instrument
+from assets import Assets, compress
+from export import export_command, dedup_command, fingerprint_command
+from profiling import profile_report_command
+
+
+def create_app(config: dict = None) -> Flask:
+    """
+    application factory - creates an app instance without touching the database or the task generators, which are set
+    up with the first request or the warm up of a gunicorn worker - see Services
+        gunicorn --chdir server "app:create_app()"
+        flask run  - finds the factory in app.py
+    :param config: dict with configurations taking precedence over the environment and the .env file
+    :return: flask app instance
+    """
+
+    # create a app instance
+    app = Flask(__name__)
+    configure(app, config)
+
+    # set up data base for the app instance, the first connection is opened by the first query
+    db.init_app(app)
+
+    # the migrations import alembic, they are only set up for the flask command line e.g. flask db upgrade
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+        Migrate(app, db, directory=MIGRATIONS)
+
+    # set up the components of the app instance - task pool, scheduler, write behind queue and admission control
+    services = Services(app)
+    app.extensions["querycollect"] = services
+
+    # set urls
+    app.add_url_rule('/', 'index', index, methods=["GET"])
+    app.add_url_rule('/add_query', 'add_query', add_query, methods=["POST"])
+    app.add_url_rule('/skip', 'skip', skip, methods=["GET", "POST"])
+    app.add_url_rule('/metrics', 'metrics', metrics, methods=["GET"])
+    app.add_url_rule('/api/tasks', 'api_tasks', api_tasks, methods=["GET"])
+    app.add_url_rule('/api/queries', 'api_queries', api_queries, methods=["POST"])
+
+    # serve fingerprinted static files and compress dynamic responses
+    Assets(app, max_age=app.config['ASSET_MAX_AGE'])
+    compress(app, min_size=app.config['COMPRESS_MIN_SIZE'], level=app.config['COMPRESS_LEVEL'])
+
+    # measure latency and errors of every request
+    instrument(app)
+
+    # profile sampled requests and requests carrying the profiling token
+    services.profiler.instrument(app)
+
+    # start the components with the first request, its latency includes the start
+    app.before_request(services.start)
+
+    # set cli commands
+    app.cli.add_command(export_command)
+    app.cli.add_command(dedup_command)
+    app.cli.add_command(fingerprint_command)
+    app.cli.add_command(profile_report_command)
+
+    return app
 
 
 # run app
 if __name__ == '__main__':
-    # db.create_all()                              # create a new database at launch
-    app.run(host='0.0.0.0', port=8080, debug=False)
\ No newline at end of file
+    create_app().run(host='0.0.0.0', port=8080, debug=False)
@@ -0,0 +1,195 @@
+# import standard modules
+import os
+import re
+import gzip
+import json
+import hashlib
+import mimetypes
+import threading
+
+# import third party modules
+from flask import Response, current_app, render_template, request
+from markupsafe import Markup, escape
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+
+class Asset:
+    """
+    content of a static file kept in memory together with its gzip compressed version and its fingerprint
+    """
+
+    __slots__ = ("data", "gzip", "mimetype", "fingerprint")
+
+    def __init__(self, data: bytes, mimetype: str, level: int = 9):
+        self.data = data
+        self.mimetype = mimetype
+        self.fingerprint = hashlib.sha256(data).hexdigest()[:12]
+
+        # images are already compressed, gzip is only kept if it saves something
+        compressed = gzip.compress(data, compresslevel=level, mtime=0)
+        self.gzip = compressed if len(compressed) < len(data) else None
+
+
+class Assets:
+    """
+    class serves the files of the static folder under a url holding a fingerprint of their content. The fingerprint
+    changes with every change of a file, so the files can be cached by the browser for a long time.
+
+    -- register the asset route and the template helper:
+        assets = Assets(app, max_age=31536000)
+
+    -- reference a file in a template:
+        <link rel="stylesheet" href="{{ asset('css/querycollect.css') }}">
+    """
+
+    def __init__(self, app, url_prefix: str = "/assets", max_age: int = 31536000):
+        """
+        :param app: flask app instance with a static folder
+        :param url_prefix: url path the fingerprinted files are served under
+        :param max_age: seconds a browser may cache a fingerprinted file
+        """
+        self.app = app
+        self.url_prefix = url_prefix.rstrip("/")
+        self.max_age = max_age
+        self.files = dict()
+        self._lock = threading.Lock()
+
+        app.add_url_rule(f"{self.url_prefix}/<fingerprint>/<path:filename>", "assets", self.serve, methods=["GET"])
+        app.jinja_env.globals["asset"] = self.url
+
+    def load(self, filename: str) -> Asset:
+        """
+        reads a static file once, changed files are only picked up again in debug mode
+        :param filename: path of the file relative to the static folder
+        :return: Asset of the file
+        """
+        asset = self.files.get(filename)
+        if asset is not None and not self.app.debug:
+            return asset
+
+        path = safe_join(self.app.static_folder, filename)
+        if path is None or not os.path.isfile(path):
+            raise NotFound()
+
+        with open(path, "rb") as file:
+            data = file.read()
+
+        asset = Asset(data, mimetypes.guess_type(path)[0] or "application/octet-stream")
+        with self._lock:
+            self.files[filename] = asset
+        return asset
+
+    def url(self, filename: str) -> str:
+        """
+        :param filename: path of the file relative to the static folder
+        :return: url of the file including the fingerprint of its content
+        """
+        return f"{self.url_prefix}/{self.load(filename).fingerprint}/{filename}"
+
+    def serve(self, fingerprint: str, filename: str) -> Response:
+        """
+        view returning a static file, gzip compressed if the client accepts it. A request with an outdated
+        fingerprint gets the current file, but without the long cache lifetime.
+        """
+        asset = self.load(filename)
+        compressed = asset.gzip is not None and request.accept_encodings["gzip"] > 0
+
+        response = Response(asset.gzip if compressed else asset.data, mimetype=asset.mimetype)
+        response.vary.add("Accept-Encoding")
+        response.set_etag(f"{asset.fingerprint}-gzip" if compressed else asset.fingerprint)
+        if compressed:
+            response.headers["Content-Encoding"] = "gzip"
+
+        if fingerprint == asset.fingerprint:
+            response.headers["Cache-Control"] = f"public, max-age={self.max_age}, immutable"
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+
+        return response.make_conditional(request)
+
+
+class PageShell:
+    """
+    class renders a template once with placeholders for the data of a request and keeps the html around them. A request
+    only serializes its own data into the cached shell instead of rendering the whole template. Fields are single
+    values inserted html escaped, e.g. the values of hidden form inputs, so the forms work without the page script.
+
+    -- render the index page with the task of a request:
+        shell = PageShell("base.html", name="task", fields=("query_type", "seed", "streak"))
+        html = shell.render({"query_type": 3, "seed": 42, ...}, query_type=3, seed=42, streak=0)
+    """
+
+    placeholder = "__PAGE_SHELL_{}__"
+
+    def __init__(self, template: str, name: str = "data", fields: tuple = ()):
+        """
+        :param template: name of the template
+        :param name: template variable the json of a request is inserted for
+        :param fields: template variables a single value of a request is inserted for
+        """
+        self.template = template
+        self.name = name
+        self.fields = tuple(fields)
+        self._parts = None
+
+    def render(self, data: dict, **values) -> str:
+        """
+        :param data: json serializable dict inserted into the shell
+        :param values: values of the fields, missing fields are left empty
+        :return: html of the page
+        """
+        slots = {self.placeholder.format(slot.upper()): slot for slot in (self.name,) + self.fields}
+
+        if self._parts is None or current_app.debug:
+            html = render_template(self.template, **{slot: Markup(key) for key, slot in slots.items()})
+            self._parts = re.split("(" + "|".join(map(re.escape, slots)) + ")", html)
+
+        html = list()
+        for part in self._parts:
+            slot = slots.get(part)
+            if slot is None:
+                html.append(part)
+            elif slot == self.name:
+                html.append(script_json(data))
+            else:
+                html.append(str(escape(values.get(slot, ""))))
+        return "".join(html)
+
+
+def script_json(data) -> str:
+    """
+    :param data: json serializable object
+    :return: json which can be embedded into a html script tag
+    """
+    return (json.dumps(data, separators=(",", ":"))
+            .replace("<", "\\u003c")
+            .replace(">", "\\u003e")
+            .replace("&", "\\u0026")
+            .replace("'", "\\u0027"))
+
+
+def compress(app, min_size: int = 500, level: int = 6) -> None:
+    """
+    registers a hook compressing dynamic text responses with gzip for clients accepting it
+    :param app: flask app instance
+    :param min_size: responses smaller than this amount of bytes are sent uncompressed
+    :param level: gzip compression level (1 - 9)
+    """
+    compressible = ("text/", "application/json", "application/javascript")
+
+    @app.after_request
+    def gzip_response(response):
+        response.vary.add("Accept-Encoding")
+
+        if (response.direct_passthrough or response.status_code != 200 or "Content-Encoding" in response.headers
+                or not (response.mimetype or "").startswith(compressible) or request.accept_encodings["gzip"] <= 0):
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        response.set_data(gzip.compress(data, compresslevel=level))
+        response.headers["Content-Encoding"] = "gzip"
+        return response
@@ -0,0 +1,184 @@
+# import standard modules
+import os
+import time
+import weakref
+import threading
+
+# import third party modules
+from flask_sqlalchemy import SQLAlchemy, _EngineConnector
+from sqlalchemy import inspect
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool, QueuePool, StaticPool
+
+# import project related modules
+from metrics import registry, Counter, Gauge, Histogram
+
+
+# bind key of the read database, heavy reads like exports, dedup passes and the counts of the scheduler use it
+READ_BIND = "read"
+
+# folder of the data base migrations
+MIGRATIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool measuring the time every checkout waits for a connection. The pools of all engines of the process are
+    kept, so the gauges of the metrics endpoint can report the connections in use per bind.
+    """
+
+    bind = "write"
+    pools = weakref.WeakSet()
+    _lock = threading.Lock()
+
+    def __init__(self, creator, pool_size: int = 5, max_overflow: int = 10, **kwargs):
+        super().__init__(creator, pool_size=pool_size, max_overflow=max_overflow, **kwargs)
+        self.capacity = pool_size + max(max_overflow, 0)
+        with TimedQueuePool._lock:
+            TimedQueuePool.pools.add(self)
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_timeouts.inc(bind=self.bind)
+            raise
+        finally:
+            pool_checkout.observe(time.perf_counter() - start, bind=self.bind)
+
+    @classmethod
+    def samples(cls, measure) -> dict:
+        """
+        :param measure: function returning the value of a pool
+        :return: dict with the bind as key and the summed values of its pools as value
+        """
+        with TimedQueuePool._lock:
+            pools = list(TimedQueuePool.pools)
+
+        samples = dict()
+        for pool in pools:
+            samples[(pool.bind,)] = samples.get((pool.bind,), 0) + measure(pool)
+        return samples
+
+
+class WritePool(TimedQueuePool):
+    bind = "write"
+
+
+class ReadPool(TimedQueuePool):
+    bind = "read"
+
+
+def pool_options(config, bind: str, sa_url, options: dict) -> dict:
+    """
+    applies the pool settings of a bind to the engine options - see the DB_ and DB_READ_ settings
+    :param config: app configurations
+    :param bind: bind key, None for the default bind used by the inserts
+    :param sa_url: database url of the bind
+    :param options: engine options set by flask_sqlalchemy
+    :return: the engine options
+    """
+
+    # an in memory sqlite database only exists within its single connection
+    if options.get("poolclass") is StaticPool:
+        return options
+
+    prefix = "DB_READ_" if bind == READ_BIND else "DB_"
+    options.pop("poolclass", None)
+    options["pool_pre_ping"] = config[prefix + "POOL_PRE_PING"]
+
+    if config[prefix + "POOL_SIZE"] <= 0:
+        options["poolclass"] = NullPool
+        return options
+
+    options.update(
+        poolclass=ReadPool if bind == READ_BIND else WritePool,
+        pool_size=config[prefix + "POOL_SIZE"],
+        max_overflow=config[prefix + "MAX_OVERFLOW"],
+        pool_timeout=config[prefix + "POOL_TIMEOUT"],
+        pool_recycle=config[prefix + "POOL_RECYCLE"]
+    )
+
+    # pooled sqlite connections are handed between the request threads and the write behind thread
+    if sa_url.drivername.startswith("sqlite"):
+        options.setdefault("connect_args", dict())["check_same_thread"] = False
+
+    return options
+
+
+class BindConnector(_EngineConnector):
+    """
+    engine connector of flask_sqlalchemy applying the pool settings of its bind
+    """
+
+    def get_options(self, sa_url, echo):
+        sa_url, options = super().get_options(sa_url, echo)
+        return sa_url, pool_options(self._app.config, self._bind, sa_url, options)
+
+
+class Database(SQLAlchemy):
+    """
+    flask_sqlalchemy extension with a connection pool per bind and an optional read bind. The session and with it all
+    inserts use the default bind, heavy reads use the read engine, so they do not compete with the inserts for
+    connections. Without SQLALCHEMY_READ_DATABASE_URI the read engine is the default engine.
+
+    -- stream a table from the read bind:
+        with db.read_engine().connect() as connection:
+            result = connection.execute(statement)
+    """
+
+    def make_connector(self, app=None, bind=None):
+        return BindConnector(self, self.get_app(app), bind)
+
+    def has_read_bind(self, app=None) -> bool:
+        return READ_BIND in (self.get_app(app).config.get('SQLALCHEMY_BINDS') or dict())
+
+    def create_all_stamped(self, app=None) -> None:
+        """
+        creates the missing tables of the default bind. A new database is created at the newest schema, so the newest
+        migration revision is stamped into it and a later flask db upgrade does not apply the migrations again.
+        Existing databases keep their revision, one created before the migrations existed is stamped by hand.
+        :param app: flask app instance, defaults to the current app
+        """
+        engine = self.get_engine(app)
+        new = not inspect(engine).get_table_names()
+        self.create_all(app=app)
+        if not new:
+            return
+
+        # alembic is only imported for a new database
+        from alembic.script import ScriptDirectory
+        from alembic.runtime.migration import MigrationContext
+
+        script = ScriptDirectory(MIGRATIONS)
+        with engine.begin() as connection:
+            context = MigrationContext.configure(connection)
+            if context.get_current_revision() is None:
+                context.stamp(script, script.get_current_head())
+
+    def read_engine(self, app=None):
+        """
+        :param app: flask app instance, defaults to the current app
+        :return: engine of the read bind, the default engine without a read bind
+        """
+        return self.get_engine(app, bind=READ_BIND if self.has_read_bind(app) else None)
+
+
+# expose the connection pools per bind, the saturation is checked_out / capacity
+pool_checkout = registry.register(Histogram(
+    "querycollect_db_pool_checkout_seconds", "time to check out a pooled connection including the wait for a free one",
+    ["bind"], buckets=(.0001, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0, 30.0)
+))
+pool_timeouts = registry.register(Counter(
+    "querycollect_db_pool_timeouts_total", "checkouts which found no free connection within the pool timeout",
+    ["bind"]
+))
+registry.register(Gauge(
+    "querycollect_db_pool_checked_out", "connections in use", ["bind"],
+    callback=lambda: TimedQueuePool.samples(lambda pool: pool.checkedout())
+))
+registry.register(Gauge(
+    "querycollect_db_pool_capacity", "maximum connections, pool size plus overflow", ["bind"],
+    callback=lambda: TimedQueuePool.samples(lambda pool: pool.capacity)
+))
@@ -0,0 +1,335 @@
+# import standard modules
+import os
+import re
+import sqlite3
+import unicodedata
+
+# import third party modules
+import numpy as np
+
+
+# multipliers of the 64 bit mixer spreading the packed bytes of a shingle over all bits - see splitmix64
+MIX = (np.uint64(0xBF58476D1CE4E5B9), np.uint64(0x94D049BB133111EB))
+NULL_QUERY_TYPE = -1
+
+# characters of a query besides letters and digits, which still change its meaning
+PUNCTUATION = re.compile(r"[^\w<>=!%*+/-]+")
+
+
+def normalize(text) -> str:
+    """
+    :param text: free text query
+    :return: text in lower case, with unicode compatibility characters replaced and runs of punctuation and whitespace
+    collapsed into one space, so copies differing in formatting only are equal
+    """
+    text = unicodedata.normalize("NFKC", str(text or "")).casefold()
+    return PUNCTUATION.sub(" ", text).strip()
+
+
+def shingles(texts: list, size: int = 5) -> tuple:
+    """
+    hashes the byte shingles of all normalized texts at once, a text shorter than a shingle is one shingle
+    :param texts: list of free text queries
+    :param size: amount of bytes of a shingle (1 - 8), the bytes of a shingle are packed into one 64 bit integer
+    :return: tuple with an uint32 array of the shingle hashes and an array with the offset of every text in it
+    """
+    encoded = [normalize(text).encode("utf-8") for text in texts]
+    lengths = np.array([len(data) for data in encoded], dtype=np.int64)
+    counts = np.maximum(lengths - size + 1, 1)
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+
+    # the window at every position of the joined texts. The padding keeps the last windows in bounds and gives an empty
+    # text at the end of the chunk a window at its start, which is replaced like the window of every short text.
+    data = np.frombuffer(b"".join(encoded) + bytes(2 * size), dtype=np.uint8).astype(np.uint64)
+    total = len(data) - size
+    windows = np.zeros(total, dtype=np.uint64)
+    for ix in range(size):
+        windows |= data[ix:ix + total] << np.uint64(8 * ix)
+
+    # only windows within one text are shingles, a short or empty text is packed on its own
+    positions = np.repeat(starts, counts) + np.arange(int(counts.sum()), dtype=np.int64) - np.repeat(offsets, counts)
+    values = windows[positions]
+    for ix in np.flatnonzero(lengths < size):
+        values[offsets[ix]] = int.from_bytes(encoded[ix], "little")
+
+    values ^= values >> np.uint64(30)
+    values *= MIX[0]
+    values ^= values >> np.uint64(27)
+    values *= MIX[1]
+    values ^= values >> np.uint64(31)
+    return (values >> np.uint64(32)).astype(np.uint32), offsets
+
+
+class MinHasher:
+    """
+    class creates MinHash signatures of texts. The share of equal signature values of two texts estimates the jaccard
+    similarity of their shingle sets. The signature is split into bands, texts with one equal band are candidates.
+
+    -- signatures and band keys of a chunk of texts:
+        hasher = MinHasher(num_perm=128, bands=16)
+        signatures = hasher.signatures(["select all rows", "Select all rows!"])
+        keys = hasher.band_keys(signatures, groups=[3, 3])
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, shingle_size: int = 5, seed: int = 1,
+                 block_size: int = 1 << 21):
+        """
+        :param num_perm: amount of hash permutations, the length of a signature
+        :param bands: amount of bands, a higher value finds candidates with a lower similarity
+        :param shingle_size: amount of bytes of a shingle (1 - 8)
+        :param seed: seed of the permutations, signatures of different seeds can not be compared
+        :param block_size: maximum amount of permuted hashes held at once while creating signatures
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm {num_perm} is no multiple of bands {bands}")
+        if not 1 <= shingle_size <= 8:
+            raise ValueError(f"shingle_size {shingle_size} is not between 1 and 8")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.block_size = block_size
+
+        # a permutation xors the shingle hash with a mask and multiplies it with an odd number modulo 2^32, both are
+        # bijections of the 32 bit hashes and vectorized by numpy unlike 64 bit multiplications
+        state = np.random.RandomState(seed)
+        self.masks = state.randint(0, 1 << 32, size=(num_perm, 1), dtype=np.uint64).astype(np.uint32)
+        self.factors = (state.randint(0, 1 << 31, size=(num_perm, 1), dtype=np.uint64) * 2 + 1).astype(np.uint32)
+        # odd multipliers combining the values of a band into one 64 bit key, salts of the bands and the groups
+        self.multipliers = state.randint(0, 1 << 62, size=self.rows, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.salts = state.randint(0, 1 << 62, size=bands, dtype=np.uint64) * np.uint64(4)
+        self.group_multiplier = state.randint(0, 1 << 62, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+    def signatures(self, texts: list) -> np.ndarray:
+        """
+        :param texts: list of free text queries
+        :return: uint32 array with one signature per text
+        """
+        values, offsets = shingles(texts, self.shingle_size)
+        ends = np.append(offsets[1:], len(values))
+        signatures = np.empty((len(texts), self.num_perm), dtype=np.uint32)
+
+        # texts are permuted in blocks, so the memory only depends on the block size and not on the chunk size
+        limit = max(self.block_size // self.num_perm, 1)
+        buffer = np.empty(self.num_perm * max(limit, int((ends - offsets).max(initial=1))), dtype=np.uint32)
+        start = 0
+        while start < len(texts):
+            stop = max(int(np.searchsorted(ends, offsets[start] + limit, side="right")), start + 1)
+            block = values[offsets[start]:ends[stop - 1]]
+
+            # the permutations are computed in place, the products overflow on purpose
+            permuted = buffer[:self.num_perm * len(block)].reshape(self.num_perm, len(block))
+            np.bitwise_xor(self.masks, block, out=permuted)
+            permuted *= self.factors
+            signatures[start:stop] = np.minimum.reduceat(permuted, offsets[start:stop] - offsets[start], axis=1).T
+            start = stop
+
+        return signatures
+
+    def band_keys(self, signatures: np.ndarray, groups: list = None) -> np.ndarray:
+        """
+        :param signatures: signatures returned by signatures
+        :param groups: integer group of every signature e.g. the query type, equal bands of different groups get
+        different keys
+        :return: int64 array with one key per signature and band, the keys of different bands differ as well
+        """
+        bands = signatures.astype(np.uint64).reshape(len(signatures), self.bands, self.rows)
+        # the products overflow on purpose, uint64 arithmetic wraps around
+        keys = (bands * self.multipliers).sum(axis=2, dtype=np.uint64) + self.salts
+        if groups is not None:
+            keys ^= np.asarray(groups, dtype=np.int64).astype(np.uint64)[:, None] * self.group_multiplier
+        return keys.view(np.int64)
+
+    def similarity(self, signature: np.ndarray, other: np.ndarray) -> float:
+        return np.count_nonzero(signature == other) / self.num_perm
+
+
+class DedupIndex:
+    """
+    class assigns texts to clusters of near duplicates per query type and keeps its index in a sqlite file, so it runs
+    in bounded memory for any amount of texts and a later pass only indexes texts it did not see before. The first text
+    of a cluster is its representative, a new text joins the candidate cluster with the most similar representative
+    if the estimated jaccard similarity reaches the threshold and starts a new cluster otherwise. Representatives never
+    change, so the assignments of earlier passes stay valid.
+
+    -- index a chunk of rows - id as bytes, query type and text:
+        index = DedupIndex("dedup.sqlite", threshold=0.8)
+        index.add([(b"1", 3, "select all rows"), (b"2", 3, "Select  all rows.")])
+        -> [(b"1", 3, b"1", 1.0), (b"2", 3, b"1", 1.0)]
+    """
+
+    def __init__(self, path: str, num_perm: int = 128, bands: int = 16, threshold: float = 0.8,
+                 shingle_size: int = 5, seed: int = 1):
+        """
+        :param path: sqlite file of the index, created if missing
+        :param num_perm: amount of hash permutations of a signature
+        :param bands: amount of bands of a signature
+        :param threshold: minimum estimated jaccard similarity of a text to the representative of its cluster
+        :param shingle_size: amount of bytes of a shingle (1 - 8)
+        :param seed: seed of the permutations
+        """
+        self.path = path
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm=num_perm, bands=bands, shingle_size=shingle_size, seed=seed)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            PRAGMA temp_store = MEMORY;
+            PRAGMA cache_size = -65536;
+            CREATE TABLE IF NOT EXISTS state (name TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS members (id BLOB PRIMARY KEY, cluster INTEGER, similarity REAL) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS clusters (
+                number INTEGER PRIMARY KEY, id BLOB, query_type INTEGER, signature BLOB, size INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS buckets (key INTEGER, cluster INTEGER, PRIMARY KEY (key, cluster)) WITHOUT ROWID;
+            CREATE TEMP TABLE chunk_ids (id BLOB PRIMARY KEY) WITHOUT ROWID;
+            CREATE TEMP TABLE chunk_numbers (number INTEGER PRIMARY KEY);
+            CREATE TEMP TABLE chunk_keys (key INTEGER PRIMARY KEY);
+        """)
+        # clusters are numbered in the index, the buckets and members refer to the number instead of the 16 byte id
+        self._next = self.connection.execute("SELECT COALESCE(MAX(number), 0) + 1 FROM clusters").fetchone()[0]
+
+        # signatures of an index created with other settings can not be compared
+        settings = {"num_perm": num_perm, "bands": bands, "shingle_size": shingle_size, "seed": seed}
+        stored = {name: self.get_state(name) for name in settings}
+        if any(value is not None for value in stored.values()):
+            changed = [name for name, value in settings.items() if stored[name] != str(value)]
+            if changed:
+                self.connection.close()
+                raise ValueError(f"{path} was created with other {', '.join(changed)}, rebuild the index")
+        else:
+            with self.connection:
+                for name, value in settings.items():
+                    self._set_state(name, value)
+
+    def get_state(self, name: str, default=None):
+        row = self.connection.execute("SELECT value FROM state WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def _set_state(self, name: str, value) -> None:
+        self.connection.execute("INSERT OR REPLACE INTO state (name, value) VALUES (?, ?)", (name, str(value)))
+
+    def _known(self, ids: list) -> set:
+        # temporary tables instead of IN lists, older sqlite versions allow only 999 parameters per statement
+        self.connection.executemany("INSERT OR IGNORE INTO chunk_ids (id) VALUES (?)", ((id_,) for id_ in ids))
+        known = {row[0] for row in self.connection.execute("SELECT id FROM chunk_ids CROSS JOIN members USING (id)")}
+        self.connection.execute("DELETE FROM chunk_ids")
+        return known
+
+    def _buckets(self, keys: list) -> dict:
+        self.connection.executemany("INSERT OR IGNORE INTO chunk_keys (key) VALUES (?)", ((key,) for key in keys))
+        # a cross join keeps the chunk as outer table, so sqlite looks up the keys instead of scanning all buckets
+        buckets = dict()
+        for key, cluster in self.connection.execute(
+            "SELECT b.key, b.cluster FROM chunk_keys CROSS JOIN buckets b USING (key)"
+        ):
+            buckets.setdefault(key, list()).append(cluster)
+        self.connection.execute("DELETE FROM chunk_keys")
+        return buckets
+
+    def _representatives(self, clusters: set) -> dict:
+        self.connection.executemany("INSERT INTO chunk_numbers (number) VALUES (?)", ((c,) for c in clusters))
+        representatives = {
+            number: (id_, np.frombuffer(signature, dtype=np.uint32))
+            for number, id_, signature in self.connection.execute(
+                "SELECT c.number, c.id, c.signature FROM chunk_numbers CROSS JOIN clusters c USING (number)"
+            )
+        }
+        self.connection.execute("DELETE FROM chunk_numbers")
+        return representatives
+
+    def add(self, rows: list, state: dict = None) -> list:
+        """
+        indexes a chunk of rows and commits it together with the passed state, an interrupted pass keeps its progress
+        :param rows: list of tuples with id as bytes, query type and text
+        :param state: dict with state values saved with the chunk e.g. the watermark of the pass
+        :return: list of tuples with id, query type, cluster and similarity to the cluster representative of every
+        newly indexed row, rows indexed before are skipped
+        """
+        known = self._known([row[0] for row in rows])
+        unique = dict()
+        for row in rows:
+            if row[0] not in known:
+                unique.setdefault(row[0], row)
+        rows = list(unique.values())
+
+        assignments = list()
+        if rows:
+            signatures = self.hasher.signatures([text for _, _, text in rows])
+            # the keys of a query type are only shared with texts of the same query type
+            groups = [NULL_QUERY_TYPE if query_type is None else int(query_type) for _, query_type, _ in rows]
+            keys = self.hasher.band_keys(signatures, groups=groups)
+
+            buckets = self._buckets(np.unique(keys).tolist())
+            keys = keys.tolist()
+            representatives = self._representatives({cluster for clusters in buckets.values() for cluster in clusters})
+
+            sizes, members, new_clusters, new_buckets = dict(), list(), list(), list()
+            for (id_, query_type, _), group, signature, row_keys in zip(rows, groups, signatures, keys):
+                best, best_similarity, checked = None, 0.0, set()
+                for key in row_keys:
+                    for cluster in buckets.get(key, ()):
+                        if cluster in checked:
+                            continue
+                        checked.add(cluster)
+                        similarity = self.hasher.similarity(signature, representatives[cluster][1])
+                        if similarity > best_similarity:
+                            best, best_similarity = cluster, similarity
+
+                if best is not None and best_similarity >= self.threshold:
+                    sizes[best] = sizes.get(best, 0) + 1
+                    members.append((id_, best, best_similarity))
+                    assignments.append((id_, query_type, representatives[best][0], best_similarity))
+                    continue
+
+                # the text starts a new cluster, later texts of the same chunk are compared to it as well
+                number, self._next = self._next, self._next + 1
+                representatives[number] = (id_, signature)
+                new_clusters.append((number, id_, group, signature.tobytes()))
+                for key in row_keys:
+                    buckets.setdefault(key, list()).append(number)
+                    new_buckets.append((key, number))
+                members.append((id_, number, 1.0))
+                assignments.append((id_, query_type, id_, 1.0))
+
+        try:
+            with self.connection:
+                if assignments:
+                    self.connection.executemany(
+                        "INSERT INTO clusters (number, id, query_type, signature, size) VALUES (?, ?, ?, ?, 1)",
+                        new_clusters
+                    )
+                    self.connection.executemany("UPDATE clusters SET size = size + ? WHERE number = ?",
+                                                ((size, number) for number, size in sizes.items()))
+                    # sorted keys are inserted into neighbouring pages of the bucket tree
+                    self.connection.executemany(
+                        "INSERT OR IGNORE INTO buckets (key, cluster) VALUES (?, ?)",
+                        sorted(new_buckets)
+                    )
+                    self.connection.executemany("INSERT INTO members (id, cluster, similarity) VALUES (?, ?, ?)",
+                                                members)
+                for name, value in (state or dict()).items():
+                    self._set_state(name, value)
+        except sqlite3.Error:
+            # the numbers of the rolled back clusters are free again
+            self._next = self.connection.execute("SELECT COALESCE(MAX(number), 0) + 1 FROM clusters").fetchone()[0]
+            raise
+
+        return assignments
+
+    def stats(self) -> dict:
+        """
+        :return: dict with the amount of indexed texts, clusters and texts assigned to the cluster of another text
+        """
+        texts = self.connection.execute("SELECT COUNT(*) FROM members").fetchone()[0]
+        clusters = self.connection.execute("SELECT COUNT(*) FROM clusters").fetchone()[0]
+        return {"texts": texts, "clusters": clusters, "duplicates": texts - clusters}
+
+    def close(self) -> None:
+        self.connection.close()
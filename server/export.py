@@ -0,0 +1,346 @@
+# import standard modules
+import os
+import glob
+import json
+import time
+import uuid
+
+# import third party modules
+import click
+from sqlalchemy import select, bindparam
+from flask import current_app
+from flask.cli import with_appcontext
+
+# import project related modules
+from models import db, FreeQuery
+
+
+class ShardWriter:
+    """
+    class writes chunks of rows into numbered shard files holding at most shard_size rows each. The jsonl format writes
+    one record per line, the columns format writes one json object per shard with one value list per column.
+    """
+
+    extensions = {"jsonl": "jsonl", "columns": "columns.json"}
+
+    def __init__(self, directory: str, columns: list, fmt: str = "jsonl", shard_size: int = 100000,
+                 prefix: str = "free_query"):
+        """
+        :param directory: folder the shards are written to
+        :param columns: names of the exported columns in order
+        :param fmt: output format - jsonl or columns
+        :param shard_size: maximum amount of rows per shard
+        :param prefix: file name prefix of the shards
+        """
+        if fmt not in self.extensions:
+            raise ValueError(f"unknown export format '{fmt}', use one of {list(self.extensions)}")
+
+        self.directory = directory
+        self.columns = columns
+        self.fmt = fmt
+        self.shard_size = max(shard_size, 1)
+        self.prefix = prefix
+
+        self.shards = list()
+        self.rows = 0
+        self._file = None
+        self._buffer = None
+        self._shard_rows = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, rows) -> None:
+        """
+        :param rows: iterable of row tuples in the order of the columns
+        """
+        for row in rows:
+            if self._shard_rows == 0:
+                self._open()
+
+            if self.fmt == "jsonl":
+                self._file.write(json.dumps(dict(zip(self.columns, row)), default=str) + "\n")
+            else:
+                for values, value in zip(self._buffer, row):
+                    values.append(value)
+
+            self._shard_rows += 1
+            self.rows += 1
+
+            if self._shard_rows == self.shard_size:
+                self._close()
+
+    def close(self) -> None:
+        """
+        writes and closes the last shard
+        """
+        if self._shard_rows:
+            self._close()
+
+    def _open(self) -> None:
+        path = os.path.join(self.directory, f"{self.prefix}-{len(self.shards):05d}.{self.extensions[self.fmt]}")
+        self.shards.append(path)
+        self._file = open(path, "w", encoding="utf-8")
+        self._buffer = [list() for _ in self.columns]
+
+    def _close(self) -> None:
+        if self.fmt == "columns":
+            json.dump({"rows": self._shard_rows, "columns": dict(zip(self.columns, self._buffer))}, self._file,
+                      default=str)
+
+        self._file.close()
+        self._file = None
+        self._buffer = None
+        self._shard_rows = 0
+
+
+def export_queries(directory: str, fmt: str = "jsonl", shard_size: int = 100000, chunk_size: int = 1000) -> dict:
+    """
+    streams the FreeQuery table with a server side cursor in chunks into shard files, so the memory usage only depends
+    on the chunk and shard size but not on the size of the table
+    :param directory: folder the shards are written to
+    :param fmt: output format - jsonl or columns
+    :param shard_size: maximum amount of rows per shard
+    :param chunk_size: amount of rows fetched from the cursor at once
+    :return: dict with the amount of rows, the written shards, the duration and the rows per second
+    """
+
+    table = FreeQuery.__table__
+    writer = ShardWriter(directory, columns=table.columns.keys(), fmt=fmt, shard_size=shard_size)
+
+    # stream_results makes psycopg2 use a named server side cursor instead of fetching the entire result
+    statement = select(table).order_by(table.c.id).execution_options(stream_results=True)
+
+    start = time.perf_counter()
+
+    # the export reads from the read bind, so it does not hold a connection of the inserts
+    with db.read_engine().connect() as connection:
+        result = connection.execute(statement)
+        try:
+            for chunk in result.partitions(chunk_size):
+                writer.write(chunk)
+        finally:
+            result.close()
+            writer.close()
+
+    duration = time.perf_counter() - start
+
+    return {
+        "rows": writer.rows,
+        "shards": writer.shards,
+        "seconds": duration,
+        "rows_per_second": writer.rows / duration if duration else 0.0
+    }
+
+
+@click.command("export")
+@click.argument("directory")
+@click.option("--format", "fmt", type=click.Choice(list(ShardWriter.extensions)), default="jsonl",
+              help="jsonl writes one record per line, columns one value list per column and shard")
+@click.option("--shard-size", default=100000, show_default=True, help="maximum amount of rows per shard file")
+@click.option("--chunk-size", default=1000, show_default=True, help="amount of rows fetched from the cursor at once")
+@with_appcontext
+def export_command(directory, fmt, shard_size, chunk_size):
+    """exports the collected queries into shard files in DIRECTORY"""
+
+    stats = export_queries(directory, fmt=fmt, shard_size=shard_size, chunk_size=chunk_size)
+
+    for shard in stats["shards"]:
+        click.echo(f"written {shard}")
+    click.echo(
+        f"exported {stats['rows']} rows in {stats['seconds']:.2f}s ({stats['rows_per_second']:.0f} rows/s)"
+    )
+
+
+def dedup_queries(directory: str, index_path: str = None, fmt: str = "jsonl", shard_size: int = 100000,
+                  chunk_size: int = 1000, overlap: float = 3600.0, rebuild: bool = False, **settings) -> dict:
+    """
+    streams the FreeQuery table in chunks through a near duplicate index and writes the cluster of every newly indexed
+    query into shard files. The index is kept in a sqlite file, a later run only reads the queries inserted since the
+    previous run and indexes the ones it did not see before.
+    :param directory: folder the shards and by default the index are written to
+    :param index_path: sqlite file of the index, defaults to index.sqlite in the directory
+    :param fmt: output format - jsonl or columns
+    :param shard_size: maximum amount of rows per shard
+    :param chunk_size: amount of rows fetched from the cursor and indexed at once
+    :param overlap: seconds before the newest indexed id read again, queries are inserted a few seconds after their id
+    was created by the write behind queue
+    :param rebuild: indicator whether the index and the shards of earlier runs are removed first
+    :param settings: num_perm, bands, threshold and shingle_size of DedupIndex
+    :return: dict with the run, the amount of read and indexed rows, the new duplicates, the written shards, the
+    totals of the index, the duration and the rows per second
+    """
+
+    # numpy is only imported by the command needing it
+    from dedup import DedupIndex
+
+    index_path = index_path or os.path.join(directory, "index.sqlite")
+    if rebuild:
+        for path in [index_path, f"{index_path}-wal", f"{index_path}-shm"] + glob.glob(
+                os.path.join(directory, "clusters-*")):
+            if os.path.exists(path):
+                os.remove(path)
+
+    index = DedupIndex(index_path, **settings)
+    run = int(index.get_state("runs", 0)) + 1
+    watermark = index.get_state("watermark_ms")
+
+    table = FreeQuery.__table__
+    statement = select([table.c.id, table.c.query_type, table.c.free_text_query]).order_by(table.c.id)
+    if watermark is not None:
+        # ids are time ordered uuids (version 7), only ids created since the previous run minus the overlap are read.
+        # Ids of rows converted by revision 0003 are not time ordered, they are read again but not indexed again.
+        start_ms = max(int(watermark) - int(overlap * 1000), 0)
+        statement = statement.where(table.c.id >= uuid.UUID(int=start_ms << 80))
+
+    # stream_results makes psycopg2 use a named server side cursor instead of fetching the entire result
+    statement = statement.execution_options(stream_results=True)
+
+    writer = ShardWriter(directory, columns=["id", "query_type", "cluster", "similarity"], fmt=fmt,
+                         shard_size=shard_size, prefix=f"clusters-{run:05d}")
+
+    start = time.perf_counter()
+    read, duplicates = 0, 0
+
+    # the pass reads from the read bind, queries not yet replicated are read by the next run within the overlap
+    with db.read_engine().connect() as connection:
+        result = connection.execute(statement)
+        try:
+            for chunk in result.partitions(chunk_size):
+                read += len(chunk)
+                newest = [id_.int >> 80 for id_, _, _ in chunk if id_.version == 7]
+                if newest:
+                    watermark = max(newest + ([int(watermark)] if watermark is not None else []))
+
+                assignments = index.add([(id_.bytes, query_type, text) for id_, query_type, text in chunk],
+                                        state={"watermark_ms": watermark} if watermark is not None else None)
+                duplicates += sum(1 for id_, _, cluster, _ in assignments if id_ != cluster)
+                writer.write((uuid.UUID(bytes=id_), query_type, uuid.UUID(bytes=cluster), round(similarity, 4))
+                             for id_, query_type, cluster, similarity in assignments)
+
+            # the run only counts once it read all rows
+            index.add([], state={"runs": run})
+        finally:
+            result.close()
+            writer.close()
+
+    duration = time.perf_counter() - start
+    totals = index.stats()
+    index.close()
+
+    return {
+        "run": run,
+        "read": read,
+        "indexed": writer.rows,
+        "duplicates": duplicates,
+        "shards": writer.shards,
+        "index": totals,
+        "seconds": duration,
+        "rows_per_second": read / duration if duration else 0.0
+    }
+
+
+@click.command("dedup")
+@click.argument("directory")
+@click.option("--index", "index_path", help="sqlite file of the index, defaults to DIRECTORY/index.sqlite")
+@click.option("--format", "fmt", type=click.Choice(list(ShardWriter.extensions)), default="jsonl",
+              help="jsonl writes one record per line, columns one value list per column and shard")
+@click.option("--threshold", default=0.8, show_default=True,
+              help="minimum estimated jaccard similarity of a query to the first query of its cluster")
+@click.option("--num-perm", default=128, show_default=True, help="length of the minhash signatures")
+@click.option("--bands", default=16, show_default=True, help="signature bands, more bands find more candidates")
+@click.option("--shingle-size", default=5, show_default=True, help="amount of characters of a shingle")
+@click.option("--shard-size", default=100000, show_default=True, help="maximum amount of rows per shard file")
+@click.option("--chunk-size", default=1000, show_default=True, help="amount of rows fetched and indexed at once")
+@click.option("--overlap", default=3600.0, show_default=True,
+              help="seconds before the newest indexed query read again by the next run")
+@click.option("--rebuild", is_flag=True, help="remove the index and the shards of earlier runs first")
+@with_appcontext
+def dedup_command(directory, index_path, fmt, threshold, num_perm, bands, shingle_size, shard_size, chunk_size,
+                  overlap, rebuild):
+    """assigns the collected queries to clusters of near duplicates and writes the clusters into DIRECTORY"""
+
+    try:
+        stats = dedup_queries(directory, index_path=index_path, fmt=fmt, shard_size=shard_size,
+                              chunk_size=chunk_size, overlap=overlap, rebuild=rebuild, threshold=threshold,
+                              num_perm=num_perm, bands=bands, shingle_size=shingle_size)
+    except ValueError as exc:
+        raise click.UsageError(str(exc))
+
+    for shard in stats["shards"]:
+        click.echo(f"written {shard}")
+    click.echo(
+        f"run {stats['run']}: read {stats['read']} rows, indexed {stats['indexed']} with {stats['duplicates']} near "
+        f"duplicates in {stats['seconds']:.2f}s ({stats['rows_per_second']:.0f} rows/s), the index holds "
+        f"{stats['index']['texts']} queries in {stats['index']['clusters']} clusters"
+    )
+
+
+def fingerprint_queries(engine: str = "pandas", rows: int = 5, columns: int = 0, chunk_size: int = 1000) -> dict:
+    """
+    sets the fingerprint of all collected queries with a seed but without a fingerprint, e.g. queries collected before
+    revision 0005. The rows are read by id in chunks from the read bind and updated with one statement per chunk.
+    :param engine: name of the task engine - pandas or lite, both create the same fingerprints
+    :param rows: amount of rows of the input tables the tasks were shown with - see TASK_ROWS
+    :param columns: amount of additional input columns the tasks were shown with - see TASK_COLUMNS
+    :param chunk_size: amount of rows read and updated at once
+    :return: dict with the amount of updated rows, the rows whose task can not be created, the duration and the rows
+    per second
+    """
+
+    # the task generators import pandas, only the command needing them imports them
+    from task_pool import fingerprint_rows
+    from generators.lite import ENGINES
+
+    generator = ENGINES[engine]()
+    table = FreeQuery.__table__
+    statement = select([table.c.id, table.c.query_type, table.c.seed]).where(
+        table.c.fingerprint.is_(None), table.c.seed.isnot(None)
+    ).order_by(table.c.id).limit(chunk_size)
+    update = table.update().where(table.c.id == bindparam("_id")).values(fingerprint=bindparam("fingerprint"))
+
+    start = time.perf_counter()
+    updated, failed, last = 0, 0, None
+
+    # a chunk is read completely before it is updated, so a single sqlite file is never read and written at once
+    while True:
+        with db.read_engine().connect() as connection:
+            chunk = connection.execute(statement if last is None else statement.where(table.c.id > last)).fetchall()
+        if not chunk:
+            break
+        last = chunk[-1].id
+
+        fingerprints = fingerprint_rows(generator, [dict(row._mapping) for row in chunk], table_rows=rows,
+                                        columns=columns)
+        fingerprints = [{"_id": row["id"], "fingerprint": row["fingerprint"]} for row in fingerprints
+                        if row["fingerprint"] is not None]
+        failed += len(chunk) - len(fingerprints)
+
+        if fingerprints:
+            with db.engine.begin() as connection:
+                connection.execute(update, fingerprints)
+            updated += len(fingerprints)
+
+    duration = time.perf_counter() - start
+
+    return {
+        "rows": updated,
+        "failed": failed,
+        "seconds": duration,
+        "rows_per_second": (updated + failed) / duration if duration else 0.0
+    }
+
+
+@click.command("fingerprint")
+@click.option("--chunk-size", default=1000, show_default=True, help="amount of rows read and updated at once")
+@with_appcontext
+def fingerprint_command(chunk_size):
+    """sets the task fingerprint of the collected queries without one"""
+
+    config = current_app.config
+    stats = fingerprint_queries(engine=config['TASK_ENGINE'], rows=config['TASK_ROWS'],
+                                columns=config['TASK_COLUMNS'], chunk_size=chunk_size)
+
+    click.echo(
+        f"fingerprinted {stats['rows']} rows in {stats['seconds']:.2f}s ({stats['rows_per_second']:.0f} rows/s), "
+        f"{stats['failed']} tasks could not be created"
+    )
@@ -0,0 +1,67 @@
+# gunicorn configuration of the production entry point
+#   gunicorn --config server/gunicorn.conf.py --chdir server "app:create_app()"
+
+# import standard modules
+import os
+import glob
+import multiprocessing
+
+# bind address and amount of pre forked worker processes and threads per worker
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv('WEB_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('WEB_THREADS', 4))
+worker_class = "gthread"
+
+# every worker creates the app on its own, so the task pool and write behind threads run in every worker
+preload_app = False
+
+# seconds a worker may block and seconds a worker gets to finish its requests after a restart or stop signal
+timeout = int(os.getenv('WEB_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+# recycle workers from time to time to limit the effect of memory fragmentation
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+
+# metrics of all workers are merged through a shared folder
+os.environ.setdefault('METRICS_DIR', os.path.join('/tmp', 'querycollect-metrics'))
+
+
+def on_starting(server):
+    """
+    removes the metric snapshots of a previous run before the first worker starts
+    """
+    for path in glob.glob(os.path.join(os.environ['METRICS_DIR'], "metrics-*.json")):
+        os.remove(path)
+
+
+def post_worker_init(worker):
+    """
+    warms up a freshly forked worker before it accepts requests: the components of the app are started, one task per
+    query type is generated and the connections of the database pool are opened
+    """
+    from models import db
+
+    app = worker.wsgi
+    services = app.extensions["querycollect"]
+    services.start()
+    services.task_pool.wait_ready(timeout=graceful_timeout)
+
+    with app.app_context():
+        pool = db.engine.pool
+        size = min(threads, pool.size()) if hasattr(pool, "size") else 1
+        connections = [db.engine.connect() for _ in range(size)]
+        for connection in connections:
+            connection.close()
+
+
+def worker_exit(server, worker):
+    """
+    drains the write behind queue of a stopping worker, so queued submissions are inserted before it exits
+    """
+    app = getattr(worker, "wsgi", None)
+    if app is not None:
+        app.extensions["querycollect"].stop(timeout=1)
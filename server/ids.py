@@ -0,0 +1,72 @@
+# import standard modules
+import os
+import time
+import uuid
+import threading
+
+# import third party modules
+from sqlalchemy.types import TypeDecorator, LargeBinary
+from sqlalchemy.dialects import postgresql
+
+
+# state of the last created id, ids created within the same millisecond are counted up
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7() -> uuid.UUID:
+    """
+    creates a time ordered uuid (version 7) with 48 bits unix time in milliseconds, a 12 bit counter and 62 random
+    bits. The counter starts at a random value every millisecond and counts up for further ids within the same
+    millisecond, so the ids of a process are strictly increasing and new rows are appended to the end of an index.
+    :return: uuid.UUID
+    """
+    global _last_ms, _counter
+
+    with _lock:
+        ms = time.time_ns() // 1000000
+        if ms > _last_ms:
+            # the counter starts in the lower half, so at least 2048 ids fit into one millisecond
+            _last_ms, _counter = ms, int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            # same millisecond or the clock went backwards, stay on the last timestamp to keep the order
+            _counter += 1
+            if _counter > 0xFFF:
+                _last_ms, _counter = _last_ms + 1, 0
+        ms, counter = _last_ms, _counter
+
+    random_bits = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    return uuid.UUID(int=(ms << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | random_bits)
+
+
+class CompactUUID(TypeDecorator):
+    """
+    uuid column stored in 16 bytes - the native uuid type on postgres and a 16 byte blob on other databases. Binds
+    uuid.UUID objects and uuid strings and returns uuid.UUID objects.
+
+    -- use as primary key:
+        id = db.Column(CompactUUID(), primary_key=True, default=uuid7)
+    """
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=True))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(str(value))
+        return value if dialect.name == "postgresql" else value.bytes
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        if dialect.name == "postgresql":
+            return uuid.UUID(str(value))
+        return uuid.UUID(bytes=bytes(value))
@@ -0,0 +1,290 @@
+# import standard modules
+import os
+import glob
+import json
+import time
+import bisect
+import threading
+
+# import third party modules
+from flask import g, request
+
+# import project related modules
+from processes import process_identity
+
+
+class Counter:
+    """
+    monotonically increasing value per label combination
+    """
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = dict()
+        self._lock = threading.Lock()
+
+    def inc(self, value: float = 1.0, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0.0) + value
+
+    def samples(self) -> dict:
+        with self._lock:
+            return dict(self.values)
+
+
+class Gauge:
+    """
+    value per label combination read from a callback at collection time, e.g. the current queue depth
+    """
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), callback=None):
+        """
+        :param callback: function returning a dict with a tuple of label values as key and the current value as value
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def samples(self) -> dict:
+        if self.callback is None:
+            return dict()
+        return {tuple(str(v) for v in key): float(value) for key, value in self.callback().items()}
+
+
+class Histogram:
+    """
+    distribution of observed values in cumulative buckets per label combination
+    """
+
+    type = "histogram"
+    default_buckets = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = default_buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.values = dict()
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        ix = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            sample = self.values.get(key)
+            if sample is None:
+                # one counter per bucket plus +Inf, the sum and the count of all observations
+                sample = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            sample[ix] += 1
+            sample[-2] += value
+            sample[-1] += 1
+
+    def samples(self) -> dict:
+        with self._lock:
+            return {key: list(sample) for key, sample in self.values.items()}
+
+
+class Registry:
+    """
+    class holds all metrics of a process and renders them in the prometheus text format. With multiple worker
+    processes every process writes a snapshot into a shared directory, which is merged on collection.
+
+    -- create a metric:
+        registry = Registry()
+        requests = registry.register(Counter("requests_total", "handled requests", ["route"]))
+        requests.inc(route="index")
+
+    -- render all metrics:
+        registry.render()
+    """
+
+    def __init__(self):
+        self.metrics = list()
+        self.directory = None
+        self.interval = None
+        self._identity = None
+        self._worker = None
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def snapshot(self) -> dict:
+        """
+        :return: json serializable dict with the current samples of every metric
+        """
+        return {
+            metric.name: {
+                "type": metric.type,
+                "help": metric.documentation,
+                "labelnames": list(metric.labelnames),
+                "buckets": list(getattr(metric, "buckets", [])),
+                "samples": {json.dumps(key): value for key, value in metric.samples().items()}
+            }
+            for metric in self.metrics
+        }
+
+    def share(self, directory: str, interval: float = 5.0) -> None:
+        """
+        starts a daemon thread writing the snapshot of this process into the directory every interval seconds
+        :param directory: folder shared by all worker processes
+        :param interval: seconds between two snapshots
+        """
+        self.directory = directory
+        self.interval = interval
+        os.makedirs(directory, exist_ok=True)
+
+        def run():
+            while True:
+                time.sleep(interval)
+                self.write_snapshot()
+
+        if self._worker is None:
+            self._worker = threading.Thread(target=run, name="metrics-snapshot", daemon=True)
+            self._worker.start()
+
+    def write_snapshot(self) -> None:
+        # keyed by pid and start time, a worker reusing the pid of a stopped worker keeps the counters of the stopped one
+        pid = os.getpid()
+        if self._identity is None or not self._identity.startswith(f"{pid}-"):
+            self._identity = process_identity(pid)
+
+        path = os.path.join(self.directory, f"metrics-{self._identity}.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(self.snapshot(), file)
+        os.replace(path + ".tmp", path)
+
+    def collect(self) -> dict:
+        """
+        :return: snapshot of this process merged with the snapshots of all other processes sharing the directory.
+        Counters and histograms of stopped processes are kept, gauges only of processes alive within three intervals.
+        """
+        if self.directory is None:
+            return self.snapshot()
+
+        self.write_snapshot()
+        merged = dict()
+
+        for path in glob.glob(os.path.join(self.directory, "metrics-*.json")):
+            try:
+                stale = os.path.getmtime(path) < time.time() - 3 * self.interval
+                with open(path, encoding="utf-8") as file:
+                    snapshot = json.load(file)
+            except (OSError, ValueError):
+                continue
+
+            for name, metric in snapshot.items():
+                if stale and metric["type"] == "gauge":
+                    continue
+
+                target = merged.setdefault(name, dict(metric, samples=dict()))
+                for key, value in metric["samples"].items():
+                    previous = target["samples"].get(key)
+                    if previous is None:
+                        target["samples"][key] = value
+                    elif isinstance(value, list):
+                        target["samples"][key] = [a + b for a, b in zip(previous, value)]
+                    else:
+                        target["samples"][key] = previous + value
+
+        return merged
+
+    def render(self) -> str:
+        """
+        :return: all metrics in the prometheus text exposition format
+        """
+        lines = list()
+
+        for name, metric in self.collect().items():
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+
+            for key, value in sorted(metric["samples"].items()):
+                labels = list(zip(metric["labelnames"], json.loads(key)))
+
+                if metric["type"] != "histogram":
+                    lines.append(f"{name}{format_labels(labels)} {value}")
+                    continue
+
+                cumulative = 0
+                for bound, count in zip(metric["buckets"] + ["+Inf"], value[:-2]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{format_labels(labels + [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_sum{format_labels(labels)} {value[-2]}")
+                lines.append(f"{name}_count{format_labels(labels)} {value[-1]}")
+
+        return "\n".join(lines) + "\n"
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def format_labels(labels: list) -> str:
+    if not labels:
+        return ""
+    values = ",".join(
+        f'{name}="{escape(value)}"' for name, value in labels
+    )
+    return "{" + values + "}"
+
+
+# metrics of the service
+registry = Registry()
+
+request_latency = registry.register(Histogram(
+    "querycollect_request_duration_seconds", "latency of handled requests", ["route", "status"]
+))
+generation_latency = registry.register(Histogram(
+    "querycollect_task_generation_seconds", "time to generate a task", ["query_type", "source"]
+))
+commit_latency = registry.register(Histogram(
+    "querycollect_db_commit_seconds", "time of a bulk insert including the commit"
+))
+errors = registry.register(Counter(
+    "querycollect_errors_total", "raised exceptions", ["source", "exception"]
+))
+submissions = registry.register(Counter(
+    "querycollect_submissions_total", "submitted queries", ["query_type"]
+))
+admissions = registry.register(Counter(
+    "querycollect_admission_total", "submission requests and queries by admission outcome", ["route", "outcome"]
+))
+task_fingerprints = registry.register(Counter(
+    "querycollect_task_fingerprints_total", "seeds drawn by the task pool by fingerprint outcome - unique, rejected as "
+    "recently served or served as duplicate after all attempts", ["query_type", "outcome"]
+))
+
+
+def instrument(app) -> None:
+    """
+    registers request hooks measuring the latency per route and counting unhandled exceptions
+    :param app: flask app instance
+    """
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def observe_latency(response):
+        start = g.pop("request_start", None)
+        if start is not None:
+            request_latency.observe(
+                time.perf_counter() - start, route=request.endpoint or "unknown", status=response.status_code
+            )
+        return response
+
+    @app.teardown_request
+    def count_exception(exc):
+        if exc is not None:
+            errors.inc(source="request", exception=type(exc).__name__)
@@ -0,0 +1,34 @@
+"""create FreeQuery table
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the app creates missing tables when it starts, a database it created without a revision holds the table already
+    if sa.inspect(op.get_bind()).has_table('FreeQuery'):
+        return
+
+    op.create_table(
+        'FreeQuery',
+        sa.Column('id', sa.String(length=50), nullable=False),
+        sa.Column('query_type', sa.Integer(), nullable=True),
+        sa.Column('free_text_query', sa.String(length=400), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('FreeQuery')
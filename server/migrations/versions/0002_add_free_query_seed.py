@@ -0,0 +1,28 @@
+"""add seed of the shown task to FreeQuery
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the app creates missing tables when it starts, a table created by a newer version holds the column already
+    if 'seed' in {column['name'] for column in sa.inspect(op.get_bind()).get_columns('FreeQuery')}:
+        return
+
+    op.add_column('FreeQuery', sa.Column('seed', sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('FreeQuery', 'seed')
@@ -0,0 +1,139 @@
+"""store the FreeQuery id as a 16 byte uuid
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 11:00:00.000000
+
+The ids are copied in batches into a new column, every batch is committed on its own, so the table is never locked for
+the whole copy and the app can keep inserting. Rows inserted meanwhile are copied right before the columns are
+swapped. Existing ids keep their value, only new ids are time ordered.
+"""
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+binary_id = sa.LargeBinary(16).with_variant(postgresql.UUID(as_uuid=True), 'postgresql')
+string_id = sa.String(length=50)
+
+
+def to_uuid(value) -> uuid.UUID:
+    """
+    :param value: id as uuid string, 16 bytes or uuid.UUID
+    :return: uuid.UUID, ids which are no uuid get a stable name based uuid
+    """
+    if isinstance(value, uuid.UUID):
+        return value
+    if isinstance(value, (bytes, memoryview)):
+        return uuid.UUID(bytes=bytes(value))
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        return uuid.uuid5(uuid.NAMESPACE_OID, value)
+
+
+def to_binary(value):
+    value = to_uuid(value)
+    return value if op.get_bind().dialect.name == 'postgresql' else value.bytes
+
+
+def to_string(value) -> str:
+    return str(to_uuid(value))
+
+
+def copy_ids(source: tuple, target: tuple, convert, batch_size: int = BATCH_SIZE) -> int:
+    """
+    copies the converted ids of all rows without a target id in batches
+    :param source: tuple with name and type of the current primary key column
+    :param target: tuple with name and type of the new column
+    :param convert: function converting a source id into a target id
+    :param batch_size: amount of rows updated per statement
+    :return: amount of copied rows
+    """
+    table = sa.table('FreeQuery', sa.column(source[0], source[1]), sa.column(target[0], target[1]))
+    source_column, target_column = table.c[source[0]], table.c[target[0]]
+
+    update = (table.update()
+              .where(source_column == sa.bindparam('source_id', type_=source[1]))
+              .values({target[0]: sa.bindparam('target_id', type_=target[1])}))
+
+    connection = op.get_bind()
+    copied = 0
+    while True:
+        ids = connection.execute(
+            sa.select([source_column]).where(target_column.is_(None)).limit(batch_size)
+        ).fetchall()
+        ids = [value for value, in ids]
+        if not ids:
+            return copied
+
+        connection.execute(update, [{'source_id': value, 'target_id': convert(value)} for value in ids])
+        copied += len(ids)
+
+
+def swap_ids(column: str, column_type) -> None:
+    """
+    replaces the primary key by the given column
+    :param column: name of the filled column
+    :param column_type: type of the filled column
+    """
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_column('FreeQuery', 'id')
+        op.alter_column('FreeQuery', column, new_column_name='id', nullable=False)
+        op.execute(f'ALTER TABLE "FreeQuery" ADD CONSTRAINT "FreeQuery_pkey" PRIMARY KEY USING INDEX "FreeQuery_{column}_key"')
+        return
+
+    # databases without alter column support, e.g. sqlite, recreate the table - the primary key is only picked up
+    # once the renamed column exists
+    with op.batch_alter_table('FreeQuery', recreate='always') as batch_op:
+        batch_op.drop_column('id')
+        batch_op.alter_column(column, new_column_name='id', existing_type=column_type, nullable=False)
+
+    with op.batch_alter_table('FreeQuery', recreate='always') as batch_op:
+        batch_op.create_primary_key('FreeQuery_pkey', ['id'])
+
+
+def migrate_ids(source_type, target_type, convert) -> None:
+    """
+    fills a new id column in committed batches and swaps it with the current primary key
+    """
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    op.add_column('FreeQuery', sa.Column('id_new', target_type, nullable=True))
+
+    with op.get_context().autocommit_block():
+        copy_ids(('id', source_type), ('id_new', target_type), convert)
+
+        # build the unique index without blocking inserts, the primary key is later created on the existing index
+        if postgres:
+            op.execute('CREATE UNIQUE INDEX CONCURRENTLY "FreeQuery_id_new_key" ON "FreeQuery" ("id_new")')
+
+    # inserts wait from here on until the migration is committed, only the rows inserted during the copy are left
+    if postgres:
+        op.execute('LOCK TABLE "FreeQuery" IN EXCLUSIVE MODE')
+
+    copy_ids(('id', source_type), ('id_new', target_type), convert)
+    swap_ids('id_new', target_type)
+
+
+def upgrade():
+    # the app creates missing tables when it starts, a table created by a newer version holds 16 byte ids already
+    id_type = next(column['type'] for column in sa.inspect(op.get_bind()).get_columns('FreeQuery')
+                   if column['name'] == 'id')
+    if not isinstance(id_type, sa.String):
+        return
+
+    migrate_ids(string_id, binary_id, to_binary)
+
+
+def downgrade():
+    migrate_ids(binary_id, string_id, to_string)
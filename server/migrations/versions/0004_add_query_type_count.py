@@ -0,0 +1,38 @@
+"""add QueryTypeCount summary table
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 13:00:00.000000
+
+The counts of the already collected queries are aggregated once, afterwards every insert into FreeQuery updates them.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the app creates missing tables when it starts, so it might have created the table already
+    if not sa.inspect(op.get_bind()).has_table('QueryTypeCount'):
+        op.create_table(
+            'QueryTypeCount',
+            sa.Column('query_type', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('count', sa.BigInteger(), nullable=False),
+            sa.PrimaryKeyConstraint('query_type')
+        )
+
+    op.execute('DELETE FROM "QueryTypeCount"')
+    op.execute(
+        'INSERT INTO "QueryTypeCount" (query_type, count) '
+        'SELECT query_type, COUNT(*) FROM "FreeQuery" WHERE query_type IS NOT NULL GROUP BY query_type'
+    )
+
+
+def downgrade():
+    op.drop_table('QueryTypeCount')
@@ -0,0 +1,31 @@
+"""add fingerprint of the shown task to FreeQuery
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 15:00:00.000000
+
+Already collected queries keep an empty fingerprint, flask fingerprint fills it in from their seeds.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the app creates missing tables on its start, a table created by a newer version holds the column already
+    inspector = sa.inspect(op.get_bind())
+    if 'fingerprint' not in {column['name'] for column in inspector.get_columns('FreeQuery')}:
+        op.add_column('FreeQuery', sa.Column('fingerprint', sa.String(length=16), nullable=True))
+    if 'ix_FreeQuery_query_type_fingerprint' not in {index['name'] for index in inspector.get_indexes('FreeQuery')}:
+        op.create_index('ix_FreeQuery_query_type_fingerprint', 'FreeQuery', ['query_type', 'fingerprint'])
+
+
+def downgrade():
+    op.drop_index('ix_FreeQuery_query_type_fingerprint', table_name='FreeQuery')
+    op.drop_column('FreeQuery', 'fingerprint')
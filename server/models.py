@@ -1,28 +1,58 @@
-# import third party modules
-from flask_sqlalchemy import SQLAlchemy
+# import project related modules
+from ids import CompactUUID, uuid7
+from database import Database
 
-# define database model
-db = SQLAlchemy()
+# define database model, inserts use the session and heavy reads db.read_engine() - see Database
+db = Database()
 
 
 class FreeQuery(db.Model):
     """
-    Database Table used for the DataCollect service. It holds just three columns
-    id - primary key and random generated uuid
+    Database Table used for the DataCollect service. It holds the columns
+    id - primary key, time ordered uuid stored in 16 bytes - see ids.uuid7
     query_type - indicating a predefined filter / action provided by the index view
     free_text_query - task response from the user
+    seed - seed of the shown task, QueryTable().query_task(query_type, seed=seed) recreates the tables
+    fingerprint - fingerprint of the shown task, tasks differing only in random values share it - see
+    QueryTable.fingerprint. The index on query type and fingerprint answers coverage queries.
     """
 
     __tablename__ = 'FreeQuery'
+    __table_args__ = (db.Index('ix_FreeQuery_query_type_fingerprint', 'query_type', 'fingerprint'),)
 
-    id = db.Column(db.String(50), primary_key=True)
+    id = db.Column(CompactUUID(), primary_key=True, default=uuid7)
     query_type = db.Column(db.Integer())
     free_text_query = db.Column(db.String(400))
+    seed = db.Column(db.BigInteger())
+    fingerprint = db.Column(db.String(16))
 
-    def __init__(self, id, query_type, free_text_query):
+    def __init__(self, id, query_type, free_text_query, seed=None, fingerprint=None):
         self.id = id
         self.query_type = query_type
         self.free_text_query = free_text_query
+        self.seed = seed
+        self.fingerprint = fingerprint
 
     def __repr__(self):
-        return f"query_type_{self.query_type}"
\ No newline at end of file
+        return f"query_type_{self.query_type}"
+
+
+class QueryTypeCount(db.Model):
+    """
+    Summary table holding the amount of collected queries per query type. It is updated together with every insert
+    into FreeQuery, so the counts never have to be aggregated from FreeQuery. It holds the columns
+    query_type - primary key, predefined filter / action of the index view
+    count - amount of FreeQuery rows with this query type
+    """
+
+    __tablename__ = 'QueryTypeCount'
+
+    query_type = db.Column(db.Integer(), primary_key=True, autoincrement=False)
+    count = db.Column(db.BigInteger(), nullable=False, default=0)
+
+    def __init__(self, query_type, count=0):
+        self.query_type = query_type
+        self.count = count
+
+    def __repr__(self):
+        return f"query_type_{self.query_type}_count"
@@ -0,0 +1,39 @@
+# import standard modules
+import os
+
+
+def process_start(pid: int) -> str:
+    """
+    :param pid: process id
+    :return: start time of the process in clock ticks since boot, "0" where /proc is not available
+    """
+    try:
+        with open(f"/proc/{pid}/stat", encoding="utf-8") as file:
+            stat = file.read()
+    except OSError:
+        return "0"
+
+    # the name of the process in brackets may hold spaces, the start time is the 20th field after it
+    return stat.rsplit(")", 1)[1].split()[19]
+
+
+def process_identity(pid: int) -> str:
+    """
+    :param pid: process id
+    :return: pid and start time of the process, which tell it apart from a later process reusing the pid
+    """
+    return f"{pid}-{process_start(pid)}"
+
+
+def process_alive(pid: int) -> bool:
+    """
+    :param pid: process id
+    :return: True in case a process with the given pid is running
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
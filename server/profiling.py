@@ -0,0 +1,249 @@
+# import standard modules
+import os
+import hmac
+import time
+import pstats
+import random
+import cProfile
+import threading
+import itertools
+from contextlib import contextmanager
+
+# import third party modules
+import click
+from flask import g, request, current_app, has_request_context
+from flask.cli import with_appcontext
+
+
+class Profiler:
+    """
+    class captures cProfile profiles of sampled requests and task generations and writes them into a local folder. A
+    profile file is named after its route, query type and duration, so the report can select them. Without a rate and a
+    token no hooks are registered and profile only checks a flag.
+
+    -- profile one of hundred requests and every request sending the token in the header:
+        profiler = Profiler("profiles", rate=0.01, header="X-Profile", token="secret")
+        profiler.instrument(app)
+
+    -- add the query type to the profile of the current request:
+        profiler.tag(query_type=3)
+
+    -- profile a sampled share of a code block outside of a request, e.g. the task pool:
+        with profiler.profile("pool", query_type=3):
+            generator.query_task(3)
+    """
+
+    extension = ".prof"
+
+    def __init__(self, directory: str, rate: float = 0.0, header: str = "X-Profile", token: str = None,
+                 max_profiles: int = 1000):
+        """
+        :param directory: folder the profiles are written to
+        :param rate: share of requests and task generations to profile (0 - 1), 0 only profiles requests with the token
+        :param header: request header carrying the token
+        :param token: secret a request has to send in the header to be profiled, None disables the header
+        :param max_profiles: maximum amount of profiles written by a process
+        """
+        self.directory = directory
+        self.rate = min(max(rate, 0.0), 1.0)
+        self.header = header
+        self.token = token or None
+        self.max_profiles = max_profiles
+        self.enabled = bool(self.rate or self.token)
+
+        self.written = 0
+        self._sequence = itertools.count()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+    def sampled(self) -> bool:
+        return self.rate > 0 and self._random.random() < self.rate
+
+    def requested(self) -> bool:
+        """
+        :return: True in case the current request carries the token in the profiling header
+        """
+        value = request.headers.get(self.header)
+        return self.token is not None and value is not None and hmac.compare_digest(value, self.token)
+
+    def start(self):
+        """
+        starts a profile for the current thread, a thread is only profiled once at a time
+        :return: cProfile.Profile or None in case the thread is already profiled or the limit is reached
+        """
+        if getattr(self._local, "active", False) or self.written >= self.max_profiles:
+            return None
+
+        self._local.active = True
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def stop(self, profile, route: str, seconds: float, **tags) -> str:
+        """
+        stops a profile and writes it into the profile folder
+        :param profile: cProfile.Profile returned by start
+        :param route: name of the profiled route or code block
+        :param seconds: duration of the profiled route
+        :param tags: further tags of the profile e.g. query_type
+        :return: path of the written profile
+        """
+        profile.disable()
+        self._local.active = False
+
+        with self._lock:
+            if self.written >= self.max_profiles:
+                return None
+            self.written += 1
+
+        # the query type of a submission comes from the form, only numbers end up in the file name
+        try:
+            query_type = f"q{int(tags.get('query_type'))}"
+        except (TypeError, ValueError):
+            query_type = "q-"
+
+        # route.query_type.duration.time.pid.sequence.prof - see parse_name
+        name = ".".join([
+            str(route),
+            query_type,
+            f"{seconds * 1000:.0f}ms",
+            time.strftime("%Y%m%dT%H%M%S"),
+            str(os.getpid()),
+            str(next(self._sequence))
+        ]) + self.extension
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        profile.dump_stats(path)
+        return path
+
+    @contextmanager
+    def profile(self, route: str, **tags):
+        """
+        profiles the wrapped block for a sampled share of the calls
+        :param route: name of the code block used as route of the profile
+        :param tags: further tags of the profile e.g. query_type
+        """
+        profile = self.start() if self.rate and self.sampled() else None
+        if profile is None:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stop(profile, route, time.perf_counter() - start, **tags)
+
+    def tag(self, **tags) -> None:
+        """
+        adds tags to the profile of the current request, without a profiled request nothing happens
+        """
+        if self.enabled and has_request_context() and "profile" in g:
+            g.profile_tags.update(tags)
+
+    def instrument(self, app) -> None:
+        """
+        registers request hooks profiling sampled requests and requests carrying the token
+        :param app: flask app instance
+        """
+        if not self.enabled:
+            return
+
+        @app.before_request
+        def start_profile():
+            if self.sampled() or self.requested():
+                profile = self.start()
+                if profile is not None:
+                    g.profile = profile
+                    g.profile_tags = dict()
+                    g.profile_start = time.perf_counter()
+
+        @app.teardown_request
+        def stop_profile(exc):
+            profile = g.pop("profile", None)
+            if profile is not None:
+                try:
+                    self.stop(profile, request.endpoint or "unknown", time.perf_counter() - g.profile_start,
+                              **g.profile_tags)
+                except OSError as error:
+                    print(error)
+
+
+def parse_name(path: str) -> dict:
+    """
+    :param path: path of a profile written by Profiler.stop
+    :return: dict with route, query_type (None if untagged) and duration in milliseconds of the profile
+    """
+    parts = os.path.basename(path)[:-len(Profiler.extension)].split(".")
+    try:
+        route, query_type, duration = parts[0], parts[1][1:], parts[2]
+        return {
+            "route": route,
+            "query_type": int(query_type) if query_type != "-" else None,
+            "ms": float(duration[:-2])
+        }
+    except (IndexError, ValueError):
+        return {"route": None, "query_type": None, "ms": None}
+
+
+def hot_functions(paths: list, top: int = 20, sort: str = "tottime") -> list:
+    """
+    aggregates profiles and returns the functions with the highest own or cumulative time
+    :param paths: list of profile files
+    :param top: amount of returned functions
+    :param sort: tottime sorts by the time spent in the function itself, cumtime includes the called functions
+    :return: list of dicts with function, calls, tottime, cumtime and the share of the total time
+    """
+    if not paths:
+        return list()
+
+    stats = pstats.Stats(*paths)
+    total = stats.total_tt or 1.0
+
+    rows = list()
+    for (filename, line, function), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        location = f"{filename}:{line}" if line else filename
+        rows.append({
+            "function": f"{function} ({location})",
+            "calls": calls,
+            "tottime": tottime,
+            "cumtime": cumtime,
+            "share": tottime / total
+        })
+
+    rows.sort(key=lambda row: row[sort], reverse=True)
+    return rows[:top]
+
+
+@click.command("profile-report")
+@click.argument("directory", required=False)
+@click.option("--top", default=20, show_default=True, help="amount of reported functions")
+@click.option("--sort", type=click.Choice(["tottime", "cumtime"]), default="tottime", show_default=True,
+              help="tottime sorts by the time in the function itself, cumtime includes the called functions")
+@click.option("--route", help="only aggregate profiles of this route, e.g. index or pool")
+@click.option("--query-type", type=int, help="only aggregate profiles of this query type")
+@with_appcontext
+def profile_report_command(directory, top, sort, route, query_type):
+    """aggregates the captured profiles in DIRECTORY into a report of the hot functions"""
+
+    directory = directory or current_app.config['PROFILE_DIR']
+    paths = list()
+    for name in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+        tags = parse_name(name)
+        if not name.endswith(Profiler.extension) or (route and tags["route"] != route) \
+                or (query_type is not None and tags["query_type"] != query_type):
+            continue
+        paths.append(os.path.join(directory, name))
+
+    if not paths:
+        click.echo(f"no profiles found in {directory}")
+        return
+
+    durations = [parse_name(path)["ms"] or 0.0 for path in paths]
+    click.echo(f"{len(paths)} profiles, {sum(durations) / len(durations):.1f}ms on average")
+    click.echo(f"{'share':>6} {'tottime':>9} {'cumtime':>9} {'calls':>9}  function")
+    for row in hot_functions(paths, top=top, sort=sort):
+        click.echo(f"{row['share']:6.1%} {row['tottime']:9.4f} {row['cumtime']:9.4f} {row['calls']:9}  "
+                   f"{row['function']}")
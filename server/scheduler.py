@@ -0,0 +1,182 @@
+# import standard modules
+import time
+import random
+import threading
+from collections import Counter
+
+# import third party modules
+from sqlalchemy import select
+
+# import project related modules
+from metrics import errors
+
+
+class TaskScheduler:
+    """
+    class counts the collected queries per query type and picks the query type of the next task. Query types below the
+    quota are picked more often the fewer queries they have, once every query type reached the quota all are picked
+    uniformly.
+
+    The counts are kept in memory, seeded from the summary table and updated on every submission. The summary table
+    itself is updated with every bulk insert of the write behind queue, so neither needs a count over FreeQuery. Other
+    worker processes update the same summary table, it is read again in the background every refresh interval.
+
+    -- create a scheduler and update the summary table with every bulk insert:
+        scheduler = TaskScheduler(app, db, QueryTypeCount, query_types=range(12), quota=1000)
+        writer = WriteBehindQueue(app, db, FreeQuery, spool_path="...", on_flush=scheduler.record)
+
+    -- pick a query type and count a submission:
+        query_type = scheduler.choice()
+        scheduler.add(query_type)
+    """
+
+    def __init__(self, app, db, model, query_types, quota: int = 1000, refresh_interval: float = 30.0,
+                 min_weight: float = 0.1):
+        """
+        :param app: flask app instance
+        :param db: Database instance, the counts are read from its read engine - see database.Database
+        :param model: summary table model with the columns query_type and count
+        :param query_types: iterable of query types (0 - 11) to pick from
+        :param quota: amount of queries per query type to aim for, 0 picks all query types uniformly
+        :param refresh_interval: seconds after which the counts are read again from the summary table
+        :param min_weight: weight of a query type which reached the quota, an empty query type has 1 + min_weight
+        """
+        self.app = app
+        self.db = db
+        self.model = model
+        self.query_types = list(query_types)
+        self.quota = max(quota, 0)
+        self.refresh_interval = refresh_interval
+        self.min_weight = min_weight
+
+        self.counts = dict.fromkeys(self.query_types, 0)
+        self.loaded = 0.0
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+        # a random state of its own, the process wide one belongs to the task generation - see QueryTable.seed_lock
+        self._random = random.Random()
+
+    def load(self) -> dict:
+        """
+        reads the counts from the summary table and adds the missing query types to it
+        :return: dict with the amount of collected queries per query type
+        """
+        table = self.model.__table__
+
+        try:
+            # the counts are read from the read bind, they are refreshed often and may lag behind the inserts
+            with self.db.read_engine(self.app).connect() as connection:
+                rows = connection.execute(select([table.c.query_type, table.c.count])).fetchall()
+                counts = {query_type: count for query_type, count in rows}
+
+            # every query type gets a row, so a bulk insert only has to update the counts. A lagging read bind may miss
+            # rows, so they are looked up again in the database of the inserts.
+            if any(q_type not in counts for q_type in self.query_types):
+                with self.db.get_engine(self.app).begin() as connection:
+                    existing = {q_type for q_type, in connection.execute(select([table.c.query_type])).fetchall()}
+                    missing = [q_type for q_type in self.query_types if q_type not in existing]
+                    if missing:
+                        connection.execute(table.insert(), [{"query_type": q_type, "count": 0} for q_type in missing])
+
+        except Exception as exc:
+            # e.g. a concurrently starting worker added the same rows, the counts are read again with the next refresh
+            print(exc)
+            errors.inc(source="db", exception=type(exc).__name__)
+            self.loaded = time.monotonic()
+            return self.stats()
+
+        with self._lock:
+            for q_type in self.query_types:
+                self.counts[q_type] = counts.get(q_type, 0)
+            self.loaded = time.monotonic()
+
+        return self.stats()
+
+    def add(self, query_type, amount: int = 1) -> None:
+        """
+        counts submitted queries of a query type in memory, the summary table is updated by record
+        :param query_type: query type of the submitted queries
+        :param amount: amount of submitted queries
+        """
+        try:
+            query_type = int(query_type)
+        except (TypeError, ValueError):
+            return
+
+        with self._lock:
+            if query_type in self.counts:
+                self.counts[query_type] += amount
+
+    def record(self, session, rows: list) -> None:
+        """
+        adds the query types of inserted rows to the summary table within the transaction inserting them - see the
+        on_flush argument of WriteBehindQueue
+        :param session: database session of the bulk insert
+        :param rows: list of inserted rows as dicts
+        """
+        counts = Counter()
+        for row in rows:
+            try:
+                counts[int(row["query_type"])] += 1
+            except (KeyError, TypeError, ValueError):
+                continue
+
+        table = self.model.__table__
+        for q_type, amount in counts.items():
+            result = session.execute(
+                table.update().where(table.c.query_type == q_type).values(count=table.c.count + amount)
+            )
+            if result.rowcount == 0:
+                session.execute(table.insert().values(query_type=q_type, count=amount))
+
+    def weights(self) -> list:
+        """
+        :return: list with the weight of every query type in the order of query_types
+        """
+        with self._lock:
+            counts = [self.counts[q_type] for q_type in self.query_types]
+
+        if not self.quota:
+            return [1.0] * len(counts)
+
+        return [max(self.quota - count, 0) / self.quota + self.min_weight for count in counts]
+
+    def refresh(self) -> bool:
+        """
+        reads the counts again in a background thread once the refresh interval passed, the caller does not wait for
+        it. Only one refresh runs at a time.
+        :return: True in case a refresh was started
+        """
+        if time.monotonic() - self.loaded <= self.refresh_interval or not self._refresh_lock.acquire(blocking=False):
+            return False
+
+        def run():
+            try:
+                self.load()
+            finally:
+                self._refresh_lock.release()
+
+        try:
+            threading.Thread(target=run, name="scheduler-refresh", daemon=True).start()
+        except RuntimeError:
+            self._refresh_lock.release()
+            return False
+        return True
+
+    def choice(self) -> int:
+        """
+        picks the query type of the next task with the counts at hand, stale counts are read again in the background -
+        see refresh
+        :return: query type
+        """
+        self.refresh()
+        return self._random.choices(self.query_types, weights=self.weights())[0]
+
+    def stats(self) -> dict:
+        """
+        :return: dict with the amount of collected queries per query type
+        """
+        with self._lock:
+            return dict(self.counts)
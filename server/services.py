@@ -0,0 +1,218 @@
+# import standard modules
+import threading
+
+# import third party modules
+from flask import current_app
+
+# import project related modules
+from models import db, FreeQuery, QueryTypeCount
+from scheduler import TaskScheduler
+from profiling import Profiler
+from admission import AdmissionControl
+from write_behind import WriteBehindQueue
+from assets import PageShell
+from metrics import registry, Gauge
+
+
+class Services:
+    """
+    class holds the components of an app instance. Creating it neither opens a database connection nor imports the
+    task generators, the tables are created, the collected queries counted, the task pool filled and the write behind
+    queue started on the first request or an explicit start, e.g. the warm up of a gunicorn worker.
+
+    -- create the components of an app and start them:
+        services = Services(app)
+        services.start()
+
+    -- get the components of the current app within a request:
+        current_services().task_pool.get(3)
+    """
+
+    # most recently started instance of the process, read by the gauges of the metrics endpoint
+    active = None
+
+    def __init__(self, app):
+        """
+        :param app: flask app instance holding the configurations
+        """
+        self.app = app
+        self.task_pool = None
+        self.query_writer = None
+        self.started = False
+        self._lock = threading.Lock()
+
+        # set up the profiler, without a rate and a token nothing is profiled
+        self.profiler = Profiler(
+            app.config['PROFILE_DIR'],
+            rate=app.config['PROFILE_RATE'],
+            header=app.config['PROFILE_HEADER'],
+            token=app.config['PROFILE_TOKEN'],
+            max_profiles=app.config['PROFILE_MAX_FILES']
+        )
+
+        # set up the scheduler picking the query type of the next task from the collected queries per query type
+        self.scheduler = TaskScheduler(
+            app,
+            db,
+            QueryTypeCount,
+            query_types=range(12),
+            quota=app.config['TASK_QUOTA'],
+            refresh_interval=app.config['TASK_COUNTS_REFRESH_INTERVAL']
+        )
+
+        # set up the admission control of the submission views, submissions are shed while too many wait for the
+        # database
+        self.admission = AdmissionControl(
+            rate=app.config['ADMISSION_RATE'],
+            burst=app.config['ADMISSION_BURST'],
+            max_in_flight=app.config['ADMISSION_MAX_IN_FLIGHT'],
+            queue_depth=self.queue_depth,
+            max_queue_depth=app.config['ADMISSION_MAX_QUEUE_DEPTH'],
+            dedup_window=app.config['ADMISSION_DEDUP_WINDOW'],
+            client_header=app.config['ADMISSION_CLIENT_HEADER'],
+            enabled=app.config['ADMISSION_ENABLED']
+        )
+
+        # the index page of the app is rendered once, a request only inserts its task and the values of the form posted
+        # without the page script
+        self.shell = PageShell("base.html", name="task", fields=("query_type", "seed", "streak"))
+
+    def queue_depth(self) -> int:
+        """
+        :return: amount of submissions waiting for the database, 0 before the write behind queue is started
+        """
+        return self.query_writer.stats()["queue_depth"] if self.query_writer is not None else 0
+
+    def start(self) -> None:
+        """
+        creates the missing tables, counts the collected queries and starts the task pool and the write behind queue.
+        Calling it again has no effect, concurrent calls wait for the first one.
+        """
+        if self.started:
+            return
+
+        with self._lock:
+            if self.started:
+                return
+
+            # the task generators import pandas, a process only pays for them once it serves tasks
+            from task_pool import TaskPool, fingerprint_rows
+            from generators.lite import ENGINES
+            from generators.fingerprint import FingerprintIndex
+
+            config = self.app.config
+            with self.app.app_context():
+                db.create_all_stamped(self.app)
+
+                # a read bind of its own, e.g. a second sqlite file, gets the tables too, on a replica they exist
+                if db.has_read_bind(self.app):
+                    db.Model.metadata.create_all(bind=db.read_engine(self.app))
+
+                # set up the pool of pre generated tasks used by the index view, it skips tasks served recently
+                indexes = dict()
+                if config['TASK_FINGERPRINT_INDEX_SIZE'] > 0:
+                    indexes = {
+                        q_type: FingerprintIndex(max_size=config['TASK_FINGERPRINT_INDEX_SIZE'],
+                                                 share=config['TASK_FINGERPRINT_INDEX_SHARE'])
+                        for q_type in range(12)
+                    }
+                self.task_pool = TaskPool(
+                    query_types=range(12),
+                    size=config['TASK_POOL_SIZE'],
+                    low_watermark=config['TASK_POOL_LOW_WATERMARK'],
+                    high_watermark=config['TASK_POOL_HIGH_WATERMARK'],
+                    counters=config['TASK_POOL_COUNTERS'],
+                    engine=ENGINES[config['TASK_ENGINE']],
+                    fmt="columns",
+                    rows=config['TASK_ROWS'],
+                    columns=config['TASK_COLUMNS'],
+                    profiler=self.profiler,
+                    indexes=indexes,
+                    max_attempts=config['TASK_FINGERPRINT_ATTEMPTS']
+                )
+
+                if config['TASK_POOL_ENABLED']:
+                    self.task_pool.start()
+
+                self.scheduler.load()
+
+                # set up the queue writing new queries to the database in batches, the fingerprints of the shown tasks
+                # are added by the flush and the summary table is updated with every insert
+                generator = ENGINES[config['TASK_ENGINE']]()
+                self.query_writer = WriteBehindQueue(
+                    self.app,
+                    db,
+                    FreeQuery,
+                    spool_path=config['WRITE_BEHIND_SPOOL'],
+                    batch_size=config['WRITE_BEHIND_BATCH_SIZE'],
+                    flush_interval=config['WRITE_BEHIND_FLUSH_INTERVAL'],
+                    sync=config['WRITE_BEHIND_SYNC'],
+                    dead_letter_path=config['WRITE_BEHIND_DEAD_LETTER'],
+                    on_flush=self.scheduler.record,
+                    prepare=lambda rows: fingerprint_rows(generator, rows, table_rows=config['TASK_ROWS'],
+                                                          columns=config['TASK_COLUMNS'])
+                )
+                self.query_writer.start()
+
+            if config['METRICS_DIR']:
+                registry.share(config['METRICS_DIR'], interval=config['METRICS_INTERVAL'])
+
+            Services.active = self
+            self.started = True
+
+    def stop(self, timeout: float = 1) -> None:
+        """
+        stops the task pool and inserts the queued submissions
+        :param timeout: seconds to wait for the task pool to finish its current task
+        """
+        if self.task_pool is not None:
+            self.task_pool.stop(timeout=timeout)
+        if self.query_writer is not None:
+            self.query_writer.close()
+
+
+def current_services() -> Services:
+    """
+    :return: Services of the app handling the current request
+    """
+    return current_app.extensions["querycollect"]
+
+
+def active_samples(samples):
+    """
+    :param samples: function returning the samples of a gauge from the started Services
+    :return: gauge callback, without started Services a gauge has no samples
+    """
+    return lambda: samples(Services.active) if Services.active is not None else dict()
+
+
+# expose the state of the task pool and the write behind queue
+registry.register(Gauge(
+    "querycollect_task_pool_size", "ready tasks in the pool", ["query_type"],
+    callback=active_samples(lambda s: {(q_type,): size for q_type, size in s.task_pool.stats()["size"].items()})
+))
+registry.register(Gauge(
+    "querycollect_task_pool_hits", "tasks served from the pool", ["query_type"],
+    callback=active_samples(lambda s: {(q_type,): hits for q_type, hits in s.task_pool.stats()["hits"].items()})
+))
+registry.register(Gauge(
+    "querycollect_task_pool_misses", "tasks generated inline since the pool was empty", ["query_type"],
+    callback=active_samples(lambda s: {(q_type,): misses for q_type, misses in s.task_pool.stats()["misses"].items()})
+))
+registry.register(Gauge(
+    "querycollect_task_fingerprint_index_size", "fingerprints of recently served tasks held by the index",
+    ["query_type"],
+    callback=active_samples(lambda s: {(q_type,): len(index) for q_type, index in s.task_pool.indexes.items()})
+))
+registry.register(Gauge(
+    "querycollect_collected_queries", "collected queries per query type as seen by the scheduler", ["query_type"],
+    callback=active_samples(lambda s: {(q_type,): count for q_type, count in s.scheduler.stats().items()})
+))
+registry.register(Gauge(
+    "querycollect_write_queue_depth", "queries waiting for the next bulk insert",
+    callback=active_samples(lambda s: {(): s.queue_depth()})
+))
+registry.register(Gauge(
+    "querycollect_write_last_batch_size", "rows of the last bulk insert",
+    callback=active_samples(lambda s: {(): s.query_writer.stats()["last_batch_size"]})
+))
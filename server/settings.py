@@ -2,33 +2,112 @@
 import os
 
 # import third party modules
-from flask import Flask
 from dotenv import load_dotenv
-from flask_migrate import Migrate
-from flask_sqlalchemy import SQLAlchemy
 
-# import project related modules
-from models import db, FreeQuery
-
-
-# create a app instance
-app = Flask(__name__)
-
-# load .env file
-load_dotenv()
 
 # set folder paths
 STATIC_FOLDER = os.path.join('static', 'images')
 DATA_FOLDER = os.path.join('static', 'data')
 
-# set app configurations
-app.config['IMAGES'] = STATIC_FOLDER
-app.config['DATA'] = DATA_FOLDER
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('SQLALCHEMY_DATABASE_URI')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-# set up data base for the app instance
-db.init_app(app)
-app.app_context().push()
-db.create_all()
-migrate = Migrate(app, db)
\ No newline at end of file
+
+def configure(app, overrides: dict = None) -> None:
+    """
+    sets the configurations of an app instance from the environment and the .env file
+    :param app: flask app instance
+    :param overrides: dict with configurations taking precedence over the environment e.g. of a test or a benchmark
+    """
+
+    # load .env file
+    load_dotenv()
+
+    # set app configurations
+    app.config['IMAGES'] = STATIC_FOLDER
+    app.config['DATA'] = DATA_FOLDER
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('SQLALCHEMY_DATABASE_URI')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    # set the read bind - exports, dedup passes and the counts of the scheduler read from it, e.g. a replica or the
+    # same database with a pool of its own. Without it all reads use the database of the inserts.
+    read_uri = os.getenv('SQLALCHEMY_READ_DATABASE_URI')
+    app.config['SQLALCHEMY_BINDS'] = {'read': read_uri} if read_uri else None
+
+    # set the connection pool configurations of the database of the inserts and of the read bind - pooled and overflow
+    # connections, seconds to wait for a free connection, seconds after which a connection is replaced and whether a
+    # connection is tested before it is used. A pool size of 0 opens a new connection for every checkout.
+    for prefix, size, overflow in (('DB_', 5, 10), ('DB_READ_', 2, 2)):
+        app.config[prefix + 'POOL_SIZE'] = int(os.getenv(prefix + 'POOL_SIZE', size))
+        app.config[prefix + 'MAX_OVERFLOW'] = int(os.getenv(prefix + 'MAX_OVERFLOW', overflow))
+        app.config[prefix + 'POOL_TIMEOUT'] = float(os.getenv(prefix + 'POOL_TIMEOUT', 10.0))
+        app.config[prefix + 'POOL_RECYCLE'] = int(os.getenv(prefix + 'POOL_RECYCLE', 1800))
+        app.config[prefix + 'POOL_PRE_PING'] = os.getenv(prefix + 'POOL_PRE_PING', 'true').lower() == 'true'
+
+    # set the engine generating the tasks - pandas or the pandas free lite engine creating the same tasks
+    app.config['TASK_ENGINE'] = os.getenv('TASK_ENGINE', 'pandas').lower()
+
+    # set the size of the input tables - rows and additional columns on top of the columns of a query type
+    app.config['TASK_ROWS'] = int(os.getenv('TASK_ROWS', 5))
+    app.config['TASK_COLUMNS'] = int(os.getenv('TASK_COLUMNS', 0))
+
+    # set task scheduling configurations - query types with less collected queries than the quota are shown more often
+    app.config['TASK_QUOTA'] = int(os.getenv('TASK_QUOTA', 1000))
+    app.config['TASK_COUNTS_REFRESH_INTERVAL'] = float(os.getenv('TASK_COUNTS_REFRESH_INTERVAL', 30.0))
+
+    # set task pool configurations - tasks per query type kept ready and the watermarks triggering a refill
+    app.config['TASK_POOL_ENABLED'] = os.getenv('TASK_POOL_ENABLED', 'true').lower() == 'true'
+    app.config['TASK_POOL_SIZE'] = int(os.getenv('TASK_POOL_SIZE', 20))
+    app.config['TASK_POOL_LOW_WATERMARK'] = int(os.getenv('TASK_POOL_LOW_WATERMARK', 5))
+    app.config['TASK_POOL_HIGH_WATERMARK'] = int(os.getenv('TASK_POOL_HIGH_WATERMARK', 15))
+    app.config['TASK_POOL_COUNTERS'] = os.getenv('TASK_POOL_COUNTERS', 'true').lower() == 'true'
+
+    # set task fingerprint configurations - fingerprints of the recently served tasks kept per query type to reject
+    # duplicates (0 turns the index off), the share of the distinct fingerprints of a query type they may cover and the
+    # seeds drawn per task at most. The fingerprint is stored with every collected query.
+    app.config['TASK_FINGERPRINT_INDEX_SIZE'] = int(os.getenv('TASK_FINGERPRINT_INDEX_SIZE', 1024))
+    app.config['TASK_FINGERPRINT_INDEX_SHARE'] = float(os.getenv('TASK_FINGERPRINT_INDEX_SHARE', 0.5))
+    app.config['TASK_FINGERPRINT_ATTEMPTS'] = int(os.getenv('TASK_FINGERPRINT_ATTEMPTS', 3))
+
+    # set write behind configurations - new queries are inserted in batches and spooled to a local file until then,
+    # queries the database rejects are moved to the dead letter file
+    app.config['WRITE_BEHIND_BATCH_SIZE'] = int(os.getenv('WRITE_BEHIND_BATCH_SIZE', 50))
+    app.config['WRITE_BEHIND_FLUSH_INTERVAL'] = float(os.getenv('WRITE_BEHIND_FLUSH_INTERVAL', 2.0))
+    app.config['WRITE_BEHIND_SPOOL'] = os.getenv('WRITE_BEHIND_SPOOL', os.path.join('spool', 'free_query.jsonl'))
+    app.config['WRITE_BEHIND_SYNC'] = os.getenv('WRITE_BEHIND_SYNC', 'false').lower() == 'true'
+    app.config['WRITE_BEHIND_DEAD_LETTER'] = os.getenv(
+        'WRITE_BEHIND_DEAD_LETTER', os.path.join('spool', 'free_query.dead.jsonl')
+    )
+
+    # set admission control configurations of the submission views - token bucket per client, concurrently handled
+    # submissions (defaults to the pooled and overflow connections of the database of the inserts), the maximum amount
+    # of submissions waiting for the database and the seconds an identical resubmission is dropped
+    app.config['ADMISSION_ENABLED'] = os.getenv('ADMISSION_ENABLED', 'true').lower() == 'true'
+    app.config['ADMISSION_RATE'] = float(os.getenv('ADMISSION_RATE', 1.0))
+    app.config['ADMISSION_BURST'] = int(os.getenv('ADMISSION_BURST', 10))
+    app.config['ADMISSION_MAX_IN_FLIGHT'] = int(os.getenv(
+        'ADMISSION_MAX_IN_FLIGHT', max(app.config['DB_POOL_SIZE'] + app.config['DB_MAX_OVERFLOW'], 1)
+    ))
+    app.config['ADMISSION_MAX_QUEUE_DEPTH'] = int(os.getenv('ADMISSION_MAX_QUEUE_DEPTH', 5000))
+    app.config['ADMISSION_DEDUP_WINDOW'] = float(os.getenv('ADMISSION_DEDUP_WINDOW', 10.0))
+    app.config['ADMISSION_CLIENT_HEADER'] = os.getenv('ADMISSION_CLIENT_HEADER') or None
+
+    # set json api configurations - maximum tasks per request and maximum queries per submitted batch
+    app.config['API_MAX_TASKS'] = int(os.getenv('API_MAX_TASKS', 10))
+    app.config['API_MAX_QUERIES'] = int(os.getenv('API_MAX_QUERIES', 50))
+
+    # set http caching configurations - lifetime of fingerprinted static files and gzip settings of dynamic responses
+    app.config['ASSET_MAX_AGE'] = int(os.getenv('ASSET_MAX_AGE', 31536000))
+    app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', 500))
+    app.config['COMPRESS_LEVEL'] = int(os.getenv('COMPRESS_LEVEL', 6))
+
+    # set profiling configurations - share of profiled requests and task generations and the token of the profiling
+    # header
+    app.config['PROFILE_RATE'] = float(os.getenv('PROFILE_RATE', 0.0))
+    app.config['PROFILE_HEADER'] = os.getenv('PROFILE_HEADER', 'X-Profile')
+    app.config['PROFILE_TOKEN'] = os.getenv('PROFILE_TOKEN')
+    app.config['PROFILE_DIR'] = os.getenv('PROFILE_DIR', 'profiles')
+    app.config['PROFILE_MAX_FILES'] = int(os.getenv('PROFILE_MAX_FILES', 1000))
+
+    # set metrics configurations - with several worker processes a shared folder is needed to merge their metrics
+    app.config['METRICS_DIR'] = os.getenv('METRICS_DIR')
+    app.config['METRICS_INTERVAL'] = float(os.getenv('METRICS_INTERVAL', 5.0))
+
+    app.config.update(overrides or dict())
@@ -0,0 +1,182 @@
+let example_input = {
+    "columns": ["name", "age", "date"],
+    "values": [["Micheal", "Judy", "Susan"], ["30", "13", "35"], ["11/10/1908", "9/8/2021", "1/11/1982"]]
+}
+
+let example_output = {
+    "columns": ["name", "age", "date"],
+    "values": [["Micheal", "Susan"], ["30", "35"], ["11/10/1908", "1/11/1982"]]
+}
+
+// renders a table in the columnar format {"columns": [...], "values": [[...], ...], "markers": [{...}, ...]}
+// where null values with a marker are shown by the marker e.g. NaN
+// larger tables are shown page by page, so only a page of rows is in the document at a time
+const tablePageSize = 50;
+
+function buildTable(data, target_table_id, page = 0) {
+    let table = document.getElementById(target_table_id);
+    table.innerHTML = "";
+    if (data.columns.length === 0) {
+        return;
+    }
+
+    let keys = data.columns;
+    let markers = data.markers || keys.map(() => ({}));
+    let rows = data.values[0].length;
+    let pages = Math.max(1, Math.ceil(rows / tablePageSize));
+    page = Math.min(Math.max(page, 0), pages - 1);
+    let first = page * tablePageSize;
+    let last = Math.min(first + tablePageSize, rows);
+    let thead = document.createElement("thead");
+    let tbody = document.createElement("tbody");
+
+    // create the header row of the table
+    let header_row = document.createElement("tr");
+    for (let h = 0; h<keys.length; h++) {
+        let th = `<th scope="col" class="col-xs-${h + 1} fs-6">${keys[h]}</th>`
+        header_row.innerHTML += th;
+    }
+    thead.appendChild(header_row);
+    table.appendChild(thead);
+
+    // create the rows of the current page
+    let body = "";
+    for (let r=first; r<last; r++) {
+        body += "<tr>";
+        for (let c=0; c<keys.length; c++) {
+            let value = data.values[c][r] === null && r in markers[c] ? markers[c][r] : data.values[c][r];
+            body += `<td class="fs-6">${value}</td>`;
+        }
+        body += "</tr>";
+    }
+    tbody.innerHTML = body;
+    table.appendChild(tbody);
+
+    if (pages === 1) {
+        return;
+    }
+
+    // create the page navigation below the table
+    let caption = document.createElement("caption");
+    caption.className = "table-pages fs-6";
+    caption.innerHTML = `<button type="button" class="btn btn-sm btn-light" ${page === 0 ? "disabled" : ""}>&lsaquo;</button>
+        rows ${first + 1} - ${last} of ${rows}
+        <button type="button" class="btn btn-sm btn-light" ${page === pages - 1 ? "disabled" : ""}>&rsaquo;</button>`;
+    let buttons = caption.getElementsByTagName("button");
+    buttons[0].addEventListener("click", () => buildTable(data, target_table_id, page - 1));
+    buttons[1].addEventListener("click", () => buildTable(data, target_table_id, page + 1));
+    table.appendChild(caption);
+}
+buildTable(example_input, "input-table-example");
+buildTable(example_output, "output-table-example");
+
+// prefetch the next tasks and send the answers in the background, so a new task shows up without a
+// round trip. Without prefetched tasks or javascript the forms are posted as usual.
+const prefetchSize = 3;
+const submitBatchSize = 5;
+
+let current = null;
+let streak = 0;
+let tasks = [];
+let pending = [];
+let fetching = false;
+
+function prefetch() {
+    if (fetching || tasks.length >= prefetchSize) {
+        return;
+    }
+    fetching = true;
+    fetch(`/api/tasks?n=${prefetchSize - tasks.length}`)
+        .then(response => response.json())
+        .then(data => tasks.push(...data.tasks))
+        .catch(() => {})
+        .finally(() => { fetching = false; });
+}
+
+function sendQueries(beacon) {
+    if (pending.length === 0) {
+        return;
+    }
+    let batch = pending.splice(0);
+    let body = JSON.stringify({"queries": batch});
+
+    if (beacon && navigator.sendBeacon) {
+        navigator.sendBeacon("/api/queries", new Blob([body], {type: "application/json"}));
+        return;
+    }
+
+    // keep the answers for the next try in case the server could not be reached or asked to slow down, the server
+    // keeps the valid answers of a batch and only rejects the invalid ones
+    fetch("/api/queries", {method: "POST", headers: {"Content-Type": "application/json"}, body: body})
+        .then(response => { if (response.status === 429 || response.status >= 500) { pending.unshift(...batch); } })
+        .catch(() => pending.unshift(...batch));
+}
+
+function renderStreak(value) {
+    streak = value;
+    document.getElementById("streak").value = value;
+    document.getElementById("streak-count").textContent = value;
+
+    let icon = document.querySelector("#streak-section .material-icons");
+    icon.id = value < 1 ? "streak-indicator-start" : "streak-indicator";
+    icon.textContent = value < 1 ? "volunteer_activism" : (value < 3 ? "favorite" : "local_fire_department");
+}
+
+function showTask(task) {
+    current = task;
+    document.getElementById("query-type").value = task.query_type;
+    document.getElementById("seed").value = task.seed;
+    buildTable(task.input, "input-table");
+    buildTable(task.output, "output-table");
+}
+
+document.getElementById("user-inputs").addEventListener("submit", function (event) {
+    let input = document.getElementById("query-input");
+    if (input.value.trim() === "") {
+        event.preventDefault();
+        input.value = "";
+        input.reportValidity();
+        return;
+    }
+    if (tasks.length === 0) {
+        sendQueries(true);
+        return;
+    }
+    event.preventDefault();
+
+    pending.push({"query_type": current.query_type, "seed": current.seed, "query_input": input.value});
+    if (pending.length >= submitBatchSize) {
+        sendQueries(false);
+    }
+
+    input.value = "";
+    renderStreak(streak + 1);
+    showTask(tasks.shift());
+    prefetch();
+});
+
+document.getElementById("skip-inputs").addEventListener("submit", function (event) {
+    if (tasks.length === 0) {
+        sendQueries(true);
+        return;
+    }
+    event.preventDefault();
+
+    renderStreak(0);
+    showTask(tasks.shift());
+    prefetch();
+});
+
+// send the remaining answers regularly and when the page is left
+setInterval(() => sendQueries(false), 5000);
+document.addEventListener("visibilitychange", () => {
+    if (document.visibilityState === "hidden") {
+        sendQueries(true);
+    }
+});
+
+// the page shell is the same for every task, the task itself is embedded as json
+let task = JSON.parse(document.getElementById("task-data").textContent);
+showTask(task);
+renderStreak(task.streak);
+prefetch();
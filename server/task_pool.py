@@ -0,0 +1,254 @@
+# import standard modules
+import time
+import threading
+from collections import deque
+from contextlib import nullcontext
+
+# import project related modules
+from generators.base import ENGINES
+from metrics import generation_latency, errors, task_fingerprints
+
+
+class TaskPool:
+    """
+    class holds a bounded pool of pre generated (seed, input, output) tasks for each query type. A background worker
+    keeps every pool topped up between a low and a high watermark, so a view only pops a ready made task and falls
+    back to inline generation when the pool of the requested query type is empty.
+
+    -- create a pool and start the background refill:
+        pool = TaskPool(query_types=range(12), size=20, low_watermark=5, high_watermark=15)
+        pool.start()
+
+    -- get a task for a given query type:
+        seed, input_table, output_table = pool.get(3)
+
+    -- reject seeds whose task fingerprint was served recently, with one index per query type:
+        indexes = {q_type: FingerprintIndex(max_size=1024, share=0.5) for q_type in range(12)}
+        pool = TaskPool(query_types=range(12), indexes=indexes, max_attempts=3)
+    """
+
+    def __init__(self, query_types, size: int = 20, low_watermark: int = 5, high_watermark: int = 15,
+                 counters: bool = True, interval: float = 0.5, engine=None, fmt: str = "records",
+                 rows: int = 5, columns: int = 0, profiler=None, indexes: dict = None, max_attempts: int = 3):
+        """
+        :param query_types: iterable of query types (0 - 11) to keep a pool for
+        :param size: maximum amount of tasks kept per query type
+        :param low_watermark: the worker starts to refill a pool once it holds less tasks than this value
+        :param high_watermark: the worker refills a pool until it holds this amount of tasks
+        :param counters: indicator whether hits and misses of the pool are counted
+        :param interval: seconds the worker sleeps between two checks if it is not woken up by a consumer
+        :param engine: engine class used to generate the tasks e.g. QueryTable or LiteQueryTable, QueryTable by
+        default
+        :param fmt: format of the input and output table - records or columns, see QueryTable.query_task
+        :param rows: amount of rows of the generated input tables
+        :param columns: amount of additional columns of the generated input tables
+        :param profiler: Profiler capturing a sampled share of the task generations of the worker
+        :param indexes: dict with query type as key and FingerprintIndex of its recently served tasks as value, a new
+        seed is drawn for a task held by the index of its query type - see generators.fingerprint
+        :param max_attempts: seeds drawn per task at most, the last one is used even if its fingerprint was served
+        """
+        self.size = max(size, 1)
+        self.high_watermark = min(max(high_watermark, 1), self.size)
+        self.low_watermark = min(max(low_watermark, 0), self.high_watermark)
+        self.counters = counters
+        self.interval = interval
+        self.engine = engine or ENGINES["pandas"]
+        self.fmt = fmt
+        self.rows = rows
+        self.columns = columns
+        self.profiler = profiler
+        self.indexes = indexes or dict()
+        self.max_attempts = max(max_attempts, 1)
+
+        # one bounded deque per query type - append and popleft on a deque are thread safe
+        self.pools = {q_type: deque(maxlen=self.size) for q_type in query_types}
+        self.hits = dict.fromkeys(self.pools, 0)
+        self.misses = dict.fromkeys(self.pools, 0)
+        self.errors = 0
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._worker = None
+
+    def start(self) -> None:
+        """
+        starts the daemon thread refilling the pools in the background. Calling it twice has no effect.
+        """
+        if self._worker is not None and self._worker.is_alive():
+            return
+
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._refill, name="task-pool-refill", daemon=True)
+        self._worker.start()
+
+    def stop(self, timeout: float = None) -> None:
+        """
+        stops the background worker after the task it is currently generating
+        :param timeout: seconds to wait for the worker to finish
+        """
+        self._stop.set()
+        self._wake.set()
+
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+
+    def wait_ready(self, timeout: float = 30.0) -> bool:
+        """
+        blocks until every pool holds at least one task, e.g. to warm up a worker process before it serves requests
+        :param timeout: maximum seconds to wait
+        :return: True in case all pools hold a task
+        """
+        deadline = time.monotonic() + timeout
+        while not all(self.pools.values()):
+            if time.monotonic() > deadline or self._worker is None:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def get(self, q_type: int) -> tuple:
+        """
+        pops a pre generated task from the pool or generates one inline in case the pool is empty
+        :param q_type: int defining which pre defined filter type will be returned (0 - 11)
+        :return: tuple with the seed of the task and the lists of records for input, output
+        """
+
+        pool = self.pools.get(q_type)
+
+        try:
+            task = pool.popleft()
+            hit = True
+        except (AttributeError, IndexError):
+            task = None
+            hit = False
+
+        if self.counters:
+            with self._lock:
+                counter = self.hits if hit else self.misses
+                counter[q_type] = counter.get(q_type, 0) + 1
+
+        # wake up the worker as soon as a pool falls below its low watermark
+        if pool is not None and len(pool) < self.low_watermark:
+            self._wake.set()
+
+        if task is None:
+            start = time.perf_counter()
+            generator = self.engine()
+
+            # the request waits for the task, so the first seed is served and the retries are left to the worker
+            seed = self._new_seed(generator, q_type, attempts=1)
+            task = (seed, *generator.query_task(q_type, seed=seed, fmt=self.fmt, rows=self.rows, columns=self.columns))
+            generation_latency.observe(time.perf_counter() - start, query_type=q_type, source="inline")
+
+        return task
+
+    def stats(self) -> dict:
+        """
+        summarizes the current state of the pool
+        :return: dict with the amount of ready tasks, hits and misses per query type
+        """
+        with self._lock:
+            return {
+                "size": {q_type: len(pool) for q_type, pool in self.pools.items()},
+                "hits": dict(self.hits),
+                "misses": dict(self.misses),
+                "errors": self.errors
+            }
+
+    def _refill(self) -> None:
+        """
+        worker loop filling every pool below its low watermark up to the high watermark
+        """
+
+        # the worker reuses one generator instead of creating a new one per task
+        generator = self.engine()
+
+        while not self._stop.is_set():
+            for q_type, pool in self.pools.items():
+                if len(pool) >= self.low_watermark and len(pool) > 0:
+                    continue
+
+                while len(pool) < self.high_watermark and not self._stop.is_set():
+                    start = time.perf_counter()
+                    profile = nullcontext()
+                    if self.profiler is not None and self.profiler.rate:
+                        profile = self.profiler.profile("pool", query_type=q_type)
+                    try:
+                        seed = self._new_seed(generator, q_type)
+                        with profile:
+                            task = generator.query_task(q_type, seed=seed, fmt=self.fmt, rows=self.rows,
+                                                        columns=self.columns)
+                        pool.append((seed, *task))
+                    except Exception as exc:
+                        print(exc)
+                        errors.inc(source="generation", exception=type(exc).__name__)
+                        with self._lock:
+                            self.errors += 1
+                        break
+                    generation_latency.observe(time.perf_counter() - start, query_type=q_type, source="pool")
+
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _new_seed(self, generator, q_type: int, attempts: int = None) -> int:
+        """
+        draws the seed of the next task of the worker or of an inline generation. With an index of the query type seeds
+        whose task fingerprint is held by it are rejected. After max_attempts the seed whose task was served longest
+        ago is used. A seed whose fingerprint can not be computed is skipped.
+        :param generator: QueryTable instance of the worker or the view
+        :param q_type: query type of the task
+        :param attempts: seeds drawn at most instead of max_attempts, 1 records the fingerprint of the first seed only
+        :return: seed of the task
+        """
+        index = self.indexes.get(q_type)
+        if index is None:
+            return generator.new_seed()
+
+        candidates = list()
+        for _ in range(attempts or self.max_attempts):
+            seed = generator.new_seed()
+            try:
+                fingerprint = generator.fingerprint(q_type, seed, rows=self.rows, columns=self.columns)
+            except Exception as exc:
+                print(exc)
+                errors.inc(source="fingerprint", exception=type(exc).__name__)
+                continue
+
+            added = index.last_added(fingerprint)
+            if added is None:
+                outcome = "unique"
+                break
+            candidates.append((added, seed, fingerprint))
+        else:
+            # no fingerprint could be computed, the task of a new seed is served without one
+            if not candidates:
+                return generator.new_seed()
+            outcome = "duplicate"
+            _, seed, fingerprint = min(candidates)
+
+        # the duplicate served after all attempts is not counted as rejected
+        rejected = len(candidates) - 1 if outcome == "duplicate" else len(candidates)
+        if rejected:
+            task_fingerprints.inc(rejected, query_type=q_type, outcome="rejected")
+        task_fingerprints.inc(query_type=q_type, outcome=outcome)
+        index.add(fingerprint)
+        return seed
+
+
+def fingerprint_rows(generator, rows: list, table_rows: int = 5, columns: int = 0) -> list:
+    """
+    sets the fingerprint of the shown task of every row from its query type and seed - see QueryTable.fingerprint
+    :param generator: QueryTable instance
+    :param rows: list of dicts with query_type and seed as keys, e.g. the rows of a bulk insert
+    :param table_rows: amount of rows of the input tables the tasks were shown with
+    :param columns: amount of additional columns of the input tables the tasks were shown with
+    :return: the rows, rows without a seed or with a seed whose task can not be created get None
+    """
+    for row in rows:
+        try:
+            row["fingerprint"] = generator.fingerprint(int(row["query_type"]), int(row["seed"]), rows=table_rows,
+                                                       columns=columns)
+        except Exception:
+            row["fingerprint"] = None
+    return rows
@@ -1,29 +1,51 @@
 # import standard modules
-import os
-import uuid
-import random
+import functools
 
 # import third party modules
-from flask import Flask, render_template, request, redirect, url_for
+from flask import Flask, Response, current_app, jsonify, request, redirect, url_for
 
 # import project related modules
-from settings import app, db
-from models import FreeQuery
-from generators.tables import QueryTable
+from services import current_services
+from metrics import registry, submissions, admissions
+from ids import uuid7
+
+
+def guard(route: str, cost=None):
+    """
+    decorator admitting a request with the admission control of the current app - see AdmissionControl.guard
+    :param route: route name used for the counters
+    :param cost: function returning the amount of submissions of the current request, defaults to one
+    """
+
+    def decorator(view):
+        guarded = dict()
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            # the admission control belongs to the app instance, the guarded view is created once per instance
+            admission = current_services().admission
+            if admission not in guarded:
+                guarded[admission] = admission.guard(route, cost=cost)(view)
+            return guarded[admission](*args, **kwargs)
+
+        return wrapper
+
+    return decorator
 
 
 def index():
     """
-    creates the default view showing two tables and the input form for the user.
+    creates the default view showing two tables and the input form for the user. The task is inserted as json into
+    the cached page shell and rendered by the page script.
     """
 
-    # get the logo from the static files
-    logo = os.path.join(app.config['IMAGES'], 'detective_logo.png')
+    services = current_services()
 
     try:
-        # select randomly a query type - random choice provides a uniform distribution
-        query_type = random.choice(list(range(12)))
-        input_table, output_table = QueryTable().query_task(query_type)
+        # select a query type - query types with less collected queries are picked more often
+        query_type = services.scheduler.choice()
+        services.profiler.tag(query_type=query_type)
+        seed, input_table, output_table = services.task_pool.get(query_type)
 
         # in case the incoming url holds a streak value than get it and convert it to int
         streak = request.args.get('streak')
@@ -33,41 +55,79 @@ def index():
         streak = "0"
         redirect(url_for("index", streak=streak))
 
-    return render_template(
-        "base.html",
-        query_type=query_type,
-        input_table=input_table,
-        output_table=output_table,
-        logo=logo,
-        streak=streak
-    )
+    html = services.shell.render({
+        "query_type": query_type,
+        "seed": seed,
+        "input": input_table,
+        "output": output_table,
+        "streak": int(streak)
+    }, query_type=query_type, seed=seed, streak=int(streak))
 
+    # every response holds a new task, so it must not be reused by the browser
+    return Response(html, mimetype="text/html", headers={"Cache-Control": "no-store"})
 
+
+def query_error(query_type, seed, text) -> str:
+    """
+    checks a submitted query of add_query or api_queries
+    :return: reason the query is rejected, None for a valid query
+    """
+    if not isinstance(query_type, int) or isinstance(query_type, bool) or query_type not in range(12):
+        return "query_type must be an int between 0 and 11"
+    if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool) or not 0 <= seed < 2 ** 32):
+        return "seed must be an int between 0 and 2**32 - 1"
+    if not isinstance(text, str) or not text.strip() or len(text) > 400:
+        return "query_input must hold 1 - 400 characters"
+    return None
+
+
+def batch_size() -> int:
+    """
+    :return: amount of queries of a batch submitted to api_queries, the admission control takes one token per query
+    """
+    payload = request.get_json(silent=True)
+    queries = payload.get("queries") if isinstance(payload, dict) else None
+    return len(queries) if isinstance(queries, list) and queries else 1
+
+
+@guard("add_query")
 def add_query():
     """
     post view not showing anything but taking a post request to create a new database entry.
     It will redirect to the index view after post request an increase the count of the streak by 1.
     """
 
-    # get the variables
-    query_type = request.form.get("query_type")
+    services = current_services()
+
+    # get the variables, the query type is counted and deduplicated as int like in api_queries
+    query_type = request.form.get("query_type", type=int)
     free_text_query = request.form.get("query_input")
+    seed = request.form.get("seed", type=int)
     streak = request.form.get("streak", 0)
     streak = str(int(streak) + 1)
 
-    try:
-        # add new query
-        new_query = FreeQuery(
-            id=uuid.uuid1(),
-            query_type=query_type,
-            free_text_query=free_text_query
-        )
+    error = query_error(query_type, seed, free_text_query)
+    if error:
+        return Response(error, status=400, mimetype="text/plain")
+    services.profiler.tag(query_type=query_type)
 
-        db.session.add(new_query)
-        db.session.commit()
+    # a double click or resend of the same query only counts once, the user gets the next task either way
+    if services.admission.duplicate(query_type, seed, free_text_query):
+        admissions.inc(route="add_query", outcome="coalesced")
+        return redirect(url_for("index", streak=streak))
 
-    except Exception as exc:
-        print(exc)
+    # queue the new query - it is spooled right away and inserted with the next batch
+    try:
+        services.query_writer.submit({
+            "id": uuid7(),
+            "query_type": query_type,
+            "free_text_query": free_text_query,
+            "seed": seed
+        })
+    except ValueError as exc:
+        return Response(str(exc), status=400, mimetype="text/plain")
+    submissions.inc(query_type=query_type)
+    services.scheduler.add(query_type)
 
     return redirect(url_for("index", streak=streak))
 
@@ -77,5 +137,83 @@ def skip():
     view to handle the skip button. It will just get the streak and redirect to index view again.
     :return:
     """
-    streak = request.form.get("streak-break")
-    return redirect(url_for("index", streak=streak))
\ No newline at end of file
+    streak = request.values.get("streak", 0)
+    return redirect(url_for("index", streak=streak))
+
+
+def metrics():
+    """
+    view exposing the metrics of all worker processes in the prometheus text format
+    """
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+def api_tasks():
+    """
+    json view returning several tasks at once, so the page can prefetch the next tasks. The amount is set by the
+    query parameter n, the tables are in the columnar format of QueryTable.to_columns.
+    """
+
+    services = current_services()
+    n = request.args.get("n", 1, type=int)
+    n = max(1, min(n, current_app.config['API_MAX_TASKS']))
+
+    tasks = list()
+    for _ in range(n):
+        query_type = services.scheduler.choice()
+        seed, input_table, output_table = services.task_pool.get(query_type)
+        tasks.append({
+            "query_type": query_type,
+            "seed": seed,
+            "input": input_table,
+            "output": output_table
+        })
+
+    return jsonify(tasks=tasks)
+
+
+@guard("api_queries", cost=batch_size)
+def api_queries():
+    """
+    json view taking a batch of submitted queries {"queries": [{"query_type": 3, "seed": 42, "query_input": "..."}]}
+    which are inserted together with one bulk insert. Resubmissions of the same query are only counted once. Invalid
+    queries are rejected one by one, their index and error are returned next to the amount of accepted queries.
+    """
+
+    services = current_services()
+    max_queries = current_app.config['API_MAX_QUERIES']
+    payload = request.get_json(silent=True)
+    queries = payload.get("queries") if isinstance(payload, dict) else None
+
+    if not isinstance(queries, list) or not 0 < len(queries) <= max_queries:
+        return jsonify(error=f"queries must be a list of 1 - {max_queries} queries"), 400
+
+    rows = list()
+    rejected = list()
+    coalesced = 0
+    for ix, query in enumerate(queries):
+        query = query if isinstance(query, dict) else dict()
+        query_type, seed, text = query.get("query_type"), query.get("seed"), query.get("query_input")
+
+        error = query_error(query_type, seed, text)
+        if error:
+            rejected.append({"index": ix, "error": error})
+            continue
+
+        if services.admission.duplicate(query_type, seed, text):
+            coalesced += 1
+            continue
+
+        rows.append({"id": uuid7(), "query_type": query_type, "free_text_query": text, "seed": seed})
+
+    if coalesced:
+        admissions.inc(coalesced, route="api_queries", outcome="coalesced")
+    if rows:
+        services.query_writer.submit_many(rows)
+    for row in rows:
+        submissions.inc(query_type=row["query_type"])
+        services.scheduler.add(row["query_type"])
+
+    # the valid queries of a batch are kept, only a batch without any valid query is a bad request
+    status = 400 if len(rejected) == len(queries) else 202
+    return jsonify(accepted=len(rows), coalesced=coalesced, rejected=rejected), status
@@ -0,0 +1,426 @@
+# import standard modules
+import os
+import glob
+import json
+import time
+import uuid
+import atexit
+import threading
+
+# import third party modules
+from sqlalchemy import BigInteger, Integer, SmallInteger, String
+from sqlalchemy.exc import DisconnectionError, InterfaceError, OperationalError, TimeoutError as PoolTimeoutError
+
+# import project related modules
+from metrics import commit_latency, errors
+from processes import process_start, process_identity, process_alive
+
+
+# errors of the connection rather than of a row, the rows of a batch failing with them are kept for the next flush
+TRANSIENT_ERRORS = (DisconnectionError, InterfaceError, OperationalError, PoolTimeoutError)
+
+
+class WriteBehindQueue:
+    """
+    class collects new database rows in memory and writes them as one bulk insert, once the queue reaches the batch
+    size or the flush interval passed. Every row is appended to a local spool file before it is queued, so rows of a
+    process dying between two flushes are inserted by the next process starting with the same spool path. Every process
+    writes its own spool file named after its pid, its start time and a random part, so several worker processes can
+    share the same spool path and a process reusing the pid of a dead one recovers its spool instead of appending to it.
+    Rows are checked against the columns of the model before they are spooled. A failing bulk insert is retried row by
+    row, rows which still fail are moved to a dead letter file, so a single bad row never blocks the queue.
+
+    -- create a queue and start the background flush:
+        writer = WriteBehindQueue(app, db, FreeQuery, spool_path="spool/free_query.jsonl", batch_size=50)
+        writer.start()
+
+    -- queue a new row:
+        writer.submit({"id": "...", "query_type": 3, "free_text_query": "..."})
+
+    -- with sync=True every submit is inserted right away, which keeps tests deterministic
+
+    -- update a summary table within the transaction of every bulk insert:
+        writer = WriteBehindQueue(app, db, FreeQuery, spool_path="...", on_flush=scheduler.record)
+
+    -- derive columns of the rows off the request path before they are inserted:
+        writer = WriteBehindQueue(app, db, FreeQuery, spool_path="...", prepare=add_fingerprints)
+    """
+
+    def __init__(self, app, db, model, spool_path: str, batch_size: int = 50, flush_interval: float = 2.0,
+                 sync: bool = False, on_flush=None, prepare=None, dead_letter_path: str = None):
+        """
+        :param app: flask app used to push an app context for the flushing thread
+        :param db: flask_sqlalchemy database instance
+        :param model: database model the rows are inserted into
+        :param spool_path: path of the append only spool file, the identity of the process is appended - see
+        process_identity
+        :param batch_size: amount of queued rows triggering a flush
+        :param flush_interval: maximum seconds a row waits in the queue
+        :param sync: indicator whether rows are inserted within submit instead of the background thread
+        :param on_flush: function called with the session and the inserted rows before a bulk insert is committed
+        :param prepare: function called with the rows of a batch before they are inserted, it has to set the same keys
+        on every row
+        :param dead_letter_path: jsonl file of the rows the database rejected, defaults to the spool path with the
+        extension .dead.jsonl
+        """
+        self.app = app
+        self.db = db
+        self.model = model
+        self.spool_path = spool_path
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_interval
+        self.sync = sync
+        self.on_flush = on_flush
+        self.prepare = prepare
+        self.dead_letter_path = dead_letter_path or f"{os.path.splitext(spool_path)[0]}.dead.jsonl"
+
+        self.queue = list()
+        self.segments = list()
+        self.segment_count = 0
+
+        # flush statistics
+        self.flushes = 0
+        self.failures = 0
+        self.dead_letters = 0
+        self.rows_written = 0
+        self.last_batch_size = 0
+        self.last_flush_latency = 0.0
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._worker = None
+        self._spool = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(spool_path)), exist_ok=True)
+        self.identity = f"{process_identity(os.getpid())}-{uuid.uuid4().hex[:8]}"
+        self.active_path = f"{spool_path}.{self.identity}"
+
+        # the spool files left by dead processes are queued before the own spool file is opened
+        self._recover()
+        self._spool = open(self.active_path, "a", encoding="utf-8")
+
+    def start(self) -> None:
+        """
+        starts the daemon thread flushing the queue and registers a final flush at interpreter exit
+        """
+        if self.sync or (self._worker is not None and self._worker.is_alive()):
+            return
+
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name="write-behind-flush", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def close(self) -> None:
+        """
+        stops the background thread and writes all queued rows. The spool file is removed once everything is written.
+        """
+        self._stop.set()
+        self._wake.set()
+
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+
+        self.flush()
+
+        with self._lock:
+            if not self.queue and not self._spool.closed:
+                self._spool.close()
+                os.remove(self.active_path)
+
+    def submit(self, row: dict) -> None:
+        """
+        spools and queues a new row
+        :param row: dict with column names of the model as keys
+        """
+        self.submit_many([row])
+
+    def submit_many(self, rows: list) -> None:
+        """
+        spools and queues several rows with one write to the spool file
+        :param rows: list of dicts with column names of the model as keys
+        :raises ValueError: in case a row does not fit the model, none of the rows is queued - see validate
+        """
+        for row in rows:
+            self.validate(row)
+
+        lines = "".join(json.dumps(row, default=str) + "\n" for row in rows)
+
+        with self._lock:
+            self._spool.write(lines)
+            self._spool.flush()
+            self.queue.extend(rows)
+            depth = len(self.queue)
+
+        if self.sync:
+            self.flush()
+        elif depth >= self.batch_size:
+            self._wake.set()
+
+    def validate(self, row: dict) -> None:
+        """
+        checks a row against the columns of the model, so a row the database can not hold is rejected before it is
+        spooled instead of failing every bulk insert it is part of
+        :param row: dict with column names of the model as keys
+        :raises ValueError: in case of an unknown column, an integer out of the range of its column or a text longer
+        than its column
+        """
+        columns = self.model.__table__.columns
+        for key, value in row.items():
+            if key not in columns:
+                raise ValueError(f"{self.model.__tablename__} has no column {key}")
+            if value is None:
+                continue
+
+            column_type = columns[key].type
+            if isinstance(column_type, Integer):
+                bits = 31
+                if isinstance(column_type, (BigInteger, SmallInteger)):
+                    bits = 63 if isinstance(column_type, BigInteger) else 15
+                try:
+                    number = int(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"{key} must be an integer") from None
+                if not -2 ** bits <= number < 2 ** bits:
+                    raise ValueError(f"{key} is out of the range of a {bits + 1} bit integer")
+
+            elif isinstance(column_type, String) and column_type.length and len(str(value)) > column_type.length:
+                raise ValueError(f"{key} is longer than {column_type.length} characters")
+
+    def flush(self) -> int:
+        """
+        inserts all queued rows with one bulk insert. In case of a connection error the rows stay queued and spooled,
+        in case of any other error the rows are inserted one by one and the rows still failing are dead lettered.
+        :return: amount of inserted rows
+        """
+
+        with self._flush_lock:
+            batch, segments = self._rotate()
+            if not batch:
+                return 0
+
+            if self.prepare is not None:
+                self.prepare(batch)
+
+            # rows spooled by an older version might miss newer columns, an executemany needs the same keys per row
+            keys = set().union(*batch)
+            rows = [{key: row.get(key) for key in keys} for row in batch]
+
+            start = time.perf_counter()
+            try:
+                self._insert(rows)
+                inserted, requeued = len(rows), list()
+
+            except Exception as exc:
+                with self._lock:
+                    self.failures += 1
+                if isinstance(exc, TRANSIENT_ERRORS):
+                    inserted, requeued = 0, batch
+                else:
+                    inserted, requeued = self._insert_each(rows)
+
+            latency = time.perf_counter() - start
+
+            # put the rows back in front of the queue, the spool segments are kept for them
+            if requeued:
+                with self._lock:
+                    self.queue[:0] = requeued
+                    self.segments[:0] = segments
+                    self.rows_written += inserted
+                return inserted
+
+            commit_latency.observe(latency)
+            for segment in segments:
+                os.remove(segment)
+
+            with self._lock:
+                self.flushes += 1
+                self.rows_written += inserted
+                self.last_batch_size = inserted
+                self.last_flush_latency = latency
+
+            return inserted
+
+    def _insert(self, rows: list) -> None:
+        """
+        inserts the rows with one bulk insert and one commit, the transaction is rolled back in case of an error
+        :param rows: list of dicts with the same keys
+        """
+        with self.app.app_context():
+            try:
+                self.db.session.execute(self.model.__table__.insert(), rows)
+                if self.on_flush is not None:
+                    self.on_flush(self.db.session, rows)
+                self.db.session.commit()
+            except Exception as exc:
+                print(exc)
+                errors.inc(source="db", exception=type(exc).__name__)
+                self.db.session.rollback()
+                raise
+
+    def _insert_each(self, rows: list) -> tuple:
+        """
+        inserts the rows of a failed bulk insert one by one and moves the rows the database rejects to the dead letter
+        file. A connection error stops the retry, the rows from the failing one on are kept for the next flush.
+        :param rows: list of dicts with the same keys
+        :return: tuple with the amount of inserted rows and the list of rows to queue again
+        """
+        inserted = 0
+        for ix, row in enumerate(rows):
+            try:
+                self._insert([row])
+            except TRANSIENT_ERRORS:
+                return inserted, rows[ix:]
+            except Exception as exc:
+                self._dead_letter(row, exc)
+            else:
+                inserted += 1
+        return inserted, list()
+
+    def _dead_letter(self, row: dict, exc: Exception) -> None:
+        """
+        appends a row the database rejected together with the error to the dead letter file
+        """
+        with open(self.dead_letter_path, "a", encoding="utf-8") as file:
+            file.write(json.dumps({"error": f"{type(exc).__name__}: {exc}", "row": row}, default=str) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+        errors.inc(source="dead_letter", exception=type(exc).__name__)
+        with self._lock:
+            self.dead_letters += 1
+
+    def stats(self) -> dict:
+        """
+        :return: dict with the queue depth and the latency and size of the last flush
+        """
+        with self._lock:
+            return {
+                "queue_depth": len(self.queue),
+                "last_batch_size": self.last_batch_size,
+                "last_flush_latency": self.last_flush_latency,
+                "flushes": self.flushes,
+                "failures": self.failures,
+                "dead_letters": self.dead_letters,
+                "rows_written": self.rows_written
+            }
+
+    def _rotate(self) -> tuple:
+        """
+        takes the queued rows and moves the active spool file to a segment, so new rows go to a fresh spool file
+        :return: tuple with the list of rows and the list of spool segments holding them
+        """
+        with self._lock:
+            if not self.queue:
+                return [], []
+
+            self._spool.close()
+            segment = self._next_segment()
+            os.replace(self.active_path, segment)
+            self._spool = open(self.active_path, "a", encoding="utf-8")
+
+            batch, self.queue = self.queue, list()
+            segments, self.segments = self.segments + [segment], list()
+
+        return batch, segments
+
+    def _next_segment(self) -> str:
+        self.segment_count += 1
+        return f"{self.active_path}.{self.segment_count}"
+
+    def _orphans(self) -> list:
+        """
+        :return: list of spool files left by processes which are not running anymore
+        """
+        paths = list()
+        for path in sorted(glob.glob(f"{self.spool_path}*")):
+            suffix = path[len(self.spool_path):]
+
+            # the spool path itself was written by versions without a pid per process, versions without the start
+            # time of the process only appended the pid
+            if suffix:
+                try:
+                    identity = suffix.split(".")[1]
+                    pid, _, start = identity.partition("-")
+                    pid, start = int(pid), start.split("-")[0]
+                except (IndexError, ValueError):
+                    continue
+                if identity == self.identity or spool_owner_alive(pid, start):
+                    continue
+
+            paths.append(path)
+        return paths
+
+    def _recover(self) -> None:
+        """
+        queues all rows left in spool files of stopped processes. Rows already in the database are skipped, since
+        the process might have died after the commit but before removing the spool segment.
+        """
+
+        # claim every orphaned file with an atomic rename, so a concurrently starting process skips it
+        claimed = list()
+        for path in self._orphans():
+            segment = self._next_segment()
+            try:
+                os.replace(path, segment)
+            except FileNotFoundError:
+                continue
+            claimed.append(segment)
+
+        rows = list()
+        for path in claimed:
+            with open(path, encoding="utf-8") as spool:
+                for line in spool:
+                    try:
+                        rows.append(json.loads(line))
+                    except ValueError:
+                        # the last line of a spool might be cut off by the dying process
+                        continue
+
+        if rows:
+            primary_key = self.model.__table__.primary_key.columns.values()[0]
+            keys = [row[primary_key.name] for row in rows]
+
+            with self.app.app_context():
+                existing = self.db.session.query(primary_key).filter(primary_key.in_(keys)).all()
+            existing = {str(key) for key, in existing}
+
+            self.queue = [row for row in rows if str(row[primary_key.name]) not in existing]
+
+        # the recovered rows are held by the claimed files, which are removed with the next successful flush
+        self.segments = claimed
+
+        # nothing left to insert, so the old files are not needed anymore
+        if not self.queue:
+            for segment in self.segments:
+                os.remove(segment)
+            self.segments = list()
+
+    def _run(self) -> None:
+        """
+        worker loop flushing the queue every flush interval or as soon as the batch size is reached
+        """
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+
+def spool_owner_alive(pid: int, start: str) -> bool:
+    """
+    :param pid: process id of the spool file
+    :param start: start time of the process of the spool file, empty for spool files of older versions
+    :return: True in case the process which wrote the spool file is still running
+    """
+    if not process_alive(pid):
+        return False
+
+    # a running process with another start time reused the pid of the dead owner
+    if start and start != "0":
+        return process_start(pid) == start
+
+    # older versions wrote the pid only, a file carrying the own pid was left by a dead process with the same pid
+    return pid != os.getpid()
@@ -0,0 +1,10 @@
+# import standard modules
+import os
+import sys
+
+
+# the server modules import each other by module name like in the docker image, the generators as a package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "server")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
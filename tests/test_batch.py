@@ -0,0 +1,29 @@
+# import standard modules
+import random
+
+# import third party modules
+import pytest
+
+# import project related modules
+from generators.tables import QueryTable
+
+
+def single_tasks(engine: QueryTable, q_type: int, seeds: list, rows: int, columns: int) -> list:
+    tasks = list()
+    for seed in seeds:
+        try:
+            tasks.append((seed, *engine.query_task(q_type, seed=seed, fmt="columns", rows=rows, columns=columns)))
+        except Exception:
+            continue
+    return tasks
+
+
+@pytest.mark.parametrize("q_type, n, seed, rows, columns", [(5, 150, 7, 30, 2), (0, 50, 1, 5, 0), (11, 50, 3, 12, 1)])
+def test_batch_equals_single_tasks(q_type, n, seed, rows, columns):
+    """a batch holds the tasks of all seeds query_task creates, also in case the transformation of a block fails"""
+    engine = QueryTable()
+    rng = random.Random(seed)
+    seeds = [rng.randrange(2 ** 32) for _ in range(n)]
+
+    batch = engine.query_tasks(q_type, n=n, seed=seed, fmt="columns", rows=rows, columns=columns)
+    assert batch == single_tasks(engine, q_type, seeds, rows, columns)
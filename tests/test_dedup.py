@@ -0,0 +1,25 @@
+# import third party modules
+import pytest
+import numpy as np
+
+# import project related modules
+from dedup import MinHasher
+
+
+TEXT = "select all rows"
+
+
+@pytest.mark.parametrize("empty", ["", None, "...", " ?! "])
+@pytest.mark.parametrize("position", [0, 1, 2])
+def test_signatures_of_empty_texts(empty, position):
+    """texts normalizing to an empty string are hashed at the start, the middle and the end of a chunk"""
+    hasher = MinHasher()
+    texts = [TEXT, "select the first row"]
+    texts.insert(position, empty)
+
+    signatures = hasher.signatures(texts)
+    alone = hasher.signatures([empty, TEXT])
+
+    assert signatures.shape == (3, hasher.num_perm)
+    assert np.array_equal(signatures[position], alone[0])
+    assert np.array_equal(signatures[texts.index(TEXT)], alone[1])
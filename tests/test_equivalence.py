@@ -0,0 +1,95 @@
+# import standard modules
+import os
+import sys
+import math
+import subprocess
+
+# import third party modules
+import pytest
+
+# import project related modules
+from generators.tables import QueryTable
+from generators.lite import LiteQueryTable
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def same_value(left, right) -> bool:
+    """
+    :return: True in case both values have the same type and value, NaN equals NaN
+    """
+    if type(left) is not type(right):
+        return False
+    if isinstance(left, float) and math.isnan(left):
+        return math.isnan(right)
+    return left == right
+
+
+def same_records(left: list, right: list) -> bool:
+    """
+    compares two lists of records including the column order of each record
+    :return: True in case both lists hold the same records
+    """
+    if len(left) != len(right):
+        return False
+
+    for left_record, right_record in zip(left, right):
+        if list(left_record) != list(right_record):
+            return False
+        if not all(same_value(left_record[key], right_record[key]) for key in left_record):
+            return False
+
+    return True
+
+
+def run_task(engine, q_type: int, seed: int, rows: int = 5, columns: int = 0) -> tuple:
+    """
+    creates a seeded task
+    :return: tuple with the task tables (input, output) or None and the name of the raised exception or None
+    """
+    try:
+        return engine.tables(q_type, seed=seed, rows=rows, columns=columns), None
+    except Exception as exc:
+        return None, type(exc).__name__
+
+
+@pytest.mark.parametrize("rows, columns", [(5, 0), (20, 2)])
+@pytest.mark.parametrize("q_type", range(12))
+def test_engines_create_the_same_tasks(q_type, rows, columns):
+    """the pandas and the lite engine create the same tables or raise the same exception for every seed"""
+    pandas_engine, lite_engine = QueryTable(), LiteQueryTable()
+
+    mismatches = list()
+    for seed in range(100):
+        expected, expected_error = run_task(pandas_engine, q_type, seed, rows, columns)
+        actual, actual_error = run_task(lite_engine, q_type, seed, rows, columns)
+
+        if expected_error or actual_error:
+            equal = expected_error == actual_error
+        else:
+            # both wire formats have to match, the columnar one including the dtypes and NaN markers
+            equal = all(
+                same_records(pandas_engine.to_records(e), lite_engine.to_records(a))
+                and pandas_engine.to_columns(e) == lite_engine.to_columns(a)
+                for e, a in zip(expected, actual)
+            )
+
+        if not equal:
+            mismatches.append(seed)
+
+    assert mismatches == []
+
+
+def test_lite_engine_runs_without_pandas():
+    """creating and fingerprinting a task with the lite engine imports neither pandas nor randomtables"""
+    script = (
+        "import sys\n"
+        "from generators.lite import LiteQueryTable\n"
+        "engine = LiteQueryTable()\n"
+        "engine.query_task(3, seed=1, fmt='columns')\n"
+        "engine.fingerprint(3, 1)\n"
+        "print(sorted({'pandas', 'randomtables'} & set(sys.modules)))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
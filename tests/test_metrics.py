@@ -0,0 +1,21 @@
+# import standard modules
+import os
+
+# import project related modules
+from metrics import Registry, Counter
+
+
+def test_snapshot_of_a_stopped_process_with_the_same_pid_is_kept(tmp_path):
+    """a process reusing the pid of a stopped process writes a snapshot of its own, the counters of both are merged"""
+    registry = Registry()
+    requests = registry.register(Counter("requests_total", "handled requests", ["route"]))
+    registry.directory, registry.interval = str(tmp_path), 5.0
+
+    requests.inc(route="index")
+    registry.write_snapshot()
+
+    # the snapshot of a stopped process which had the same pid but another start time
+    snapshot = next(tmp_path.glob("metrics-*.json"))
+    os.replace(snapshot, tmp_path / f"metrics-{os.getpid()}-1.json")
+
+    assert registry.collect()["requests_total"]["samples"] == {'["index"]': 2.0}